@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Generic,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar
+)
+
+from .util.pipeline import bounded_map
+
+
+DEFAULT_BATCH_BUFFER = 64
+DEFAULT_BATCH_CONCURRENCY = 4
+MAX_BATCH_CONCURRENCY = 64
+
+T = TypeVar('T')
+
+
+class BatchResult(NamedTuple):
+    """The outcome of one input of a batch."""
+
+    index: int
+    value: Any
+    error: Optional[str]
+
+
+class Batch(Generic[T]):
+    """Inputs run with bounded concurrency, whose results are collected as they complete.
+
+    A failing input does not stop the rest of the batch; its result carries
+    the error's description instead of a value.  Once the number of results
+    waiting to be collected reaches the buffer size, no more inputs are
+    started until some are collected.
+
+    """
+
+    def __init__(
+        self,
+        func: Callable[[T], Awaitable[Any]],
+        items: Sequence[T],
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+        *,
+        buffer: int = DEFAULT_BATCH_BUFFER,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Create and start a new batch.
+
+        :param func: the coroutine function run on each input
+        :param items: the inputs
+        :param concurrency: the number of inputs run at once
+        :param buffer: the number of results held until they are collected
+        :param clock: the source of the current time in seconds
+
+        """
+        if not 1 <= concurrency <= MAX_BATCH_CONCURRENCY:
+            raise ValueError(f'Batch concurrency must be between 1 and {MAX_BATCH_CONCURRENCY}, not {concurrency}')
+
+        self.__buffer = max(buffer, 1)
+        self.__clock = clock
+        self.__collected = asyncio.Event()
+        self.__done = False
+        self.__func = func
+        self.__items = items
+        self.__last_collected = clock()
+        self.__ready = asyncio.Event()
+        self.__results: List[BatchResult] = []
+        self.__task = asyncio.create_task(self.__run(concurrency))
+
+    @property
+    def finished(self) -> bool:
+        """Return whether every result has been collected."""
+        return self.__done and not self.__results
+
+    @property
+    def idle(self) -> float:
+        """Return the time in seconds since results were last collected."""
+        return self.__clock() - self.__last_collected
+
+    def cancel(self) -> None:
+        self.__task.cancel()
+
+    async def collect(self, timeout: float) -> List[BatchResult]:
+        """Wait up to the timeout for results and return those completed since the last call."""
+        if not self.__results and not self.__done:
+            try:
+                await asyncio.wait_for(self.__ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        results, self.__results = self.__results, []
+        self.__last_collected = self.__clock()
+        if not self.__done:
+            self.__ready.clear()
+        self.__collected.set()
+
+        return results
+
+    async def __call(self, item: Tuple[int, T]) -> BatchResult:
+        index, value = item
+        try:
+            return BatchResult(index, await self.__func(value), None)
+        except Exception as ex:
+            return BatchResult(index, None, f'{type(ex).__name__}: {ex}')
+
+    async def __enumerate(self) -> AsyncIterator[Tuple[int, T]]:
+        for index, item in enumerate(self.__items):
+            yield index, item
+
+    async def __run(self, concurrency: int) -> None:
+        try:
+            async for result in bounded_map(self.__call, self.__enumerate(), concurrency):
+                while len(self.__results) >= self.__buffer:
+                    self.__collected.clear()
+                    await self.__collected.wait()
+                self.__results.append(result)
+                self.__ready.set()
+        finally:
+            self.__done = True
+            self.__ready.set()
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import mmap
+import tempfile
+from types import TracebackType
+from typing import BinaryIO, cast, List, Optional, Type
+
+from ngitws.catalog import CatalogFile
+
+from .exception import FileTooLargeError
+from .util.splitter import Buffer
+
+
+DEFAULT_MAX_FILE_SIZE = 256 * 1024 * 1024  # in bytes
+
+
+class FileContent:
+    """Content of a downloaded catalog file.
+
+    Small files are held in memory as bytes.  Large files are spilled to an
+    anonymous temporary file and memory-mapped, so their pages are backed by
+    the file rather than the process heap and the kernel can drop them under
+    memory pressure.  The content must be closed once it is no longer needed.
+
+    """
+
+    def __init__(self, data: bytes = b'', file: Optional[BinaryIO] = None):
+        """Create new file content.
+
+        :param data: the content held in memory, if it is not spilled
+        :param file: the temporary file holding the spilled content, if any
+
+        """
+        self.__file = file
+        self.__map: Optional[mmap.mmap] = None
+        if file is not None:
+            file.seek(0, 2)
+            if file.tell() > 0:
+                self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.__data = data
+
+    def __enter__(self) -> FileContent:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType]
+    ) -> None:
+        self.close()
+
+    @property
+    def data(self) -> Buffer:
+        """Return the content, as a memory map if it was spilled."""
+        return self.__map if self.__map is not None else self.__data
+
+    @property
+    def spilled(self) -> bool:
+        return self.__file is not None
+
+    def close(self) -> None:
+        """Release the memory map and temporary file, if any."""
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+class CatalogFileReader:
+    """Reader that downloads catalog files into bytes.
+
+    Chunks are collected and joined into bytes with a single copy, since the
+    XML parsers only accept bytes and copying from a buffer would add a
+    second copy.  Files over the maximum size are refused, before any data is
+    read when the record states its length.
+
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_FILE_SIZE):
+        """Create a new file reader.
+
+        :param max_size: the largest file in bytes that will be read
+
+        """
+        if max_size < 1:
+            raise ValueError(f'Maximum file size must be at least one byte, not {max_size}')
+
+        self.__max_size = max_size
+
+    @property
+    def max_size(self) -> int:
+        return self.__max_size
+
+    @staticmethod
+    def content_length(catalog_file: CatalogFile) -> Optional[int]:
+        """Return the length the file's record states for its content, if it states one."""
+        # Not every record carries a content length, so it is only ever a hint.
+        return getattr(catalog_file.record.file_metadata, 'content_length', None)
+
+    async def read(self, catalog_file: CatalogFile) -> bytes:
+        """Read the whole content of a file."""
+        expected_size = self.content_length(catalog_file)
+        if expected_size is not None and expected_size > self.__max_size:
+            raise FileTooLargeError(f'File of {expected_size} bytes exceeds the maximum of {self.__max_size} bytes')
+
+        chunks: List[bytes] = []
+        size = 0
+        async for chunk in catalog_file.data:
+            size += len(chunk)
+            if size > self.__max_size:
+                raise FileTooLargeError(f'File exceeds the maximum of {self.__max_size} bytes')
+            chunks.append(chunk)
+
+        # Joining copies the content once, and returns a file that arrived in one chunk as is.
+        return b''.join(chunks)
+
+    async def read_content(self, catalog_file: CatalogFile, spill_size: Optional[int] = None) -> FileContent:
+        """Read the whole content of a file, spilling it to a memory-mapped file once it exceeds the spill size.
+
+        Chunks are kept in memory until the spill size is passed, then written
+        out along with every later chunk, so a file under the spill size is
+        never written to disk.  Without a spill size this is the same as read().
+
+        """
+        if spill_size is None:
+            return FileContent(await self.read(catalog_file))
+
+        expected_size = self.content_length(catalog_file)
+        if expected_size is not None and expected_size > self.__max_size:
+            raise FileTooLargeError(f'File of {expected_size} bytes exceeds the maximum of {self.__max_size} bytes')
+
+        loop = asyncio.get_running_loop()
+        chunks: List[bytes] = []
+        file: Optional[BinaryIO] = None
+        size = 0
+        try:
+            async for chunk in catalog_file.data:
+                size += len(chunk)
+                if size > self.__max_size:
+                    raise FileTooLargeError(f'File exceeds the maximum of {self.__max_size} bytes')
+
+                chunks.append(chunk)
+                if file is None and size > spill_size:
+                    file = cast(BinaryIO, await loop.run_in_executor(None, tempfile.TemporaryFile))
+                if file is not None:
+                    await loop.run_in_executor(None, file.writelines, chunks)
+                    chunks.clear()
+
+            if file is None:
+                return FileContent(b''.join(chunks))
+            await loop.run_in_executor(None, file.flush)
+            return FileContent(file=file)
+        except BaseException:
+            if file is not None:
+                file.close()
+            raise
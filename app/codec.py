@@ -0,0 +1,90 @@
+"""Typed encoding of the values passed over the RPC socket.
+
+Values are encoded as plain msgpack arrays in a fixed field order, so the
+socket carries no pickles and byte payloads are packed as msgpack binary
+data as they are, without being wrapped a second time.
+
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from app.converters import ConversionInput, ConversionResult
+from ngitws.catalog import CatalogIdentity
+from ngitws.monitoring import Operation, OperationResult
+from ngitws.types import MediaType
+
+from .batch import BatchResult
+from .exception import RemoteOperationError
+from .profiling import ProfileMode, ProfileReport
+
+
+def decode_batch_results(value: Sequence[Any], decode: Callable[[Any], Any]) -> Tuple[bool, List[BatchResult]]:
+    """Return whether a batch has finished and its results, decoding successful values with the given function."""
+    finished, results = value
+    return finished, [
+        BatchResult(index, None if error is not None else decode(result), error) for index, result, error in results
+    ]
+
+
+def decode_conversion_input(value: Sequence[Any]) -> ConversionInput:
+    data, media_type, input_id = value
+    return ConversionInput(data, MediaType.parse(media_type), id=input_id)
+
+
+def decode_conversion_result(value: Sequence[Any]) -> ConversionResult:
+    data, media_type, result_id = value
+    return ConversionResult(data, MediaType.parse(media_type), id=result_id)
+
+
+def decode_identity(value: Sequence[Any]) -> CatalogIdentity:
+    catalog_id, record_id = value
+    return CatalogIdentity(catalog_id, record_id)
+
+
+def decode_outcome(value: Sequence[Any], operation: Operation) -> None:
+    """Apply an outcome encoded by encode_outcome to a local operation."""
+    result, message, error = value
+    operation.result = OperationResult[result]
+    operation.message = message
+    if error is not None:
+        operation.error = RemoteOperationError(error)
+
+
+def decode_profile_report(value: Sequence[Any]) -> ProfileReport:
+    mode, duration, handler, samples, stats, folded = value
+    return ProfileReport(ProfileMode(mode), duration, handler, samples, stats, folded)
+
+
+def encode_batch_results(finished: bool, results: Sequence[BatchResult]) -> List[Any]:
+    """Encode results of a batch whose values are already encoded."""
+    return [finished, [list(result) for result in results]]
+
+
+def encode_conversion_input(conversion_input: ConversionInput) -> List[Any]:
+    return [conversion_input.data, str(conversion_input.media_type), conversion_input.id]
+
+
+def encode_conversion_result(result: ConversionResult) -> List[Any]:
+    return [result.data, str(result.media_type), result.id]
+
+
+def encode_identity(identity: CatalogIdentity) -> List[Any]:
+    return [identity.catalog_id, identity.record_id]
+
+
+def encode_outcome(operation: Operation) -> List[Any]:
+    """Encode the result, message and error of an operation.
+
+    Errors are sent as their description, since exceptions cannot be
+    rebuilt safely on the other side of the socket.
+
+    """
+    error: Optional[str] = None
+    if operation.error is not None:
+        error = f'{type(operation.error).__name__}: {operation.error}'
+    return [operation.result.name, operation.message, error]
+
+
+def encode_profile_report(report: ProfileReport) -> List[Any]:
+    return [report.mode.value, report.duration, report.handler, report.samples, report.stats, report.folded]
@@ -1,4 +1,4 @@
 # flake8: noqa F401
 from .main import main
 from .console import Console
-from .cli import convert, daemon, extract, run
+from .cli import convert, daemon, extract, profile, run
@@ -7,7 +7,7 @@ from pathlib import Path
 import re
 import sys
 import traceback
-from typing import List, Optional, Sequence
+from typing import List, Optional, Sequence, TextIO
 
 from aio_msgpack_rpc.error import RPCResponseError
 from app.config import Configuration
@@ -15,6 +15,7 @@ from app.converters import ConversionInput, ConversionResult, CONVERTERS
 from app.daemon import Daemon
 from app.extractors import EXTRACTORS
 from app.handlers import HANDLERS
+from app.profiling import MAX_PROFILE_DURATION, ProfileMode
 from app.resources import ResourceManager
 from app.rpc import RpcClient
 import click
@@ -191,6 +192,61 @@ async def extract(
     return 0
 
 
+@main.command('profile')
+@click.option('-S', '--socket-path', type=PathType(), help='Path to daemon socket')
+@click.option('-d', '--duration', type=click.FloatRange(0, MAX_PROFILE_DURATION), default=10.0,
+              show_default=True, help='Seconds to profile for')
+@click.option('-m', '--mode', type=click.Choice([mode.value for mode in ProfileMode]),
+              default=ProfileMode.SAMPLING.value, show_default=True, help='How to profile the event loop')
+@click.option('-H', '--handler', 'handler_name', help='Only sample runs of the indicated handler')
+@click.option('-f', '--folded', type=click.File('w'), help='Write sampled stacks in folded format to a file')
+@click.option('-v', '--verbose', is_flag=True, help='Show verbose output')
+@standard_options('app')
+@async_command
+async def profile(
+    duration: float,
+    folded: Optional[TextIO],
+    handler_name: Optional[str],
+    mode: str,
+    socket_path: Path,
+    verbose: bool
+):
+    """Profile the running daemon for a number of seconds."""
+    console = Console()
+    if is_debug_enabled():
+        verbose = True
+    if verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+    else:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    if not socket_path:
+        socket_path = Configuration(os.environ).socket_path
+
+    try:
+        async with AsyncExitStack() as stack:
+            try:
+                client = await stack.enter_async_context(RpcClient(socket_path))
+            except (FileNotFoundError, ConnectionRefusedError):
+                console.error(f'Could not connect to socket at {socket_path} -- is the daemon running?')
+                return 1
+
+            report = await client.profile(duration, ProfileMode(mode), handler_name)
+    except RPCResponseError as ex:
+        console.error(f'Request failed: {str(ex)}')
+        return 1
+    except:  # noqa: E722
+        console.error(f'Profiling failed unexpectedly:\n{traceback.format_exc()}')
+        return 1
+
+    if report.mode is ProfileMode.SAMPLING:
+        console.info(f'Took {report.samples} samples over {report.duration:.1f}s')
+    click.echo(report.stats)
+    if folded:
+        folded.write(report.folded)
+    return 0
+
+
 @main.command('run')
 @click.option('-S', '--socket-path', type=PathType(), help='Path to daemon socket')
 @click.option('-l', '--list', 'list_types', is_flag=True, help='List supported handler types')
@@ -251,7 +307,7 @@ async def run(handler_name: Optional[str], record: Optional[str], list_types: bo
                         console.error(f'Could not connect to socket at {socket_path} -- is the daemon running?')
                         return 1
 
-                await client.run_handler(handler_name, identity, operation)
+                    await client.run_handler(handler_name, identity, operation)
             except RPCResponseError as ex:
                 console.error(f'Request failed: {str(ex)}')
                 return 1
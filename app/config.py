@@ -7,8 +7,15 @@ from typing import Mapping, Optional
 from cached_property import cached_property
 from ngitws.cli import EnvironmentReader
 
+from .scheduler import HandlerPriority
+
 
 DEFAULT_APP_NAME = 'product-processor'
+DEFAULT_CONVERSION_CACHE_SIZE = 64  # in megabytes
+DEFAULT_CONVERSION_CACHE_TTL = 900  # in seconds
+DEFAULT_LOOP_STALL_THRESHOLD = 1000  # in milliseconds
+DEFAULT_MAX_FILE_SIZE = 256  # in megabytes
+DEFAULT_METRICS_HOST = '0.0.0.0'
 DEFAULT_OBS_STATION_REFRESH = 120  # in seconds
 
 
@@ -38,6 +45,35 @@ class Configuration:
     def concurrency(self) -> int:
         return self.__reader.get_int('CONCURRENCY', multiprocessing.cpu_count())
 
+    @cached_property
+    def reserved_concurrency(self) -> int:
+        """Return the number of handler slots that low priority handlers may not use."""
+        return self.__reader.get_int('RESERVED_CONCURRENCY', self.concurrency // 4)
+
+    @cached_property
+    def conversion_cache_enabled(self) -> bool:
+        return self.__reader.get_bool('CONVERSION_CACHE_ENABLE', False)
+
+    @cached_property
+    def conversion_cache_path(self) -> Optional[Path]:
+        """Return the directory for the on-disk tier of the conversion cache, if there is one."""
+        path = self.__reader.get('CONVERSION_CACHE_PATH')
+        return Path(path) if path else None
+
+    @cached_property
+    def conversion_cache_size(self) -> int:
+        """Return the total size in bytes of the conversion results kept in memory."""
+        return self.__reader.get_int('CONVERSION_CACHE_SIZE', DEFAULT_CONVERSION_CACHE_SIZE) * 1024 * 1024
+
+    @cached_property
+    def conversion_cache_ttl(self) -> int:
+        """Return the time in seconds a cached conversion result stays valid."""
+        return self.__reader.get_int('CONVERSION_CACHE_TTL', DEFAULT_CONVERSION_CACHE_TTL)
+
+    @cached_property
+    def converter_process_pool(self) -> bool:
+        return self.__reader.get_bool('CONVERTER_PROCESS_POOL_ENABLE', True)
+
     @cached_property
     def converters(self) -> ConvertersConfiguration:
         return ConvertersConfiguration(self.__reader)
@@ -50,10 +86,41 @@ class Configuration:
     def spot(self)->SpotConfiguration:
         return SpotConfiguration(self.__reader) 
 
+    def handler_priority(self, handler_name: str, default: HandlerPriority) -> HandlerPriority:
+        """Return the scheduling priority for a handler, overridable with <HANDLER_NAME>_PRIORITY."""
+        priority = self.__reader.get(f'{handler_name.upper()}_PRIORITY', default.name)
+        try:
+            return HandlerPriority[priority.upper()]
+        except KeyError:
+            raise ValueError(f'Unknown priority "{priority}" for handler {handler_name}')
+
     @cached_property
     def graylog_web_url(self) -> str:
         return self.__reader.get('GRAYLOG_WEB_URL')
 
+    @cached_property
+    def loop_stall_threshold(self) -> Optional[float]:
+        """Return the time in seconds the event loop may block before it is reported, or None if not watched."""
+        return self.__reader.get_int('LOOP_STALL_THRESHOLD', DEFAULT_LOOP_STALL_THRESHOLD) / 1000 or None
+
+    @cached_property
+    def max_file_size(self) -> int:
+        """Return the largest catalog file in bytes that handlers will download."""
+        return self.__reader.get_int('MAX_FILE_SIZE', DEFAULT_MAX_FILE_SIZE) * 1024 * 1024
+
+    @cached_property
+    def metrics_host(self) -> str:
+        return self.__reader.get('METRICS_HOST', DEFAULT_METRICS_HOST)
+
+    @cached_property
+    def metrics_port(self) -> Optional[int]:
+        """Return the port to serve metrics on, or None if the metrics endpoint is disabled."""
+        return self.__reader.get_int('METRICS_PORT', 0) or None
+
+    @cached_property
+    def notification_dedup_enabled(self) -> bool:
+        return self.__reader.get_bool('NOTIFICATION_DEDUP_ENABLE', True)
+
     @cached_property
     def ob_stations_catalog_id(self) -> str:
         return self.__reader.get('OB_STATIONS_CATALOG_ID')
@@ -243,6 +310,18 @@ class CollectiveExtractorConfiguration(SubscriptionNotificationHandlerConfigurat
     def metadata_catalog_id(self) -> str:
         return self._reader.get(f'{self._env_prefix}_METADATA_CATALOG_ID')
 
+    @cached_property
+    def part_window(self) -> int:
+        default_part_window = self._reader.get_int('PART_WINDOW', 32)
+        return self._reader.get_int(f'{self._env_prefix}_PART_WINDOW', default_part_window)
+
+    @cached_property
+    def spill_size(self) -> Optional[int]:
+        """Return the size in bytes above which a collective is memory-mapped from disk, or None to never spill."""
+        default_spill_size = self._reader.get_int('SPILL_SIZE', 0)
+        spill_size = self._reader.get_int(f'{self._env_prefix}_SPILL_SIZE', default_spill_size)
+        return spill_size * 1024 * 1024 if spill_size > 0 else None
+
 
 class NwstgPublisherConfiguration(SubscriptionNotificationHandlerConfiguration):
 
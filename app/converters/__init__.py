@@ -2,6 +2,8 @@
 from typing import Dict, Type
 
 from .base import ConversionInput, ConversionResult, Converter, ObsConverter
+from .cache import ConversionCache
+from .executor import ConverterExecutor, InlineConverterExecutor, ProcessPoolConverterExecutor
 from .airep import AirepConverter
 from .csfpf import CsfpfConverter
 from .cwa import CwaConverter
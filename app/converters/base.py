@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 import inspect
-from typing import Optional, Sequence, TYPE_CHECKING
+from typing import Any, Hashable, Optional, Sequence, TYPE_CHECKING
 
 from app.geolocation import ObsStationLocator
 from ngitws.types import MediaType
 
+from .executor import ConverterExecutor
+
 if TYPE_CHECKING:
     from app.resources import ResourceManager
 
@@ -60,7 +62,20 @@ class ConversionResult:
 
 
 class Converter(ABC):
-    """Base class for data converters."""
+    """Base class for data converters.
+
+    Converters whose work is synchronous and CPU-bound may opt in to running
+    in a process pool by setting PROCESS_POOL to True.  Such converters must
+    be rebuildable in a worker process from _worker_state(); the default
+    implementation suits converters that take no constructor arguments.
+    Workers keep the converters they rebuild, and only receive the state
+    again when _worker_state_version() changes.
+
+    """
+
+    PROCESS_POOL = False
+
+    __executor: Optional[ConverterExecutor] = None
 
     @classmethod
     async def create(cls, resources: ResourceManager) -> Converter:
@@ -75,13 +90,42 @@ class Converter(ABC):
 
         return doc.partition('\n')[0]
 
+    @property
+    def executor(self) -> Optional[ConverterExecutor]:
+        """Return the executor used for opted-in conversions, if any."""
+        return self.__executor
+
+    @executor.setter
+    def executor(self, executor: Optional[ConverterExecutor]) -> None:
+        self.__executor = executor
+
     async def convert(self, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
+        if self.PROCESS_POOL and self.__executor is not None:
+            return await self.__executor.run(self, inputs)
         return await self._convert(inputs)
 
     @abstractmethod
     async def _convert(self, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
         """Convert one or more inputs to outputs."""
 
+    @classmethod
+    def _from_worker_state(cls, state: Any) -> Converter:
+        """Rebuild the converter inside a worker process."""
+        return cls()
+
+    def _worker_state(self) -> Any:
+        """Return the picklable state needed to rebuild the converter inside a worker process."""
+        return None
+
+    def _worker_state_version(self) -> Hashable:
+        """Return a picklable stamp that changes whenever the worker state does.
+
+        The stamp also keys cached conversion results, so results are not reused
+        after the state they were converted with has changed.
+
+        """
+        return None
+
 
 class ObsConverter(Converter):
 
@@ -96,6 +140,16 @@ class ObsConverter(Converter):
     def obs_station_locator(self) -> ObsStationLocator:
         return self.__obs_station_locator
 
+    @classmethod
+    def _from_worker_state(cls, state: Any) -> Converter:
+        return cls(state)
+
+    def _worker_state(self) -> Any:
+        return self.__obs_station_locator.snapshot()
+
+    def _worker_state_version(self) -> Hashable:
+        return self.__obs_station_locator.version
+
     async def convert(self, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
         await self.__obs_station_locator.wait_to_populate()
 
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+from pathlib import Path
+import tempfile
+import time
+from typing import Callable, Hashable, Optional, Sequence, Tuple
+
+import msgpack
+from ngitws.types import MediaType
+
+from .base import ConversionInput, ConversionResult, Converter
+
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024  # in bytes
+DEFAULT_TTL = 900  # in seconds
+
+# How many writes to the disk tier between sweeps for expired entries.
+DISK_SWEEP_INTERVAL = 256
+
+
+class ConversionCache:
+    """Cache of conversion results keyed on the content of the inputs.
+
+    Entries are keyed on the converter's name and state version and a hash of
+    every input's id, media type and data, so a product that arrives again (a
+    retransmission, or a redelivery after a deferral) skips the encoder
+    entirely.  The memory tier evicts the least recently used entries once
+    their results exceed the maximum size in bytes, and every entry expires
+    after the time to live.  An optional directory adds a disk tier that
+    outlives the process, using the same time to live.  Disk entries hold
+    only the raw result data, media types and ids.
+
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl: float = DEFAULT_TTL,
+        directory: Optional[Path] = None,
+        *,
+        clock: Callable[[], float] = time.time
+    ):
+        """Create a new conversion cache.
+
+        :param max_size: the total size in bytes of the results kept in memory
+        :param ttl: the time in seconds a result stays valid
+        :param directory: the directory for the disk tier, or None to keep results in memory only
+        :param clock: the source of the current time in seconds
+
+        """
+        if max_size < 1:
+            raise ValueError(f'Cache size must be at least one byte, not {max_size}')
+
+        self.__clock = clock
+        self.__directory = directory
+        self.__disk_writes = 0
+        self.__entries: OrderedDict[str, Tuple[float, Sequence[ConversionResult]]] = OrderedDict()
+        self.__hits = 0
+        self.__max_size = max_size
+        self.__misses = 0
+        self.__size = 0
+        self.__ttl = ttl
+
+        self.__logger = logging.getLogger(__name__)
+
+    @property
+    def directory(self) -> Optional[Path]:
+        return self.__directory
+
+    @property
+    def entries(self) -> int:
+        """Return the number of results held in memory."""
+        return len(self.__entries)
+
+    @property
+    def hits(self) -> int:
+        return self.__hits
+
+    @property
+    def max_size(self) -> int:
+        return self.__max_size
+
+    @property
+    def misses(self) -> int:
+        return self.__misses
+
+    @property
+    def size(self) -> int:
+        """Return the total size in bytes of the results held in memory."""
+        return self.__size
+
+    @property
+    def ttl(self) -> float:
+        return self.__ttl
+
+    @staticmethod
+    def key(converter_name: str, version: Hashable, inputs: Sequence[ConversionInput]) -> str:
+        """Return the cache key for converting inputs with the named converter at a state version."""
+        digest = hashlib.sha256()
+        # Lengths keep the boundaries between fields unambiguous.
+        for field in (converter_name, repr(version)):
+            encoded = field.encode('utf-8')
+            digest.update(len(encoded).to_bytes(4, 'big'))
+            digest.update(encoded)
+
+        for conversion_input in inputs:
+            if conversion_input.id is None:
+                digest.update(b'\x00')
+            else:
+                input_id = conversion_input.id.encode('utf-8')
+                digest.update(b'\x01')
+                digest.update(len(input_id).to_bytes(4, 'big'))
+                digest.update(input_id)
+            media_type = str(conversion_input.media_type).encode('utf-8')
+            digest.update(len(media_type).to_bytes(4, 'big'))
+            digest.update(media_type)
+            digest.update(len(conversion_input.data).to_bytes(8, 'big'))
+            digest.update(conversion_input.data)
+
+        return digest.hexdigest()
+
+    async def convert(
+        self,
+        converter: Converter,
+        inputs: Sequence[ConversionInput]
+    ) -> Tuple[Sequence[ConversionResult], bool]:
+        """Return the results of converting inputs and whether they came from the cache."""
+        key = self.key(type(converter).__qualname__, converter._worker_state_version(), inputs)
+        results = await self.get(key)
+        if results is not None:
+            return results, True
+
+        results = await converter.convert(inputs)
+        await self.put(key, results)
+
+        return results, False
+
+    async def get(self, key: str) -> Optional[Sequence[ConversionResult]]:
+        """Return the cached results for a key, or None if there are none or they have expired."""
+        now = self.__clock()
+        entry = self.__entries.get(key)
+        if entry is not None and entry[0] <= now:
+            self.__forget(key)
+            entry = None
+
+        if entry is None and self.__directory is not None:
+            entry = await asyncio.get_running_loop().run_in_executor(None, self.__read, key, now)
+            if entry is not None:
+                self.__remember(key, entry)
+
+        if entry is None:
+            self.__misses += 1
+            return None
+
+        if key in self.__entries:
+            self.__entries.move_to_end(key)
+        self.__hits += 1
+
+        return entry[1]
+
+    async def put(self, key: str, results: Sequence[ConversionResult]) -> None:
+        """Cache the results for a key."""
+        entry = (self.__clock() + self.__ttl, list(results))
+        self.__remember(key, entry)
+
+        if self.__directory is not None:
+            self.__disk_writes += 1
+            sweep = self.__disk_writes % DISK_SWEEP_INTERVAL == 0
+            await asyncio.get_running_loop().run_in_executor(None, self.__write, key, entry, sweep)
+
+    def clear(self) -> None:
+        """Drop every result held in memory and reset the counters."""
+        self.__entries.clear()
+        self.__hits = 0
+        self.__misses = 0
+        self.__size = 0
+
+    def __forget(self, key: str) -> None:
+        _, results = self.__entries.pop(key)
+        self.__size -= self.__result_size(results)
+
+    def __remember(self, key: str, entry: Tuple[float, Sequence[ConversionResult]]) -> None:
+        if key in self.__entries:
+            self.__forget(key)
+
+        size = self.__result_size(entry[1])
+        # Results larger than the whole cache would only evict everything else.
+        if size > self.__max_size:
+            return
+
+        self.__entries[key] = entry
+        self.__size += size
+        while self.__size > self.__max_size:
+            self.__forget(next(iter(self.__entries)))
+
+    @staticmethod
+    def __result_size(results: Sequence[ConversionResult]) -> int:
+        return sum(len(result.data) for result in results)
+
+    def __path(self, key: str) -> Path:
+        assert self.__directory is not None
+        return self.__directory / key[:2] / key
+
+    def __read(self, key: str, now: float) -> Optional[Tuple[float, Sequence[ConversionResult]]]:
+        path = self.__path(key)
+        try:
+            with path.open('rb') as file:
+                expiry, results = msgpack.unpackb(file.read(), raw=False)
+            if expiry <= now:
+                self.__remove(path)
+                return None
+            return expiry, [
+                ConversionResult(data, MediaType.parse(media_type), id=result_id)
+                for data, media_type, result_id in results
+            ]
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self.__logger.exception(f'Failed to read cached conversion {path}')
+            self.__remove(path)
+            return None
+
+    def __write(self, key: str, entry: Tuple[float, Sequence[ConversionResult]], sweep: bool) -> None:
+        path = self.__path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write under a temporary name so readers never see a partial entry.
+            descriptor, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            expiry, results = entry
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(msgpack.packb([
+                    expiry,
+                    [[result.data, str(result.media_type), result.id] for result in results]
+                ], use_bin_type=True))
+            os.replace(temp_path, path)
+        except Exception:
+            self.__logger.exception(f'Failed to write cached conversion {path}')
+
+        if sweep:
+            self.__sweep()
+
+    def __sweep(self) -> None:
+        assert self.__directory is not None
+        # Entries are written once, so their age can be told from the file without reading it.
+        expired = self.__clock() - self.__ttl
+        for path in self.__directory.glob('*/*'):
+            if path.suffix == '.tmp':
+                continue
+            try:
+                if path.stat().st_mtime <= expired:
+                    self.__remove(path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def __remove(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
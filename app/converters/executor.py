@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import importlib
+import logging
+import multiprocessing
+from types import TracebackType
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple, Type, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .base import ConversionInput, ConversionResult, Converter
+
+
+# Modules imported by each worker process when it starts so the encoders are loaded once per worker rather than on
+# the first task that happens to need them.
+DEFAULT_PRELOAD_MODULES = (
+    'app.converters',
+    'ncar_airsigmet_code.parse_airsigmet_intl',
+    'ncar_airsigmet_code.parse_airsigmet_us',
+    'tac_to_xml',
+)
+
+# Converters rebuilt in a worker process, with the version of the state each was rebuilt from.
+_worker_converters: Dict[Type[Converter], Tuple[Hashable, Converter]] = {}
+# Event loop owned by a worker process, used to drive converter coroutines.
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+class ConverterExecutor(ABC):
+    """Strategy for running the conversion work of a converter."""
+
+    @abstractmethod
+    async def run(self, converter: Converter, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
+        """Run the converter on the given inputs and return its results."""
+
+
+class InlineConverterExecutor(ConverterExecutor):
+    """Executor that runs conversions directly on the event loop."""
+
+    async def run(self, converter: Converter, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
+        return await converter._convert(inputs)
+
+
+class ProcessPoolConverterExecutor(ConverterExecutor):
+    """Executor that dispatches conversions to a bounded pool of worker processes.
+
+    Workers are spawned and warmed up when the executor is opened, importing
+    the encoder modules ahead of time.  Each task sends the converter class,
+    the version of its worker state and the inputs to a worker, which runs
+    the converter it rebuilt from that version of the state.  Only when the
+    worker has not rebuilt it yet is the task sent again with the state, so
+    large state is pickled once per worker and version rather than per task.
+
+    If a worker dies abruptly the pool breaks, failing every task it was
+    running.  The executor then replaces the pool with a fresh one so that
+    later conversions can still run.
+
+    """
+
+    def __init__(self, max_workers: int, preload_modules: Sequence[str] = DEFAULT_PRELOAD_MODULES):
+        if max_workers < 1:
+            raise ValueError(f'Process pool requires at least one worker, not {max_workers}')
+
+        self.__max_workers = max_workers
+        self.__pool: Optional[ProcessPoolExecutor] = None
+        self.__pool_lock: Optional[asyncio.Lock] = None
+        self.__preload_modules = tuple(preload_modules)
+
+        self.__logger = logging.getLogger(__name__)
+
+    async def __aenter__(self) -> ProcessPoolConverterExecutor:
+        if self.__pool:
+            raise RuntimeError('Process pool is already open')
+
+        self.__pool_lock = asyncio.Lock()
+        self.__pool = await self.__start_pool()
+
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType]
+    ) -> None:
+        if self.__pool:
+            assert self.__pool_lock is not None
+            # Waits for a pool being replaced, so the replacement is not left running.
+            async with self.__pool_lock:
+                pool, self.__pool = self.__pool, None
+                if pool:
+                    await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+
+    @property
+    def max_workers(self) -> int:
+        return self.__max_workers
+
+    async def run(self, converter: Converter, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
+        pool = self.__pool
+        if not pool:
+            raise RuntimeError('Process pool is not open')
+
+        loop = asyncio.get_running_loop()
+        converter_class = converter.__class__
+        version = converter._worker_state_version()
+        inputs = list(inputs)
+
+        try:
+            results = await loop.run_in_executor(pool, _run_cached_converter, converter_class, version, inputs)
+            if results is None:
+                results = await loop.run_in_executor(
+                    pool,
+                    _run_converter,
+                    converter_class,
+                    version,
+                    converter._worker_state(),
+                    inputs
+                )
+        except BrokenProcessPool:
+            await self.__replace_pool(pool)
+            raise
+
+        return results
+
+    async def __replace_pool(self, broken_pool: ProcessPoolExecutor) -> None:
+        assert self.__pool_lock is not None
+        async with self.__pool_lock:
+            # Every task running on the broken pool fails, but only the first to get here replaces it.
+            if self.__pool is not broken_pool:
+                return
+
+            self.__logger.error('Converter process pool broke, starting a new one')
+            self.__pool = await self.__start_pool()
+            await asyncio.get_running_loop().run_in_executor(None, broken_pool.shutdown)
+
+    async def __start_pool(self) -> ProcessPoolExecutor:
+        self.__logger.info(f'Starting converter process pool with {self.__max_workers} workers')
+        pool = ProcessPoolExecutor(
+            max_workers=self.__max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_initialize_worker,
+            initargs=(self.__preload_modules, logging.getLogger().getEffectiveLevel())
+        )
+
+        # Submit one no-op per worker so every process is spawned and initialized before real work arrives.
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(pool, _ping) for _ in range(self.__max_workers)])
+
+        return pool
+
+
+def _initialize_worker(preload_modules: Sequence[str], log_level: int) -> None:
+    global _worker_loop
+
+    logging.basicConfig(level=log_level)
+    for module_name in preload_modules:
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            logging.getLogger(__name__).warning(f'Could not preload {module_name} in converter worker')
+
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+
+
+def _ping() -> None:
+    pass
+
+
+def _run_cached_converter(
+    converter_class: Type[Converter],
+    version: Hashable,
+    inputs: Sequence[ConversionInput]
+) -> Optional[Sequence[ConversionResult]]:
+    """Run the converter rebuilt from the given version of its state, or return None if there is none."""
+    cached_version, converter = _worker_converters.get(converter_class, (None, None))
+    if converter is None or cached_version != version:
+        return None
+
+    assert _worker_loop is not None
+    return _worker_loop.run_until_complete(converter._convert(inputs))
+
+
+def _run_converter(
+    converter_class: Type[Converter],
+    version: Hashable,
+    state: Any,
+    inputs: Sequence[ConversionInput]
+) -> Sequence[ConversionResult]:
+    """Rebuild the converter from its state, keep it for later tasks and run it."""
+    assert _worker_loop is not None
+    converter = converter_class._from_worker_state(state)
+    _worker_converters[converter_class] = (version, converter)
+
+    return _worker_loop.run_until_complete(converter._convert(inputs))
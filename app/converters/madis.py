@@ -13,6 +13,8 @@ from .base import ConversionInput, ConversionResult, Converter
 class MadisJsonConverter(Converter):
     """Converts MADIS catalog record metadata to USWX XML."""
 
+    PROCESS_POOL = True
+
     async def _convert(self, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
         encoder = MADISEncoder()
         metadata = json.loads(inputs[0].data)
@@ -12,6 +12,8 @@ from .base import ConversionInput, ConversionResult, ObsConverter
 class MetarCollectiveConverter(ObsConverter):
     """Converts METAR collective text products to IWXXM XML."""
 
+    PROCESS_POOL = True
+
     async def _convert(self, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
         data = inputs[0].data.decode('utf-8')
         encoder = MetarEncoder(self.obs_station_locator)
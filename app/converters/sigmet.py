@@ -18,6 +18,8 @@ from .base import ConversionInput, ConversionResult, Converter
 class SigmetConverter(Converter):
     """Converts AIRMET and SIGMET text products to IWXXM or IWXXM-US."""
 
+    PROCESS_POOL = True
+
     SIGMET_REGEX = rb'\d{3}[\n\r]+\w{4}\d{2} \w{4} \d{6}[\n\r]+(.*)[\n\r]+(.*)[\n\r]+(.*)[\n\r]+.*(SIGMET|AIRMET)'
 
     def __init__(self):
@@ -17,6 +17,8 @@ class SpcWatchConverter(Converter):
 
     """
 
+    PROCESS_POOL = True
+
     async def _convert(self, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
         saw_data = None
         sel_data = None
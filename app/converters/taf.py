@@ -14,6 +14,7 @@ class TafCollectiveConverter(ObsConverter):
     """Converts TAF collective text products to IWXXM XML."""
 
     PLAIN_TEXT_TYPE = 'text/plain;charset=UTF-8'
+    PROCESS_POOL = True
 
     async def _convert(self, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
         self.__logger = logging.getLogger(__name__)
@@ -12,6 +12,8 @@ from .base import ConversionInput, ConversionResult, Converter
 class TcaConverter(Converter):
     """Converts TCA text products to IWXXM XML."""
 
+    PROCESS_POOL = True
+
     async def _convert(self, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
         data = inputs[0].data.decode('utf-8')
         encoder = TropicalCycloneAdvisoryEncoder()
@@ -12,6 +12,8 @@ from .base import ConversionInput, ConversionResult, Converter
 class WtaConverter(Converter):
     """Converts WTA text products to USWX XML."""
 
+    PROCESS_POOL = True
+
     async def _convert(self, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
         data = inputs[0].data.decode('utf-8')
         encoder = WTAEncoder()
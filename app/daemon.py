@@ -14,7 +14,10 @@ from ngitws.subscription import SubscriptionNotFoundError
 
 from .config import Configuration
 from .handlers import SubscriptionNotificationHandler
+from .metrics import LoopLagMonitor, MetricsCollector, MetricsServer
 from .resources import ResourceManager
+from .scheduler import HandlerScheduler
+from .watchdog import LoopWatchdog
 
 
 class Daemon:
@@ -23,8 +26,10 @@ class Daemon:
         self.__config = config
         self.__handlers = handlers
         self.__pubsub = pubsub
+        self.__scheduler = HandlerScheduler(config.concurrency, config.reserved_concurrency)
         self.__socket_path = socket_path
         self.__stack: Optional[AsyncExitStack] = None
+        self.__watchdog: Optional[LoopWatchdog] = None
 
         self.__logger = logging.getLogger(__name__)
 
@@ -46,12 +51,21 @@ class Daemon:
                 await self.__stack.aclose()
         finally:
             self.__stack = None
+            self.__watchdog = None
 
     async def run(self) -> None:
+        if not self.__stack:
+            raise RuntimeError('Daemon is not open')
+
+        if self.__config.loop_stall_threshold and not self.__watchdog:
+            self.__watchdog = await self.__stack.enter_async_context(LoopWatchdog(self.__config.loop_stall_threshold))
+
         try:
-            async with ResourceManager(self.__config) as resources:
+            async with ResourceManager(self.__config, process_pool=self.__config.converter_process_pool) as resources:
                 tasks = []
                 tasks.append(asyncio.create_task(self.__run_rpc_server(resources)))
+                if self.__config.metrics_port:
+                    tasks.append(asyncio.create_task(self.__run_metrics_server(resources)))
                 if self.__pubsub:
                     tasks.append(asyncio.create_task(self.__run_subscriber(resources)))
 
@@ -65,17 +79,45 @@ class Daemon:
     async def __register_handler(
         self,
         subscriber: NotificationSubscriber,
+        handler_name: str,
         handler: SubscriptionNotificationHandler
     ) -> None:
         self.__logger.debug(f'Attempting to register handler for {handler.subscription_id}')
+        priority = self.__config.handler_priority(handler_name, handler.PRIORITY)
         try:
             async def wrapped(notification: Notification, operation: Operation) -> None:
-                return await handler.run(notification.identity, operation)
+                # Duplicates are collapsed before a slot is taken, so only runs that handle the record hold one.
+                return await handler.run(
+                    notification.identity,
+                    operation,
+                    slot=lambda: self.__scheduler.slot(priority)
+                )
 
             await subscriber.listen(handler.subscription_id, wrapped)
         except SubscriptionNotFoundError:
             self.__logger.warning(f'Disabling {handler.subscription_id} handler; subscription not found')
 
+    async def __run_metrics_server(self, resources: ResourceManager) -> None:
+        loop_lag = LoopLagMonitor()
+        collector = MetricsCollector(resources, self.__scheduler, loop_lag, self.__watchdog)
+        lag_task = asyncio.create_task(loop_lag.run())
+        try:
+            while True:
+                try:
+                    async with MetricsServer(
+                        self.__config.metrics_host,
+                        self.__config.metrics_port,
+                        collector.collect
+                    ) as metrics_server:
+                        await metrics_server.wait_closed()
+                except asyncio.CancelledError:
+                    break
+                except Exception:
+                    self.__logger.exception('Metrics server exited unexpectedly')
+                self.__logger.debug('Restarting metrics server')
+        finally:
+            lag_task.cancel()
+
     async def __run_rpc_server(self, resources: ResourceManager) -> None:
         while True:
             try:
@@ -94,7 +136,7 @@ class Daemon:
                     for handler_name in HANDLERS:
                         if self.__handlers and handler_name not in self.__handlers:
                             continue
-                        await self.__register_handler(subscriber, await resources.handler(handler_name))
+                        await self.__register_handler(subscriber, handler_name, await resources.handler(handler_name))
                     await subscriber.wait_closed()
             except asyncio.CancelledError:
                 break
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+from enum import Enum
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from ngitws.monitoring import Operation, OperationResult
+
+
+# The result, message and error a run left on its operation.
+Outcome = Tuple[OperationResult, Optional[str], Optional[BaseException]]
+
+
+class Duplicate(Enum):
+    """How a duplicate notification was collapsed into another run."""
+
+    QUEUED = 'queued'
+
+
+class NotificationDeduplicator:
+    """Collapse notifications for the same key that arrive while it is being handled.
+
+    A notification cannot share a run that is already under way, since that
+    run may have read the record before the change it announces.  Instead,
+    the first notification to arrive during a run queues a single follow-up
+    run, which starts once the current run finishes.  Notifications that
+    arrive before the follow-up starts wait for it and take on its outcome,
+    so every notification is covered by a run that started after it arrived.
+    Nothing is remembered once a key's runs finish.
+
+    """
+
+    def __init__(self):
+        self.__collapsed = 0
+        self.__queued: Dict[Hashable, asyncio.Future] = {}
+        self.__running: Dict[Hashable, asyncio.Future] = {}
+
+    @property
+    def collapsed(self) -> int:
+        """Return the number of notifications collapsed into another run so far."""
+        return self.__collapsed
+
+    @property
+    def in_flight(self) -> int:
+        return len(self.__running)
+
+    @property
+    def queued(self) -> int:
+        return len(self.__queued)
+
+    async def run(
+        self,
+        key: Hashable,
+        operation: Operation,
+        handle: Callable[[Operation], Awaitable[None]]
+    ) -> Optional[Duplicate]:
+        """Handle a notification unless it duplicates a queued one, and return how it was collapsed if it did."""
+        queued = self.__queued.get(key)
+        if queued is not None:
+            self.__collapsed += 1
+            # Shielded so that cancelling this notification does not cancel the run it waits for.
+            shared = await asyncio.shield(queued)
+            if shared is None:
+                operation.message = 'Duplicate notification interrupted while running'
+                operation.result = OperationResult.DEFER
+            else:
+                operation.result, operation.message, operation.error = shared
+            return Duplicate.QUEUED
+
+        future = asyncio.get_running_loop().create_future()
+        outcome: Optional[Outcome] = None
+        try:
+            running = self.__running.get(key)
+            if running is not None:
+                self.__queued[key] = future
+                try:
+                    await asyncio.shield(running)
+                finally:
+                    del self.__queued[key]
+
+            self.__running[key] = future
+            try:
+                await handle(operation)
+                outcome = (operation.result, operation.message, operation.error)
+            finally:
+                del self.__running[key]
+        finally:
+            future.set_result(outcome)
+
+        return None
@@ -1,2 +1,10 @@
 class InvalidProductError(RuntimeError):
     """Problem with a malformed product."""
+
+
+class FileTooLargeError(InvalidProductError):
+    """Product file larger than the configured maximum size."""
+
+
+class RemoteOperationError(RuntimeError):
+    """Error raised by an operation that ran in the daemon on behalf of an RPC client."""
@@ -4,7 +4,8 @@ from abc import ABC, abstractmethod
 import inspect
 import logging
 import pprint
-from typing import Mapping, Optional, Sequence, TYPE_CHECKING
+import re
+from typing import Dict, List, Mapping, Optional, Sequence, Set, Tuple, TYPE_CHECKING, Union
 
 from app.util.parser import JsonXmlParser, XmlParser, XmlToJsonFilter
 from app.util.splitter import IwxxmSplitter
@@ -38,6 +39,118 @@ class Extractor(ABC):
         """Extract metadata from byte string and returns it as a mapping."""
 
 
+class Field:
+    """An output field of an extractor and the paths it is filled from.
+
+    The name is the dotted path of the field in the output, e.g.
+    `validPeriod.start`.  Paths are tried in order and the first one with a
+    match fills the field.  A field without a match is set to None, unless it
+    is optional, in which case it is left out of the output.  A field that
+    requires another, earlier field is left out whenever that one is, such
+    as the unit of a value that is itself optional.
+
+    """
+
+    def __init__(self, name: str, *paths: str, optional: bool = False, requires: Optional[str] = None):
+        if not paths:
+            raise ValueError(f'Field {name} must have at least one path')
+
+        self.__keys = tuple(name.split('.'))
+        self.__name = name
+        self.__optional = optional
+        self.__paths = paths
+        self.__requires = requires
+
+    @property
+    def keys(self) -> Tuple[str, ...]:
+        return self.__keys
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def optional(self) -> bool:
+        return self.__optional
+
+    @property
+    def paths(self) -> Tuple[str, ...]:
+        return self.__paths
+
+    @property
+    def requires(self) -> Optional[str]:
+        """Return the name of the field this one is only output with, if any."""
+        return self.__requires
+
+
+class FieldSet:
+    """Compiled set of fields that are filled from a single walk of a document.
+
+    Every path starts with a descendant step (`//prefix:name`) that anchors it
+    to an element, optionally followed by the rest of the path relative to that
+    element.  The document is walked once to collect the anchors of all fields,
+    and only the anchors' subtrees are searched for the rest of each path, so
+    the cost of extraction no longer grows with a full tree walk per field.
+
+    """
+
+    ANCHOR_PATTERN = re.compile(r'^//([\w.-]+):([\w.-]+)(.*)$', re.DOTALL)
+
+    def __init__(self, fields: Sequence[Field], namespaces: Mapping[str, str]):
+        names: Set[str] = set()
+        for field in fields:
+            if field.requires is not None and field.requires not in names:
+                raise ValueError(f'Field {field.name} requires {field.requires}, which is not an earlier field')
+            names.add(field.name)
+
+        self.__fields = [(field, [self.__compile(path, namespaces) for path in field.paths]) for field in fields]
+        self.__tags = sorted({tag for _, paths in self.__fields for tag, _ in paths})
+
+    @property
+    def fields(self) -> Sequence[Field]:
+        return [field for field, _ in self.__fields]
+
+    def select(self, xml_tree: etree.ElementTree) -> List[Tuple[Field, Optional[Union[etree.Element, str]]]]:
+        """Return each field with its first match in the document, or None."""
+        anchors: Dict[str, List[etree.Element]] = {tag: [] for tag in self.__tags}
+        for element in xml_tree.iter(*self.__tags):
+            anchors[element.tag].append(element)
+
+        return [(field, self.__first(anchors, paths)) for field, paths in self.__fields]
+
+    @staticmethod
+    def __first(
+        anchors: Dict[str, List[etree.Element]],
+        paths: Sequence[Tuple[str, Optional[etree.XPath]]]
+    ) -> Optional[Union[etree.Element, str]]:
+        for tag, relative in paths:
+            for anchor in anchors[tag]:
+                if relative is None:
+                    return anchor
+
+                result = relative(anchor)
+                if result:
+                    return result[0]
+
+        return None
+
+    @classmethod
+    def __compile(cls, path: str, namespaces: Mapping[str, str]) -> Tuple[str, Optional[etree.XPath]]:
+        match = cls.ANCHOR_PATTERN.match(path)
+        if match is None:
+            raise ValueError(f'Field path must start with a descendant step, not {path}')
+
+        prefix, name, rest = match.groups()
+        if prefix not in namespaces:
+            raise ValueError(f'Unknown namespace prefix {prefix} in field path {path}')
+
+        tag = f'{{{namespaces[prefix]}}}{name}'
+        if not rest:
+            return tag, None
+
+        return tag, etree.XPath(f'(.{rest})[1]', namespaces=namespaces)
+
+
 class XmlExtractor(Extractor):
     """Base class for extractors operating on XML documents."""
 
@@ -52,7 +165,10 @@ class XmlExtractor(Extractor):
         self.__logger = logging.getLogger(__name__)
 
     async def extract(self, data: bytes) -> JsonObject:
-        xml_tree = etree.fromstring(data)
+        return await self.extract_element(etree.fromstring(data))
+
+    async def extract_element(self, xml_tree: etree.Element) -> JsonObject:
+        """Extract metadata from an already parsed document, such as a part split out of a collective."""
         if is_debug_enabled():
             xml_tree_raw = etree.tostring(xml_tree, encoding='unicode', pretty_print=True)
             self.__logger.debug(f'Raw input XML:\n{xml_tree_raw}')
@@ -63,6 +179,30 @@ class XmlExtractor(Extractor):
 
         return result_json
 
+    def extract_fields(
+        self,
+        xml_tree: etree.ElementTree,
+        fields: FieldSet,
+        filters: Optional[Sequence[XmlToJsonFilter]] = None
+    ) -> JsonObject:
+        """Fill the given fields from a document and return them as nested JSON objects."""
+        parser = self.json_parser(xml_tree, filters=filters)
+        output: JsonObject = {}
+        present: Set[str] = set()
+        for field, match in fields.select(xml_tree):
+            if field.requires is not None and field.requires not in present:
+                continue
+            if match is None and field.optional:
+                continue
+            present.add(field.name)
+
+            target = output
+            for key in field.keys[:-1]:
+                target = target.setdefault(key, {})
+            target[field.keys[-1]] = None if match is None else parser.convert(match)
+
+        return output
+
     def json_parser(
         self,
         xml_tree: etree.ElementTree,
@@ -90,10 +230,11 @@ class IwxxmCollectiveExtractor(Extractor):
         self.__logger = logging.getLogger(__name__)
 
     async def extract(self, data: bytes) -> JsonObject:
-        parts = await IwxxmSplitter().split(data)
-        self.__logger.debug(f'Split collective product into {len(parts)} parts')
+        # Parts are extracted from the trees they were split into, so the collective is only parsed once.
+        extracted = [await self.__extractor.extract_element(part.element) async for part in IwxxmSplitter().parts(data)]
+        self.__logger.debug(f'Split collective product into {len(extracted)} parts')
 
         return {
-            'count': len(parts),
-            'extracted': [await self.__extractor.extract(part) for part in parts]
+            'count': len(extracted),
+            'extracted': extracted
         }
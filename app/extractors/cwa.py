@@ -4,7 +4,7 @@ from app.util.parser import GmlToGeojsonFilter
 from lxml import etree
 from ngitws.typing import JsonObject
 
-from .base import XmlExtractor
+from .base import Field, FieldSet, XmlExtractor
 
 
 class CwaExtractor(XmlExtractor):
@@ -22,40 +22,33 @@ class CwaExtractor(XmlExtractor):
         'xlink': 'http://www.w3.org/1999/xlink'
     }
 
+    FIELDS = FieldSet([
+        Field('cwsuIdentifier', '//uswx10:centerWeatherServiceUnit/saf:designator'),
+        Field('sequenceIssuance', '//uswx10:sequenceIssuance'),
+        Field(
+            'phenomenonTime.start',
+            '//uswx10:centerWeatherAdvisoryRecord/om:phenomenonTime/gml:TimePeriod/gml:beginPosition'
+        ),
+        Field(
+            'phenomenonTime.end',
+            '//uswx10:centerWeatherAdvisoryRecord/om:phenomenonTime/gml:TimePeriod/gml:endPosition'
+        ),
+        Field('resultTime', '//uswx10:centerWeatherAdvisoryRecord/om:resultTime/gml:TimeInstant/gml:timePosition'),
+        Field('observedProperty', '//uswx10:centerWeatherAdvisoryRecord/om:observedProperty/@xlink:href'),
+        Field('geometry', '//uswx10:centerWeatherAdvisoryRecord/om:featureOfInterest//gml:location/*[1]'),
+        Field(
+            'statementText',
+            '//uswx10:centerWeatherAdvisoryRecord/om:result/uswx10:CenterWeatherAdvisoryStatement'
+            '/uswx10:centerWeatherAdvisoryText'
+        )
+    ], XML_NAMESPACES)
+
     def __init__(self):
         super().__init__(namespaces=self.XML_NAMESPACES)
 
     async def _extract(self, xml_tree: etree.ElementTree) -> JsonObject:
-        parser = self.json_parser(xml_tree, filters=[GmlToGeojsonFilter()])
+        parser = self.parser(xml_tree)
         if not parser.contains('//uswx10:CenterWeatherAdvisory'):
             raise RuntimeError('XML document is not a recognized CWA product')
 
-        cwsu_id = parser.first('//uswx10:centerWeatherServiceUnit/saf:designator')
-        sequence_issuance = parser.first('//uswx10:sequenceIssuance')
-        phenomenon_start = parser.first(
-            '//uswx10:centerWeatherAdvisoryRecord/om:phenomenonTime/gml:TimePeriod/gml:beginPosition'
-        )
-        phenomenon_end = parser.first(
-            '//uswx10:centerWeatherAdvisoryRecord/om:phenomenonTime/gml:TimePeriod/gml:endPosition')
-        result_time = parser.first(
-            '//uswx10:centerWeatherAdvisoryRecord/om:resultTime/gml:TimeInstant/gml:timePosition'
-        )
-        observed_property = parser.first('//uswx10:centerWeatherAdvisoryRecord/om:observedProperty/@xlink:href')
-        geometry = parser.first('//uswx10:centerWeatherAdvisoryRecord/om:featureOfInterest//gml:location/*[1]')
-        statement_text = parser.first(
-            '//uswx10:centerWeatherAdvisoryRecord/om:result/uswx10:CenterWeatherAdvisoryStatement'
-            '/uswx10:centerWeatherAdvisoryText'
-        )
-
-        return {
-            'cwsuIdentifier': cwsu_id,
-            'sequenceIssuance': sequence_issuance,
-            'phenomenonTime': {
-                'start': phenomenon_start,
-                'end': phenomenon_end
-            },
-            'resultTime': result_time,
-            'observedProperty': observed_property,
-            'geometry': geometry,
-            'statementText': statement_text
-        }
+        return self.extract_fields(xml_tree, self.FIELDS, filters=[GmlToGeojsonFilter()])
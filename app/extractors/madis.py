@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+import io
 import logging
+from typing import Iterator, Union
 
-from app.util.madis import MadisObservationGenerator
-from ngitws.typing import JsonType
+from app.util.madis import InvalidMadisCsvLineError, MadisObservationGenerator
+from app.util.splitter import Buffer
+from ngitws.typing import JsonObject, JsonType
 
 from .base import Extractor
 
 
+# How much of a payload is decoded to text at a time.
+DECODE_BLOCK_SIZE = 1024 * 1024
+
+
 class MadisCsvExtractor(Extractor):
     """Metadata extractor for MADIS CSV products."""
 
@@ -23,3 +30,26 @@ class MadisCsvExtractor(Extractor):
         self.__logger.debug(f'Building observation from CSV data: {madis_csv}')
 
         return self.__generator.create_observation(madis_csv).as_dict()
+
+    def extract_all(self, data: Buffer) -> Iterator[Union[JsonObject, InvalidMadisCsvLineError]]:
+        """Lazily extract metadata from every line of a MADIS CSV payload.
+
+        The payload is decoded a block of whole lines at a time, so it is never
+        held as text all at once.  Invalid lines yield their error in place of
+        the metadata.
+
+        """
+        for observation in self.__generator.create_observations(self.__lines(data)):
+            if isinstance(observation, InvalidMadisCsvLineError):
+                yield observation
+            else:
+                yield observation.as_dict()
+
+    @staticmethod
+    def __lines(data: Buffer) -> Iterator[str]:
+        start = 0
+        while start < len(data):
+            end = data.find(b'\n', start + DECODE_BLOCK_SIZE)
+            end = len(data) if end < 0 else end + 1
+            yield from io.StringIO(data[start:end].decode('UTF-8'))
+            start = end
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Dict, Optional
+from typing import Dict, Mapping, Optional
+import uuid
 
 from ngitws.logging import track_correlation
 from ngitws.monitoring import OperationResult, report_operation
@@ -17,6 +18,7 @@ class ObsStationLocator:
         self.__population_lock = asyncio.Lock()
         self.__population_notifier = asyncio.Condition()
         self.__stations: Optional[Dict[str, str]] = None
+        self.__version = uuid.uuid4().hex
 
         self.__logger = logging.getLogger(__name__)
 
@@ -25,6 +27,17 @@ class ObsStationLocator:
             raise RuntimeError('Tried to access obs station locator without populating data first')
         return self.__stations.get(station_id, default)
 
+    @property
+    def version(self) -> str:
+        """Return a stamp that changes whenever the obs station data does."""
+        return self.__version
+
+    def snapshot(self) -> ObsStationSnapshot:
+        """Return a picklable copy of the current obs station data."""
+        if self.__stations is None:
+            raise RuntimeError('Tried to access obs station locator without populating data first')
+        return ObsStationSnapshot(self.__stations)
+
     async def populate_data(self) -> None:
         """Fetch and assemble obs station data."""
         if self.__population_lock.locked():
@@ -52,7 +65,9 @@ class ObsStationLocator:
                                 lon = record.document['position']['coordinates'][0]
                                 elevation = float(record.document['elevationFeet']) / 0.3048
                                 stations[station_id] = f'{name}||{lat:.3f} {lon:.3f} {elevation:.0f}'
-                        self.__stations = stations
+                        if stations != self.__stations:
+                            self.__stations = stations
+                            self.__version = uuid.uuid4().hex
                         operation.message = f'Loaded geolocation data for {len(stations)} observation stations'
                 except Exception as ex:
                     operation.ex = ex
@@ -62,3 +77,13 @@ class ObsStationLocator:
     async def wait_to_populate(self) -> None:
         if self.__stations is None:
             await self.populate_data()
+
+
+class ObsStationSnapshot:
+    """Fixed obs station data for use in MDL encoders outside of the event loop."""
+
+    def __init__(self, stations: Mapping[str, str]):
+        self.__stations = stations
+
+    def get(self, station_id: str, default: str) -> Optional[str]:
+        return self.__stations.get(station_id, default)
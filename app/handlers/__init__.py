@@ -1,7 +1,13 @@
 # flake8: noqa F401
 from typing import Dict, Type
 
-from .base import CollectiveExtractionHandler, ConversionHandler, ExtractionHandler, SubscriptionNotificationHandler
+from .base import (
+    CollectiveExtractionHandler,
+    ConversionHandler,
+    ExtractionHandler,
+    IwxxmCollectiveExtractionHandler,
+    SubscriptionNotificationHandler
+)
 from .airep import AirepConversionHandler, AirepExtractionHandler
 from .cap import CapExtractionHandler
 from .csfpf import CsfpfConversionHandler, CsfpfExtractionHandler
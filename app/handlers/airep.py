@@ -14,6 +14,7 @@ class AirepConversionHandler(ConversionHandler):
     async def create(cls, resources: ResourceManager) -> SubscriptionNotificationHandler:
         return cls(
             client=await resources.catalog_client(),
+            conversion_cache=await resources.conversion_cache(),
             converter=await resources.converter('AIREP'),
             file_catalog_id=resources.config.converters.airep.file_catalog_id,
             prefetch=resources.config.converters.airep.prefetch,
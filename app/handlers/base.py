@@ -2,17 +2,35 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 import asyncio
+from collections import Counter
 import inspect
 import logging
-from typing import Collection, Optional, Sequence, TYPE_CHECKING
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Callable,
+    cast,
+    Collection,
+    Optional,
+    Sequence,
+    TYPE_CHECKING
+)
 import uuid
 
 from aiohttp.client_exceptions import ClientPayloadError
-from app.converters import ConversionInput, Converter
+from app.catalog import CatalogFileReader
+from app.converters import ConversionCache, ConversionInput, Converter
+from app.deduplication import NotificationDeduplicator
 from app.exception import InvalidProductError
-from app.extractors import Extractor
+from app.extractors import Extractor, XmlExtractor
 from app.media_types import MediaTypes
+from app.metrics import HandlerMetrics
 from app.publisher import NwstgPublisher
+from app.scheduler import HandlerPriority
+from app.timing import stage, StageLatencies, StageTimer
+from app.util.pipeline import bounded_map
+from app.util.splitter import Buffer, IwxxmPart, IwxxmSplitter
 from ngitws.catalog import CatalogFile, CatalogIdentity, CatalogRecord, CatalogRecordFileMetadata, CatalogRecordStorage
 from ngitws.logging import extra_fields, get_correlation_id, get_request_id, is_debug_enabled, track_correlation
 from ngitws.monitoring import HealthCheck, HealthCheckResult, Operation, OperationResult, report_operation
@@ -29,6 +47,8 @@ if TYPE_CHECKING:
 class SubscriptionNotificationHandler(ABC):
     """Base class for job handlers that rely on a RabbitMQ subscription."""
 
+    PRIORITY = HandlerPriority.NORMAL
+
     def __init__(
         self,
         client: CatalogWebServiceClient,
@@ -41,7 +61,11 @@ class SubscriptionNotificationHandler(ABC):
             health_checks = []
 
         self.__client = client
+        self.__deduplicator: Optional[NotificationDeduplicator] = None
+        self.__file_reader = CatalogFileReader()
         self.__health_checks = tuple(health_checks)
+        self.__latencies: Optional[StageLatencies] = None
+        self.__metrics: Optional[HandlerMetrics] = None
         self.__prefetch = prefetch
         self.__subscription_id = subscription_id
 
@@ -68,6 +92,42 @@ class SubscriptionNotificationHandler(ABC):
     def client(self) -> CatalogWebServiceClient:
         return self.__client
 
+    @property
+    def deduplicator(self) -> Optional[NotificationDeduplicator]:
+        """Return the deduplicator that collapses repeated notifications, if any."""
+        return self.__deduplicator
+
+    @deduplicator.setter
+    def deduplicator(self, deduplicator: Optional[NotificationDeduplicator]) -> None:
+        self.__deduplicator = deduplicator
+
+    @property
+    def file_reader(self) -> CatalogFileReader:
+        """Return the reader used to download catalog files."""
+        return self.__file_reader
+
+    @file_reader.setter
+    def file_reader(self, file_reader: CatalogFileReader) -> None:
+        self.__file_reader = file_reader
+
+    @property
+    def latencies(self) -> Optional[StageLatencies]:
+        """Return the histograms that stage durations are recorded into, if any."""
+        return self.__latencies
+
+    @latencies.setter
+    def latencies(self, latencies: Optional[StageLatencies]) -> None:
+        self.__latencies = latencies
+
+    @property
+    def metrics(self) -> Optional[HandlerMetrics]:
+        """Return the counters that handler runs are recorded into, if any."""
+        return self.__metrics
+
+    @metrics.setter
+    def metrics(self, metrics: Optional[HandlerMetrics]) -> None:
+        self.__metrics = metrics
+
     @property
     def obsolete_fields(self) -> Sequence[str]:
         """Return a sequence of names of obsolete fields to remove from records."""
@@ -84,39 +144,111 @@ class SubscriptionNotificationHandler(ABC):
     async def check_health(self) -> Collection[HealthCheckResult]:
         return await asyncio.gather(*[check.run() for check in self.__health_checks])
 
-    async def run(self, identity: CatalogIdentity, operation: Operation) -> None:
-        """Run the handler on a given record."""
+    async def run(
+        self,
+        identity: CatalogIdentity,
+        operation: Operation,
+        *,
+        deduplicate: bool = True,
+        slot: Optional[Callable[[], AsyncContextManager[None]]] = None
+    ) -> None:
+        """Run the handler on a given record.
+
+        Notifications for a record that arrive while it is being handled are
+        collapsed into a single follow-up run when the handler has a
+        deduplicator.  The slot is only held while the record is actually
+        handled, so notifications waiting on a duplicate run do not hold one.
+
+        :param identity: the identity of the record
+        :param operation: the operation to report the outcome on
+        :param deduplicate: whether the run may be collapsed with other notifications for the record
+        :param slot: a factory for the context to hold while handling the record, such as a scheduler slot
+
+        """
+        if self.__metrics is None:
+            return await self.__deduplicate(identity, operation, deduplicate, slot)
+
+        self.__metrics.started(type(self).__name__)
         try:
-            return await self._run(identity, operation)
-        except ClientPayloadError as ex:
-            operation.error = ex
-            operation.message = f'Failed to read response payload while handling {identity}'
-            operation.result = OperationResult.DEFER
-        except WebClientConnectionError as ex:
-            operation.error = ex
-            operation.message = f'Web request failed while handling {identity}'
-            operation.result = OperationResult.DEFER
-        except WebClientResponseError as ex:
-            operation.error = ex
-            if ex.status == 502:
-                operation.message = f'Gateway error while handling {identity}'
+            await self.__deduplicate(identity, operation, deduplicate, slot)
+        finally:
+            self.__metrics.finished(type(self).__name__, operation.result)
+
+    async def __deduplicate(
+        self,
+        identity: CatalogIdentity,
+        operation: Operation,
+        deduplicate: bool,
+        slot: Optional[Callable[[], AsyncContextManager[None]]]
+    ) -> None:
+        if self.__deduplicator is None or not deduplicate:
+            return await self.__run_in_slot(identity, operation, slot)
+
+        duplicate = await self.__deduplicator.run(
+            (self.__subscription_id, identity),
+            operation,
+            lambda deduplicated_operation: self.__run_in_slot(identity, deduplicated_operation, slot)
+        )
+        if duplicate is not None:
+            operation.set_extra('duplicate', duplicate.value)
+
+    async def __run_in_slot(
+        self,
+        identity: CatalogIdentity,
+        operation: Operation,
+        slot: Optional[Callable[[], AsyncContextManager[None]]]
+    ) -> None:
+        if slot is None:
+            return await self.__run(identity, operation)
+
+        async with slot():
+            await self.__run(identity, operation)
+
+    async def __run(self, identity: CatalogIdentity, operation: Operation) -> None:
+        with StageTimer() as timer:
+            try:
+                return await self._run(identity, operation)
+            except ClientPayloadError as ex:
+                operation.error = ex
+                operation.message = f'Failed to read response payload while handling {identity}'
                 operation.result = OperationResult.DEFER
-            if ex.status == 503:
-                operation.message = f'Web resource unavailable while handling {identity}'
+            except WebClientConnectionError as ex:
+                operation.error = ex
+                operation.message = f'Web request failed while handling {identity}'
                 operation.result = OperationResult.DEFER
-            else:
-                operation.message = f'Web request failed ({ex.status}) while handling {identity}'
+            except WebClientResponseError as ex:
+                operation.error = ex
+                if ex.status == 502:
+                    operation.message = f'Gateway error while handling {identity}'
+                    operation.result = OperationResult.DEFER
+                if ex.status == 503:
+                    operation.message = f'Web resource unavailable while handling {identity}'
+                    operation.result = OperationResult.DEFER
+                else:
+                    operation.message = f'Web request failed ({ex.status}) while handling {identity}'
+                    operation.result = OperationResult.FAIL
+            except Exception as ex:
+                operation.error = ex
+                operation.message = f'Processing failed unexpectedly while handling {identity}'
                 operation.result = OperationResult.FAIL
-        except Exception as ex:
-            operation.error = ex
-            operation.message = f'Processing failed unexpectedly while handling {identity}'
-            operation.result = OperationResult.FAIL
+            finally:
+                self.__record_stages(timer, operation)
+
+    def __record_stages(self, timer: StageTimer, operation: Operation) -> None:
+        for name, seconds in timer.durations.items():
+            operation.set_extra(f'{name}_seconds', round(seconds, 6))
+            if self.__latencies is not None:
+                self.__latencies.observe(type(self).__name__, name, seconds)
 
     @abstractmethod
     async def _run(self, identity: CatalogIdentity, operation: Operation) -> None:
         """Run the handler on a given record."""
         pass
 
+    async def _read_file(self, catalog_file: CatalogFile) -> bytes:
+        """Read the whole content of a catalog file."""
+        return await self.__file_reader.read(catalog_file)
+
     def _standardize_record(self, record: CatalogRecord, remove_fields: Optional[Sequence[str]] = None):
         """Remove obsolete fields and object identities from a record."""
         if remove_fields is None:
@@ -156,7 +288,8 @@ class SubscriptionNotificationHandler(ABC):
             record = record.with_document({**(record.document or {}), **additional_metadata})
         record = self._timestamp_record(record)
 
-        return await self.__client.catalog(identity.catalog_id).upsert_record(record.id, record)
+        with stage('upsert'):
+            return await self.__client.catalog(identity.catalog_id).upsert_record(record.id, record)
 
 
 class ConversionHandler(SubscriptionNotificationHandler):
@@ -178,6 +311,7 @@ class ConversionHandler(SubscriptionNotificationHandler):
         converter: Converter,
         file_catalog_id: str,
         subscription_id: str,
+        conversion_cache: Optional[ConversionCache] = None,
         prefetch: Optional[int] = None,
         publisher: NwstgPublisher = None,
         source_link_id: str = 'tac',
@@ -186,6 +320,7 @@ class ConversionHandler(SubscriptionNotificationHandler):
         """Create a new conversion handler.
 
         :param client: the client for accessing the catalog web service
+        :param conversion_cache: the cache of earlier conversion results, or None to always convert
         :param converter: the converter for changing the file format
         :param subscription_id: the pubsub subscription ID to listen to
         :param file_catalog_id: the catalog to use for new files created
@@ -193,6 +328,7 @@ class ConversionHandler(SubscriptionNotificationHandler):
 
         """
         super().__init__(client, subscription_id, prefetch=prefetch)
+        self.__conversion_cache = conversion_cache
         self.__converter = converter
         self.__file_catalog_id = file_catalog_id
         self.__publisher = publisher
@@ -206,7 +342,8 @@ class ConversionHandler(SubscriptionNotificationHandler):
         return self.__converter
 
     async def _run(self, identity: CatalogIdentity, operation: Operation) -> None:
-        metadata_record = await self.client.get_record(identity, coherence=DataCoherence.CONSISTENT)
+        with stage('fetch_record'):
+            metadata_record = await self.client.get_record(identity, coherence=DataCoherence.CONSISTENT)
         # Check Storage.Object-Identities for backward compatibility
         if self.__source_link_id not in metadata_record.links and len(metadata_record.storage.object_ids) > 0:
             file_identity = metadata_record.storage.object_ids[0]
@@ -224,8 +361,19 @@ class ConversionHandler(SubscriptionNotificationHandler):
             extra['office_id'] = office_id
 
         try:
-            conversion_input = await self._get_input_data(identity, metadata_record)
-            conversion_results = await self.__converter.convert(conversion_input)
+            with stage('fetch_file'):
+                conversion_input = await self._get_input_data(identity, metadata_record)
+            with stage('convert'):
+                if self.__conversion_cache:
+                    conversion_results, cache_hit = await self.__conversion_cache.convert(
+                        self.__converter,
+                        conversion_input
+                    )
+                    extra['conversion_cache'] = 'hit' if cache_hit else 'miss'
+                    extra['conversion_cache_hits'] = self.__conversion_cache.hits
+                    extra['conversion_cache_misses'] = self.__conversion_cache.misses
+                else:
+                    conversion_results = await self.__converter.convert(conversion_input)
             if len(conversion_results) == 0:
                 # When the converter returns nothing, count that as a skip.
                 operation.message = f'{self.__converter.__class__.__name__} returned no result'
@@ -240,7 +388,8 @@ class ConversionHandler(SubscriptionNotificationHandler):
                 storage=CatalogRecordStorage(record_id=converted_file_record_id),
                 file_metadata=CatalogRecordFileMetadata(content_type=conversion_result.media_type)
             ), conversion_result.data)
-            result_file_id = await self.client.catalog(self.__file_catalog_id).create_file(converted_file)
+            with stage('create_file'):
+                result_file_id = await self.client.catalog(self.__file_catalog_id).create_file(converted_file)
             if result_file_id != converted_file_id:
                 raise RuntimeError(
                     f'Returned file record ID {result_file_id} did not match request {converted_file_id}'
@@ -254,13 +403,14 @@ class ConversionHandler(SubscriptionNotificationHandler):
 
             if self.__publisher:
                 try:
-                    await self.__publisher.request(
-                        identity,
-                        converted_file_id,
-                        issuance_time=DateTimeConverter().read_as_datetime(metadata_record.document['Issue-Time']),
-                        issuing_office=metadata_record.document['Issuing-Office'],
-                        wmo_id=await self._get_publisher_wmo_id(metadata_record.document['Wmo-Id'])
-                    )
+                    with stage('publish'):
+                        await self.__publisher.request(
+                            identity,
+                            converted_file_id,
+                            issuance_time=DateTimeConverter().read_as_datetime(metadata_record.document['Issue-Time']),
+                            issuing_office=metadata_record.document['Issuing-Office'],
+                            wmo_id=await self._get_publisher_wmo_id(metadata_record.document['Wmo-Id'])
+                        )
                 except KeyError as ex:
                     self.__logger.exception(
                         f'Failed to schedule file {converted_file_id} for NWSTG publishing: missing field {str(ex)}'
@@ -287,7 +437,7 @@ class ConversionHandler(SubscriptionNotificationHandler):
 
         async with self.client.get_file(file_identity, coherence=DataCoherence.CONSISTENT) as file_record:
             source_content_type = file_record.record.file_metadata.content_type
-            file_data = b''.join([chunk async for chunk in file_record.data])
+            file_data = await self._read_file(file_record)
 
             return [ConversionInput(file_data, source_content_type)]
 
@@ -309,6 +459,7 @@ class CollectiveExtractionHandler(SubscriptionNotificationHandler):
 
     """
 
+    DEFAULT_PART_WINDOW = 32
     NOTIFICATION_HANDLER_PART_OPERATION_ID = 'handle_notification_part'
 
     def __init__(
@@ -321,7 +472,9 @@ class CollectiveExtractionHandler(SubscriptionNotificationHandler):
         part_file_catalog_id: Optional[str] = None,
         part_file_link_id: Optional[str] = None,
         prefetch: Optional[int] = None,
-        part_media_type: MediaType = MediaTypes.APPLICATION_OCTET_STREAM
+        part_media_type: MediaType = MediaTypes.APPLICATION_OCTET_STREAM,
+        part_window: int = DEFAULT_PART_WINDOW,
+        spill_size: Optional[int] = None
     ):
         """Create a new collective extraction handler.
 
@@ -329,16 +482,24 @@ class CollectiveExtractionHandler(SubscriptionNotificationHandler):
         :param extractor: the extractor for gathering metadata
         :param part_file_catalog_id: the catalog for new files created
         :param part_metadata_catalog_id: the catalog for extracted metadata
+        :param part_window: the maximum number of parts processed at once
+        :param spill_size: the size in bytes above which a collective is memory-mapped from a temporary file,
+            or None to always hold collectives in memory
         :param subscription_id: the pubsub subscription ID to listen to
 
         """
         super().__init__(client, subscription_id, prefetch=prefetch)
+        if part_window < 1:
+            raise ValueError(f'Part window must be at least one, not {part_window}')
+
         self.__extractor = extractor
         self.__file_catalog_id = part_file_catalog_id
         self.__metadata_catalog_id = part_metadata_catalog_id
         self.__part_file_link_id = part_file_link_id
         self.__part_media_type = part_media_type
+        self.__part_window = part_window
         self.__source_link_id = collective_file_link_id
+        self.__spill_size = spill_size
 
         self.__logger = logging.getLogger(__name__)
 
@@ -350,8 +511,17 @@ class CollectiveExtractionHandler(SubscriptionNotificationHandler):
     def obsolete_fields(self) -> Sequence[str]:
         return list(super().obsolete_fields) + ['Feed-Type']
 
+    @property
+    def part_window(self) -> int:
+        return self.__part_window
+
+    @property
+    def spill_size(self) -> Optional[int]:
+        return self.__spill_size
+
     async def _run(self, identity: CatalogIdentity, operation: Operation) -> None:
-        collective_record = await self.client.get_record(identity, coherence=DataCoherence.CONSISTENT)
+        with stage('fetch_record'):
+            collective_record = await self.client.get_record(identity, coherence=DataCoherence.CONSISTENT)
         collective_record = await self._update_collective_record(identity, collective_record)
 
         if self.__source_link_id not in collective_record.links:
@@ -360,19 +530,29 @@ class CollectiveExtractionHandler(SubscriptionNotificationHandler):
 
         await self._upsert_record(identity, collective_record)
 
-        async with self.client.get_file(collective_file_id, coherence=DataCoherence.CONSISTENT) as collective_file:
-            collective_data = b''.join([chunk async for chunk in collective_file.data])
-        parts = await self._split_collective_data(collective_data)
-        self.__logger.debug(f'Found {len(parts)} individual product(s) in {identity}')
-
-        tasks = [self._handle_part(part, identity, collective_record) for part in parts]
-        results: Sequence[OperationResult] = await asyncio.gather(*tasks)
-        defer_results = sum([1 for result in results if result == OperationResult.DEFER])
-        fail_results = sum([1 for result in results if result == OperationResult.FAIL])
+        with stage('fetch_file'):
+            async with self.client.get_file(collective_file_id, coherence=DataCoherence.CONSISTENT) as collective_file:
+                collective = await self.file_reader.read_content(collective_file, self.__spill_size)
+
+        async def handle_part(part: Any) -> OperationResult:
+            return await self._handle_part(part, identity, collective_record)
+
+        # Parts are pulled from the splitter only as fast as the window drains, so at most a window's worth of parts
+        # and catalog requests are outstanding no matter how large the collective is.
+        results: Counter[OperationResult] = Counter()
+        with collective:
+            parts = bounded_map(handle_part, self._stream_collective_data(collective.data), self.__part_window)
+            async for result in parts:
+                results[result] += 1
+        product_count = sum(results.values())
+        self.__logger.debug(f'Handled {product_count} individual product(s) in {identity}')
+
+        defer_results = results[OperationResult.DEFER]
+        fail_results = results[OperationResult.FAIL]
         extra = {
             'defer_count': defer_results,
             'fail_count': fail_results,
-            'product_count': len(parts)
+            'product_count': product_count
         }
 
         if fail_results:
@@ -409,9 +589,13 @@ class CollectiveExtractionHandler(SubscriptionNotificationHandler):
             links={'collective': collective_identity}
         )
 
+    async def _extract_part(self, part: Any) -> JsonObject:
+        """Extract metadata from a part yielded by _stream_collective_data()."""
+        return await self.__extractor.extract(part)
+
     async def _handle_part(
         self,
-        data: bytes,
+        part: Any,
         collective_identity: CatalogIdentity,
         collective_record: CatalogRecord
     ) -> OperationResult:
@@ -421,7 +605,8 @@ class CollectiveExtractionHandler(SubscriptionNotificationHandler):
                     operation.set_extra('collective_catalog_id', collective_identity.catalog_id)
                     operation.set_extra('collective_record_id', collective_identity.record_id)
                     try:
-                        extracted_metadata = await self.__extractor.extract(data)
+                        with stage('extract'):
+                            extracted_metadata = await self._extract_part(part)
                         if is_debug_enabled():
                             self.__logger.debug(f'Extracted metadata from part: {extracted_metadata}')
 
@@ -446,8 +631,9 @@ class CollectiveExtractionHandler(SubscriptionNotificationHandler):
                                 storage=CatalogRecordStorage(record_id=part_record_id),
                                 file_metadata=CatalogRecordFileMetadata(content_type=self.__part_media_type)
                             )
-                            part_file = CatalogFile(file_record, data)
-                            await self.client.catalog(self.__file_catalog_id).create_file(part_file)
+                            part_file = CatalogFile(file_record, self._render_part(part))
+                            with stage('create_file'):
+                                await self.client.catalog(self.__file_catalog_id).create_file(part_file)
 
                             part_record = part_record.with_link(self.__part_file_link_id, part_file_identity)
 
@@ -494,8 +680,23 @@ class CollectiveExtractionHandler(SubscriptionNotificationHandler):
     ) -> str:
         return str(uuid.uuid4())
 
+    def _render_part(self, part: Any) -> bytes:
+        """Return the file content to upload for a part yielded by _stream_collective_data()."""
+        return part
+
+    async def _split_collective_data(self, data: Buffer) -> Sequence[Any]:
+        """Split the collective into all of its parts at once."""
+        return [part async for part in self._stream_collective_data(data)]
+
     @abstractmethod
-    async def _split_collective_data(self, data: bytes) -> Sequence[bytes]:
+    def _stream_collective_data(self, data: Buffer) -> AsyncIterator[Any]:
+        """Yield the parts of the collective as they are split out.
+
+        The data is bytes, or a memory map when the collective was spilled to
+        disk.  Parts are usually byte strings, but subclasses may yield anything
+        their _extract_part() and _render_part() methods accept.
+
+        """
         pass
 
     async def _update_collective_record(
@@ -515,6 +716,24 @@ class CollectiveExtractionHandler(SubscriptionNotificationHandler):
         return collective_record
 
 
+class IwxxmCollectiveExtractionHandler(CollectiveExtractionHandler):
+    """Handler for extracting metadata from the products of IWXXM collectives.
+
+    Each product is extracted from the tree it was split into, and only
+    rendered to bytes for its file, so the collective is parsed once.
+
+    """
+
+    async def _extract_part(self, part: IwxxmPart) -> JsonObject:
+        return await cast(XmlExtractor, self.extractor).extract_element(part.element)
+
+    def _render_part(self, part: IwxxmPart) -> bytes:
+        return part.data
+
+    def _stream_collective_data(self, data: Buffer) -> AsyncIterator[IwxxmPart]:
+        return IwxxmSplitter().parts(data)
+
+
 class ExtractionHandler(SubscriptionNotificationHandler):
     """Handler for extracting metadata from products.
 
@@ -553,7 +772,8 @@ class ExtractionHandler(SubscriptionNotificationHandler):
         return self.__extractor
 
     async def _run(self, identity: CatalogIdentity, operation: Operation) -> None:
-        metadata_record = await self.client.get_record(identity, coherence=DataCoherence.CONSISTENT)
+        with stage('fetch_record'):
+            metadata_record = await self.client.get_record(identity, coherence=DataCoherence.CONSISTENT)
         file_identity = metadata_record.links.get(self.__file_link_id)
 
         # Check Storage.Object-Identities for backward compatibility
@@ -566,10 +786,12 @@ class ExtractionHandler(SubscriptionNotificationHandler):
         # Remove obsolete fields
         metadata_record = self._standardize_record(metadata_record)
 
-        async with self.client.get_file(file_identity, coherence=DataCoherence.CONSISTENT) as file_record:
-            file_data = b''.join([chunk async for chunk in file_record.data])
+        with stage('fetch_file'):
+            async with self.client.get_file(file_identity, coherence=DataCoherence.CONSISTENT) as file_record:
+                file_data = await self._read_file(file_record)
 
-        extracted_metadata = await self.__extractor.extract(file_data)
+        with stage('extract'):
+            extracted_metadata = await self.__extractor.extract(file_data)
         await self._upsert_record(identity, metadata_record, extracted_metadata)
 
         operation.message = f'Extraction completed for {identity}'
@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 from typing import Any, Mapping, Optional, TYPE_CHECKING
 
+from app.scheduler import HandlerPriority
 from ngitws.catalog import CatalogIdentity, CatalogRecord
 from ngitws.collections import DotPathResolver
 from ngitws.typing import JsonObject
@@ -16,6 +17,8 @@ if TYPE_CHECKING:
 
 class CapExtractionHandler(ExtractionHandler):
 
+    PRIORITY = HandlerPriority.HIGH
+
     @classmethod
     async def create(cls, resources: ResourceManager) -> SubscriptionNotificationHandler:
         return cls(
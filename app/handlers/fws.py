@@ -60,7 +60,7 @@ class SpotFwsHandler(SubscriptionNotificationHandler):
         try:
             # 1. Get FWS product from the Catalog
             async with fws_catalog_accessor.get_file(identity.record_id, coherence=DataCoherence.CONSISTENT) as file:
-                fws_raw_text = b''.join([d async for d in file.data])
+                fws_raw_text = await self._read_file(file)
                 fws_text:str = fws_raw_text.decode("utf-8")
             
             # 2. Parse the FWS Product
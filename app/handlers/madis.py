@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import json
-from typing import Sequence, TYPE_CHECKING
+from typing import AsyncIterator, cast, Sequence, TYPE_CHECKING, Union
 
 from app.converters import ConversionInput
+from app.extractors import MadisCsvExtractor
 from app.media_types import MediaTypes
-from app.util.splitter import LineSplitter
+from app.scheduler import HandlerPriority
+from app.util.madis import InvalidMadisCsvLineError
+from app.util.splitter import Buffer
 from ngitws.catalog import CatalogIdentity, CatalogRecord
+from ngitws.typing import JsonObject
 
 from .base import CollectiveExtractionHandler, ConversionHandler, SubscriptionNotificationHandler
 
@@ -16,10 +20,13 @@ if TYPE_CHECKING:
 
 class MadisJsonConversionHandler(ConversionHandler):
 
+    PRIORITY = HandlerPriority.LOW
+
     @classmethod
     async def create(cls, resources: ResourceManager) -> SubscriptionNotificationHandler:
         return cls(
             client=await resources.catalog_client(),
+            conversion_cache=await resources.conversion_cache(),
             converter=await resources.converter('MADIS-JSON'),
             file_catalog_id=resources.config.converters.madis.file_catalog_id,
             prefetch=resources.config.converters.madis.prefetch,
@@ -43,6 +50,8 @@ class MadisJsonConversionHandler(ConversionHandler):
 
 class MadisCsvExtractionHandler(CollectiveExtractionHandler):
 
+    PRIORITY = HandlerPriority.LOW
+
     @classmethod
     async def create(cls, resources: ResourceManager) -> SubscriptionNotificationHandler:
         return cls(
@@ -51,7 +60,9 @@ class MadisCsvExtractionHandler(CollectiveExtractionHandler):
             extractor=await resources.extractor('MADIS-CSV'),
             part_metadata_catalog_id=resources.config.extractors.madis.metadata_catalog_id,
             part_media_type=MediaTypes.TEXT_CSV,
+            part_window=resources.config.extractors.madis.part_window,
             prefetch=resources.config.extractors.madis.prefetch,
+            spill_size=resources.config.extractors.madis.spill_size,
             subscription_id=resources.config.extractors.madis.subscription_id
         )
 
@@ -59,5 +70,12 @@ class MadisCsvExtractionHandler(CollectiveExtractionHandler):
     def is_enabled(cls, resources: ResourceManager) -> bool:
         return resources.config.extractors.madis.is_enabled
 
-    async def _split_collective_data(self, data: bytes) -> Sequence[bytes]:
-        return await LineSplitter().split(data.strip())
+    async def _extract_part(self, part: Union[JsonObject, InvalidMadisCsvLineError]) -> JsonObject:
+        if isinstance(part, InvalidMadisCsvLineError):
+            raise part
+        return part
+
+    async def _stream_collective_data(self, data: Buffer) -> AsyncIterator[Union[JsonObject, InvalidMadisCsvLineError]]:
+        # Lines are extracted in bulk as they are consumed, so each part is already extracted metadata.
+        for part in cast(MadisCsvExtractor, self.extractor).extract_all(data):
+            yield part
@@ -1,11 +1,10 @@
 from __future__ import annotations
 
-from typing import Sequence, TYPE_CHECKING
+from typing import TYPE_CHECKING
 
 from app.media_types import MediaTypes
-from app.util.splitter import IwxxmSplitter
 
-from .base import CollectiveExtractionHandler, ConversionHandler, SubscriptionNotificationHandler
+from .base import ConversionHandler, IwxxmCollectiveExtractionHandler, SubscriptionNotificationHandler
 
 if TYPE_CHECKING:
     from app.resources import ResourceManager
@@ -17,6 +16,7 @@ class MetarCollectiveConversionHandler(ConversionHandler):
     async def create(cls, resources: ResourceManager) -> SubscriptionNotificationHandler:
         return cls(
             client=await resources.catalog_client(),
+            conversion_cache=await resources.conversion_cache(),
             converter=await resources.converter('METAR-COLLECTIVE'),
             file_catalog_id=resources.config.converters.metar.file_catalog_id,
             prefetch=resources.config.converters.metar.prefetch,
@@ -29,7 +29,7 @@ class MetarCollectiveConversionHandler(ConversionHandler):
         return resources.config.converters.metar.is_enabled
 
 
-class MetarCollectiveExtractionHandler(CollectiveExtractionHandler):
+class MetarCollectiveExtractionHandler(IwxxmCollectiveExtractionHandler):
 
     @classmethod
     async def create(cls, resources: ResourceManager) -> SubscriptionNotificationHandler:
@@ -41,13 +41,12 @@ class MetarCollectiveExtractionHandler(CollectiveExtractionHandler):
             part_file_link_id='xml',
             part_metadata_catalog_id=resources.config.extractors.metar.metadata_catalog_id,
             part_media_type=MediaTypes.APPLICATION_IWXXM_XML,
+            part_window=resources.config.extractors.metar.part_window,
             prefetch=resources.config.extractors.metar.prefetch,
+            spill_size=resources.config.extractors.metar.spill_size,
             subscription_id=resources.config.extractors.metar.subscription_id
         )
 
     @classmethod
     def is_enabled(cls, resources: ResourceManager) -> bool:
         return resources.config.extractors.metar.is_enabled
-
-    async def _split_collective_data(self, data: bytes) -> Sequence[bytes]:
-        return await IwxxmSplitter().split(data)
@@ -4,6 +4,7 @@ import logging
 from typing import Optional, TYPE_CHECKING
 
 from app.publisher import NwstgPublisher
+from app.timing import stage
 from ngitws.catalog import CatalogIdentity
 from ngitws.monitoring import Operation, OperationResult
 from ngitws.web import CatalogWebServiceClient
@@ -43,7 +44,8 @@ class NwstgPublisherHandler(SubscriptionNotificationHandler):
 
     async def _run(self, identity: CatalogIdentity, operation: Operation) -> None:
         """Run the handler on a given record."""
-        result = await self.__publisher.publish(identity)
+        with stage('publish'):
+            result = await self.__publisher.publish(identity)
 
         operation.message = f'Published {identity} to {result.path}'
         operation.result = OperationResult.PASS
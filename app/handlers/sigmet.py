@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from app.scheduler import HandlerPriority
+
 from .base import ConversionHandler, ExtractionHandler, SubscriptionNotificationHandler
 
 if TYPE_CHECKING:
@@ -10,10 +12,13 @@ if TYPE_CHECKING:
 
 class SigmetConversionHandler(ConversionHandler):
 
+    PRIORITY = HandlerPriority.HIGH
+
     @classmethod
     async def create(cls, resources: ResourceManager) -> SubscriptionNotificationHandler:
         return cls(
             client=await resources.catalog_client(),
+            conversion_cache=await resources.conversion_cache(),
             converter=await resources.converter('SIGMET'),
             file_catalog_id=resources.config.converters.sigmet.file_catalog_id,
             prefetch=resources.config.converters.sigmet.prefetch,
@@ -28,6 +33,8 @@ class SigmetConversionHandler(ConversionHandler):
 
 class SigmetExtractionHandler(ExtractionHandler):
 
+    PRIORITY = HandlerPriority.HIGH
+
     @classmethod
     async def create(cls, resources: ResourceManager) -> SubscriptionNotificationHandler:
         return cls(
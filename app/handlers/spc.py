@@ -7,6 +7,7 @@ from typing import Optional, TYPE_CHECKING
 from app.converters import ConversionInput, Converter
 from app.exception import InvalidProductError
 from app.media_types import MediaTypes
+from app.timing import stage
 from ngitws.catalog import CatalogFile, CatalogIdentity, CatalogRecord, CatalogRecordFileMetadata
 from ngitws.monitoring import Operation, OperationResult
 from ngitws.web import CatalogWebServiceClient, DataCoherence
@@ -61,7 +62,8 @@ class SpcWatchConversionHandler(SubscriptionNotificationHandler):
         self.__logger = logging.getLogger(__name__)
 
     async def _run(self, identity: CatalogIdentity, operation: Operation) -> None:
-        metadata_record = await self.client.get_record(identity, coherence=DataCoherence.CONSISTENT)
+        with stage('fetch_record'):
+            metadata_record = await self.client.get_record(identity, coherence=DataCoherence.CONSISTENT)
         document = metadata_record.document
         product_id = document['Product-Identifier']
         issue_time = document['Issue-Time']
@@ -122,11 +124,13 @@ class SpcWatchConversionHandler(SubscriptionNotificationHandler):
             sel_record = self.__update_metadata_record(sel_record, 'saw', saw_identity)
 
             # Fetch and convert TAC files
-            inputs = await asyncio.gather(
-                self.__fetch_input(saw_record.links[self.__source_link_id], 'SAW'),
-                self.__fetch_input(sel_record.links[self.__source_link_id], 'SEL')
-            )
-            converted_results = await self.__converter.convert(inputs)
+            with stage('fetch_file'):
+                inputs = await asyncio.gather(
+                    self.__fetch_input(saw_record.links[self.__source_link_id], 'SAW'),
+                    self.__fetch_input(sel_record.links[self.__source_link_id], 'SEL')
+                )
+            with stage('convert'):
+                converted_results = await self.__converter.convert(inputs)
 
             for converted in converted_results:
                 converted_record = CatalogRecord(
@@ -156,7 +160,7 @@ class SpcWatchConversionHandler(SubscriptionNotificationHandler):
 
     async def __fetch_input(self, identity: CatalogIdentity, product_id: str) -> ConversionInput:
         async with self.client.get_file(identity) as file:
-            file_data = b''.join([chunk async for chunk in file.data])
+            file_data = await self._read_file(file)
             return ConversionInput(file_data, MediaTypes.TEXT_PLAIN, id=product_id)
 
     def __should_handle_records(self, product_id: str, saw_record: CatalogRecord, sel_record: CatalogRecord) -> bool:
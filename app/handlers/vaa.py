@@ -14,6 +14,7 @@ class VolcanicAshConversionHandler(ConversionHandler):
     async def create(cls, resources: ResourceManager) -> SubscriptionNotificationHandler:
         return cls(
             client=await resources.catalog_client(),
+            conversion_cache=await resources.conversion_cache(),
             converter=await resources.converter('VAA'),
             file_catalog_id=resources.config.converters.vaa.file_catalog_id,
             prefetch=resources.config.converters.vaa.prefetch,
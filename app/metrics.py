@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+import logging
+import math
+import time
+from types import TracebackType
+from typing import Awaitable, Callable, Iterable, List, Mapping, Optional, Tuple, Type, TYPE_CHECKING
+
+from ngitws.monitoring import OperationResult
+
+from .scheduler import HandlerScheduler
+from .timing import LatencyHistogram
+
+if TYPE_CHECKING:
+    from .resources import ResourceManager
+    from .watchdog import LoopWatchdog
+
+
+DEFAULT_LAG_INTERVAL = 0.5  # in seconds
+DEFAULT_REQUEST_TIMEOUT = 10  # in seconds
+
+# Upper bounds in seconds of the event loop lag buckets.
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+METRIC_PREFIX = 'product_processor'
+
+Labels = Mapping[str, str]
+
+
+class HandlerMetrics:
+    """Counts of handler results and of runs in flight, per handler."""
+
+    def __init__(self):
+        self.__in_flight: Counter[str] = Counter()
+        self.__results: Counter[Tuple[str, OperationResult]] = Counter()
+
+    def in_flight(self) -> Mapping[str, int]:
+        """Return the number of runs in flight for each handler seen so far."""
+        return dict(self.__in_flight)
+
+    def results(self) -> Mapping[Tuple[str, OperationResult], int]:
+        """Return the number of runs that finished with each result, per handler."""
+        return dict(self.__results)
+
+    def started(self, handler: str) -> None:
+        self.__in_flight[handler] += 1
+
+    def finished(self, handler: str, result: Optional[OperationResult]) -> None:
+        self.__in_flight[handler] -= 1
+        if result is not None:
+            self.__results[handler, result] += 1
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes up from a short sleep.
+
+    Any lag beyond the timer's own jitter is time the loop spent running
+    something else without yielding, such as a synchronous parse.
+
+    """
+
+    def __init__(self, interval: float = DEFAULT_LAG_INTERVAL, *, clock: Callable[[], float] = time.monotonic):
+        """Create a new lag monitor.
+
+        :param interval: the time in seconds between measurements
+        :param clock: the source of the current time in seconds
+
+        """
+        self.__clock = clock
+        self.__histogram = LatencyHistogram(LAG_BUCKETS)
+        self.__interval = interval
+        self.__last = 0.0
+
+    @property
+    def histogram(self) -> LatencyHistogram:
+        return self.__histogram
+
+    @property
+    def interval(self) -> float:
+        return self.__interval
+
+    @property
+    def last(self) -> float:
+        """Return the lag in seconds of the most recent measurement."""
+        return self.__last
+
+    def observe(self, lag: float) -> None:
+        self.__last = max(lag, 0.0)
+        self.__histogram.observe(self.__last)
+
+    async def run(self) -> None:
+        """Measure the lag until cancelled."""
+        while True:
+            start = self.__clock()
+            await asyncio.sleep(self.__interval)
+            self.observe(self.__clock() - start - self.__interval)
+
+
+class MetricsWriter:
+    """Writer for metrics in the Prometheus text exposition format."""
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self, prefix: str = METRIC_PREFIX):
+        self.__lines: List[str] = []
+        self.__prefix = prefix
+
+    def counter(self, name: str, description: str, samples: Iterable[Tuple[Labels, float]]) -> None:
+        self.__family(name, 'counter', description, samples)
+
+    def gauge(self, name: str, description: str, samples: Iterable[Tuple[Labels, float]]) -> None:
+        self.__family(name, 'gauge', description, samples)
+
+    def histogram(self, name: str, description: str, samples: Iterable[Tuple[Labels, LatencyHistogram]]) -> None:
+        name = f'{self.__prefix}_{name}'
+        self.__header(name, 'histogram', description)
+        for labels, histogram in samples:
+            counts = histogram.cumulative_counts()
+            for bound, count in zip([*histogram.bounds, math.inf], counts):
+                self.__sample(f'{name}_bucket', {**labels, 'le': self.__format_value(bound)}, count)
+            self.__sample(f'{name}_sum', labels, histogram.sum)
+            self.__sample(f'{name}_count', labels, counts[-1])
+
+    def render(self) -> str:
+        return ''.join(f'{line}\n' for line in self.__lines)
+
+    def __family(self, name: str, kind: str, description: str, samples: Iterable[Tuple[Labels, float]]) -> None:
+        name = f'{self.__prefix}_{name}'
+        self.__header(name, kind, description)
+        for labels, value in samples:
+            self.__sample(name, labels, value)
+
+    def __header(self, name: str, kind: str, description: str) -> None:
+        self.__lines.append(f'# HELP {name} {description}')
+        self.__lines.append(f'# TYPE {name} {kind}')
+
+    def __sample(self, name: str, labels: Labels, value: float) -> None:
+        if labels:
+            label_text = ','.join(f'{key}="{self.__escape(str(label))}"' for key, label in labels.items())
+            name = f'{name}{{{label_text}}}'
+        self.__lines.append(f'{name} {self.__format_value(value)}')
+
+    @staticmethod
+    def __escape(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    @staticmethod
+    def __format_value(value: float) -> str:
+        if value == math.inf:
+            return '+Inf'
+        if isinstance(value, int) or value.is_integer():
+            return str(int(value))
+        return repr(value)
+
+
+class MetricsCollector:
+    """Gather the daemon's metrics from its shared resources."""
+
+    def __init__(
+        self,
+        resources: ResourceManager,
+        scheduler: HandlerScheduler,
+        loop_lag: LoopLagMonitor,
+        watchdog: Optional[LoopWatchdog] = None
+    ):
+        self.__loop_lag = loop_lag
+        self.__resources = resources
+        self.__scheduler = scheduler
+        self.__watchdog = watchdog
+
+    async def collect(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        writer = MetricsWriter()
+        handler_metrics = self.__resources.handler_metrics
+
+        writer.counter('handler_results_total', 'Handler runs by result.', [
+            ({'handler': handler, 'result': result.name}, count)
+            for (handler, result), count in sorted(handler_metrics.results().items(), key=lambda item: item[0][0])
+        ])
+        writer.gauge('handler_in_flight', 'Handler runs in progress.', [
+            ({'handler': handler}, count) for handler, count in sorted(handler_metrics.in_flight().items())
+        ])
+        writer.gauge('scheduler_in_flight', 'Handler runs holding a scheduler slot.', [
+            ({}, self.__scheduler.in_flight)
+        ])
+        writer.gauge('scheduler_waiting', 'Handler runs waiting for a scheduler slot.', [
+            ({}, self.__scheduler.waiting)
+        ])
+        writer.histogram('stage_duration_seconds', 'Time spent in each stage of a handler run.', [
+            ({'handler': handler, 'stage': stage}, histogram)
+            for (handler, stage), histogram in sorted(self.__resources.stage_latencies.histograms().items())
+        ])
+
+        conversion_cache = await self.__resources.conversion_cache()
+        if conversion_cache is not None:
+            writer.counter('conversion_cache_hits_total', 'Conversions answered from the cache.', [
+                ({}, conversion_cache.hits)
+            ])
+            writer.counter('conversion_cache_misses_total', 'Conversions not found in the cache.', [
+                ({}, conversion_cache.misses)
+            ])
+            writer.gauge('conversion_cache_entries', 'Conversion results held in memory.', [
+                ({}, conversion_cache.entries)
+            ])
+            writer.gauge('conversion_cache_bytes', 'Total size of the conversion results held in memory.', [
+                ({}, conversion_cache.size)
+            ])
+
+        deduplicator = await self.__resources.notification_deduplicator()
+        if deduplicator is not None:
+            writer.counter('notification_duplicates_total', 'Notifications collapsed into another run.', [
+                ({}, deduplicator.collapsed)
+            ])
+
+        writer.gauge('event_loop_lag_seconds', 'Event loop lag at the most recent measurement.', [
+            ({}, self.__loop_lag.last)
+        ])
+        writer.histogram('event_loop_lag', 'Event loop lag measurements in seconds.', [
+            ({}, self.__loop_lag.histogram)
+        ])
+        if self.__watchdog is not None:
+            writer.counter('event_loop_stalls_total', 'Times the event loop blocked beyond the stall threshold.', [
+                ({}, self.__watchdog.stall_count)
+            ])
+
+        return writer.render()
+
+
+class MetricsServer:
+    """Minimal HTTP server answering scrapes of /metrics."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        collect: Callable[[], Awaitable[str]],
+        *,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT
+    ):
+        """Create a new metrics server.
+
+        :param host: the address to listen on
+        :param port: the port to listen on, or zero for any free port
+        :param collect: the coroutine function that renders the metrics
+        :param timeout: the time in seconds a client has to send its request
+
+        """
+        self.__collect = collect
+        self.__host = host
+        self.__port = port
+        self.__server: Optional[asyncio.AbstractServer] = None
+        self.__timeout = timeout
+
+        self.__logger = logging.getLogger(__name__)
+
+    async def __aenter__(self) -> MetricsServer:
+        self.__logger.info(f'Serving metrics on {self.__host}:{self.__port}')
+        self.__server = await asyncio.start_server(self.__handle, self.__host, self.__port)
+
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType]
+    ) -> None:
+        if self.__server:
+            self.__server.close()
+            await self.__server.wait_closed()
+            self.__server = None
+
+    @property
+    def port(self) -> int:
+        """Return the port the server is listening on."""
+        if self.__server and self.__server.sockets:
+            return self.__server.sockets[0].getsockname()[1]
+        return self.__port
+
+    async def wait_closed(self) -> None:
+        if self.__server:
+            await self.__server.wait_closed()
+
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), self.__timeout)
+            # The request headers carry nothing the response depends on.
+            while await asyncio.wait_for(reader.readline(), self.__timeout) not in (b'\r\n', b'\n', b''):
+                pass
+
+            method, target = (request_line.decode('latin-1').split(' ') + ['', ''])[:2]
+            if method != 'GET':
+                status, body = '405 Method Not Allowed', 'Method not allowed\n'
+            elif target.partition('?')[0] != '/metrics':
+                status, body = '404 Not Found', 'Not found\n'
+            else:
+                status, body = '200 OK', await self.__collect()
+
+            content = body.encode('utf-8')
+            writer.write(
+                f'HTTP/1.1 {status}\r\n'
+                f'Content-Type: {MetricsWriter.CONTENT_TYPE}\r\n'
+                f'Content-Length: {len(content)}\r\n'
+                f'Connection: close\r\n\r\n'.encode('latin-1') + content
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception:
+            self.__logger.exception('Failed to answer metrics request')
+        finally:
+            writer.close()
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from collections import Counter
+import cProfile
+from enum import Enum
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from typing import Callable, NamedTuple, Optional, Tuple
+
+from .watchdog import running_handler
+
+
+DEFAULT_SAMPLE_INTERVAL = 0.005  # in seconds
+DEFAULT_STATS_LIMIT = 40
+MAX_PROFILE_DURATION = 600  # in seconds
+
+# A sampled stack, outermost frame first.
+Stack = Tuple[str, ...]
+
+
+class ProfileMode(Enum):
+    """How a profiling session observes the event loop."""
+
+    CPROFILE = 'cprofile'
+    SAMPLING = 'sampling'
+
+
+class ProfileReport(NamedTuple):
+    """Aggregated results of a profiling session."""
+
+    mode: ProfileMode
+    duration: float
+    handler: Optional[str]
+    samples: int
+    stats: str
+    folded: str
+
+
+class Profiler:
+    """Profile the event loop of the running process on demand.
+
+    A cProfile session traces every call made on the loop's thread.  A
+    sampling session instead reads the loop thread's stack from another
+    thread at a fixed interval, which costs far less and can be limited to
+    the samples taken while a given handler was running.  Only one session
+    can run at a time.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float = DEFAULT_SAMPLE_INTERVAL,
+        limit: int = DEFAULT_STATS_LIMIT,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Create a new profiler.
+
+        :param interval: the time in seconds between samples of a sampling session
+        :param limit: the number of functions listed in the stats of a report
+        :param clock: the source of the current time in seconds
+
+        """
+        self.__clock = clock
+        self.__handler: Optional[str] = None
+        self.__interval = interval
+        self.__limit = limit
+        self.__mode: Optional[ProfileMode] = None
+        self.__profile: Optional[cProfile.Profile] = None
+        self.__samples: Counter[Stack] = Counter()
+        self.__started = 0.0
+        self.__stopped = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    @property
+    def active(self) -> bool:
+        return self.__mode is not None
+
+    def start(self, mode: ProfileMode = ProfileMode.SAMPLING, handler: Optional[str] = None) -> None:
+        """Start a session on the calling thread, optionally only sampling runs of the named handler class."""
+        if self.__mode is not None:
+            raise RuntimeError(f'A {self.__mode.value} profiling session is already running')
+        if handler is not None and mode is not ProfileMode.SAMPLING:
+            raise ValueError('Only sampling sessions can be limited to a handler')
+
+        self.__handler = handler
+        self.__mode = mode
+        self.__samples = Counter()
+        self.__started = self.__clock()
+
+        if mode is ProfileMode.CPROFILE:
+            self.__profile = cProfile.Profile()
+            self.__profile.enable()
+        else:
+            self.__stopped.clear()
+            self.__thread = threading.Thread(
+                target=self.__sample,
+                args=(threading.get_ident(),),
+                name='profiler',
+                daemon=True
+            )
+            self.__thread.start()
+
+    def stop(self) -> ProfileReport:
+        """Stop the running session and return its results."""
+        if self.__mode is None:
+            raise RuntimeError('No profiling session is running')
+
+        duration = self.__clock() - self.__started
+        mode = self.__mode
+        try:
+            if self.__profile is not None:
+                self.__profile.disable()
+                return ProfileReport(mode, duration, None, 0, self.__format_profile(self.__profile), '')
+
+            if self.__thread is not None:
+                self.__stopped.set()
+                self.__thread.join()
+            samples = sum(self.__samples.values())
+            return ProfileReport(
+                mode,
+                duration,
+                self.__handler,
+                samples,
+                self.__format_samples(self.__samples),
+                ''.join(f'{";".join(stack)} {count}\n' for stack, count in self.__samples.most_common())
+            )
+        finally:
+            self.__handler = None
+            self.__mode = None
+            self.__profile = None
+            self.__thread = None
+
+    def __sample(self, thread_id: int) -> None:
+        while not self.__stopped.wait(self.__interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            if self.__handler is not None and running_handler(frame)[0] != self.__handler:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            self.__samples[tuple(reversed(stack))] += 1
+
+    def __format_profile(self, profile: cProfile.Profile) -> str:
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.__limit)
+        return stream.getvalue()
+
+    def __format_samples(self, samples: Counter[Stack]) -> str:
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in samples.items():
+            own[stack[-1]] += count
+            for function in set(stack):
+                total[function] += count
+
+        sample_count = max(sum(samples.values()), 1)
+        lines = [f'{"own":>7} {"total":>7}  function']
+        for function, count in total.most_common(self.__limit):
+            own_percent = 100 * own[function] / sample_count
+            total_percent = 100 * count / sample_count
+            lines.append(f'{own_percent:6.1f}% {total_percent:6.1f}%  {function}')
+
+        return ''.join(f'{line}\n' for line in lines)
@@ -1,14 +1,19 @@
 from __future__ import annotations
 
+import asyncio
 from contextlib import asynccontextmanager, AsyncExitStack
 from pathlib import Path
 from types import TracebackType
 from typing import AsyncGenerator, Optional, Type
 
-from app.converters import Converter, CONVERTERS
+from app.catalog import CatalogFileReader
+from app.converters import ConversionCache, Converter, ConverterExecutor, CONVERTERS, ProcessPoolConverterExecutor
+from app.deduplication import NotificationDeduplicator
 from app.extractors import Extractor, EXTRACTORS
+from app.metrics import HandlerMetrics
 from app.spot import StqApp, SPOT
 from app.handlers import HANDLERS, SubscriptionNotificationHandler
+from app.timing import StageLatencies
 from ngitws.asyncio import Scheduler
 from ngitws.rabbitmq import AmqpConnectionParameters
 from ngitws.rabbitmq.notification import NotificationSubscriber
@@ -24,13 +29,27 @@ from .rpc import RpcServer
 class ResourceManager:
     """Manager for resources used in the application."""
 
-    def __init__(self, config: Configuration):
+    def __init__(self, config: Configuration, *, process_pool: bool = False):
+        """Create a new resource manager.
+
+        :param config: the application configuration
+        :param process_pool: whether opted-in converters should run in a process pool
+
+        """
         self.__config = config
+        self.__process_pool = process_pool
         self.__stack: Optional[AsyncExitStack] = None
 
         self.__catalog_client: Optional[CatalogWebServiceClient] = None
+        self.__conversion_cache: Optional[ConversionCache] = None
+        self.__converter_executor: Optional[ConverterExecutor] = None
+        self.__converter_executor_lock: Optional[asyncio.Lock] = None
+        self.__file_reader: Optional[CatalogFileReader] = None
+        self.__handler_metrics = HandlerMetrics()
+        self.__notification_deduplicator: Optional[NotificationDeduplicator] = None
         self.__nwstg_publisher: Optional[NwstgPublisher] = None
         self.__obs_station_locator: Optional[ObsStationLocator] = None
+        self.__stage_latencies = StageLatencies()
         self.__subscription_client: Optional[SubscriptionWebServiceClient] = None
 
     async def __aenter__(self) -> ResourceManager:
@@ -38,6 +57,8 @@ class ResourceManager:
             raise RuntimeError('ResourceManager is already open')
         self.__stack = AsyncExitStack()
         await self.__stack.__aenter__()
+        # Created here rather than in __init__ so the lock belongs to the running event loop.
+        self.__converter_executor_lock = asyncio.Lock()
 
         return self
 
@@ -52,6 +73,11 @@ class ResourceManager:
                 await self.__stack.__aexit__(None, None, None)
         finally:
             self.__catalog_client = None
+            self.__conversion_cache = None
+            self.__converter_executor = None
+            self.__converter_executor_lock = None
+            self.__file_reader = None
+            self.__notification_deduplicator = None
             self.__obs_station_locator = None
             self.__nwstg_publisher = None
             self.__subscription_client = None
@@ -62,9 +88,23 @@ class ResourceManager:
         """Return the application configuration."""
         return self.__config
 
+    @property
+    def handler_metrics(self) -> HandlerMetrics:
+        """Return the counters of handler runs, shared by every handler."""
+        return self.__handler_metrics
+
+    @property
+    def stage_latencies(self) -> StageLatencies:
+        """Return the histograms of handler stage durations, shared by every handler."""
+        return self.__stage_latencies
+
     async def converter(self, name: str) -> Converter:
         """Return a converter instance or raise an exception if not available."""
-        return await CONVERTERS[name].create(self)
+        converter = await CONVERTERS[name].create(self)
+        if converter.PROCESS_POOL:
+            converter.executor = await self.converter_executor()
+
+        return converter
 
     async def extractor(self, name: str) -> Extractor:
         """Return an extractor instance or raise an exception if not available."""
@@ -72,7 +112,13 @@ class ResourceManager:
 
     async def handler(self, name: str) -> SubscriptionNotificationHandler:
         """Return a subscription handler instance or raise an exception if not available."""
-        return await HANDLERS[name].create(self)
+        handler = await HANDLERS[name].create(self)
+        handler.deduplicator = await self.notification_deduplicator()
+        handler.file_reader = await self.file_reader()
+        handler.latencies = self.__stage_latencies
+        handler.metrics = self.__handler_metrics
+
+        return handler
 
     async def catalog_client(self) -> CatalogWebServiceClient:
         if not self.__stack:
@@ -86,6 +132,64 @@ class ResourceManager:
 
         return self.__catalog_client
 
+    async def conversion_cache(self) -> Optional[ConversionCache]:
+        """Return the shared cache of conversion results, if caching is enabled."""
+        if not self.__stack:
+            raise RuntimeError('ResourceManager is not open')
+
+        if not self.__config.conversion_cache_enabled:
+            return None
+
+        if not self.__conversion_cache:
+            self.__conversion_cache = ConversionCache(
+                self.__config.conversion_cache_size,
+                self.__config.conversion_cache_ttl,
+                self.__config.conversion_cache_path
+            )
+
+        return self.__conversion_cache
+
+    async def converter_executor(self) -> Optional[ConverterExecutor]:
+        """Return the shared executor for CPU-bound conversions, if process pools are enabled."""
+        if not self.__stack:
+            raise RuntimeError('ResourceManager is not open')
+
+        if not self.__process_pool:
+            return None
+
+        assert self.__converter_executor_lock is not None
+        # Starting the pool awaits, so without the lock concurrent callers could each start a pool of their own.
+        async with self.__converter_executor_lock:
+            if not self.__converter_executor:
+                self.__converter_executor = await self.__stack.enter_async_context(
+                    ProcessPoolConverterExecutor(self.__config.concurrency)
+                )
+
+        return self.__converter_executor
+
+    async def file_reader(self) -> CatalogFileReader:
+        """Return the shared reader for downloading catalog files."""
+        if not self.__stack:
+            raise RuntimeError('ResourceManager is not open')
+
+        if not self.__file_reader:
+            self.__file_reader = CatalogFileReader(self.__config.max_file_size)
+
+        return self.__file_reader
+
+    async def notification_deduplicator(self) -> Optional[NotificationDeduplicator]:
+        """Return the shared deduplicator of subscription notifications, if deduplication is enabled."""
+        if not self.__stack:
+            raise RuntimeError('ResourceManager is not open')
+
+        if not self.__config.notification_dedup_enabled:
+            return None
+
+        if not self.__notification_deduplicator:
+            self.__notification_deduplicator = NotificationDeduplicator()
+
+        return self.__notification_deduplicator
+
     async def nwstg_publisher(self) -> NwstgPublisher:
         if not self.__stack:
             raise RuntimeError('ResourceManager is not open')
@@ -138,9 +242,9 @@ class ResourceManager:
 
     @asynccontextmanager
     async def run_rpc_server(self, socket_path: Path) -> AsyncGenerator[RpcServer, None]:
-        converters = {k: await v.create(self) for k, v in CONVERTERS.items()}
+        converters = {k: await self.converter(k) for k in CONVERTERS}
         extractors = {k: await v.create(self) for k, v in EXTRACTORS.items()}
-        handlers = {k: await v.create(self) for k, v in HANDLERS.items() if v is not None}
+        handlers = {k: await self.handler(k) for k, v in HANDLERS.items() if v is not None}
 
         async with RpcServer(socket_path, converters, extractors, handlers) as rpc_server:
             yield rpc_server
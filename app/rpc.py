@@ -1,34 +1,191 @@
 from __future__ import annotations
 
 import asyncio
+import itertools
 import logging
 import os
 from pathlib import Path
-import pickle
 from types import TracebackType
-from typing import Any, Mapping, Optional, Sequence, Type
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Type
+import uuid
 
 import aio_msgpack_rpc
+from aio_msgpack_rpc.error import RPCResponseError
+from app.batch import Batch, BatchResult, DEFAULT_BATCH_CONCURRENCY
+from app.codec import (
+    decode_batch_results,
+    decode_conversion_input,
+    decode_conversion_result,
+    decode_identity,
+    decode_outcome,
+    decode_profile_report,
+    encode_batch_results,
+    encode_conversion_input,
+    encode_conversion_result,
+    encode_identity,
+    encode_outcome,
+    encode_profile_report
+)
 from app.converters import ConversionInput, ConversionResult, Converter
 from app.extractors import Extractor
 from app.handlers import SubscriptionNotificationHandler
+from app.profiling import MAX_PROFILE_DURATION, ProfileMode, ProfileReport, Profiler
 from ngitws.catalog import CatalogIdentity
 from ngitws.logging import track_correlation
-from ngitws.monitoring import Operation
+from ngitws.monitoring import Operation, report_operation
 from ngitws.typing import JsonObject
+import msgpack
+
+
+# The time in seconds a batch results request waits for results to complete.
+BATCH_POLL_TIMEOUT = 5
+# The time in seconds after which a batch whose results are not collected is cancelled.
+BATCH_IDLE_TIMEOUT = 300
+
+DEFAULT_RPC_MAX_IN_FLIGHT = 256
+DEFAULT_RPC_POOL_SIZE = 4
+# The approximate number of bytes of inputs sent in one batch request; larger batches are split.
+RPC_MAX_BATCH_SIZE = 64 * 1024 * 1024
+# Incoming messages may carry whole products, which can be up to the maximum file size of the daemon.
+RPC_MAX_BUFFER_SIZE = 1024 * 1024 * 1024
+RPC_MAX_MESSAGE_ID = 2 ** 32
+RPC_READ_SIZE = 256 * 1024
+# Message types of the msgpack-rpc protocol.
+RPC_REQUEST = 0
+RPC_RESPONSE = 1
+
+
+class RpcConnection:
+    """A msgpack-rpc connection that carries many concurrent requests.
+
+    Requests are written as soon as they are made and matched to their
+    responses by message ID, so a slow command does not hold up the others.
+    Callers wait once the number of requests in flight reaches the limit.
+    Closing the connection waits for the requests in flight to complete.
+
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, max_in_flight: int):
+        self.__closing = False
+        self.__ids = itertools.count()
+        self.__pending: Dict[int, asyncio.Future] = {}
+        self.__reader = reader
+        self.__receiver = asyncio.create_task(self.__receive())
+        self.__slots = asyncio.Semaphore(max_in_flight)
+        self.__writer = writer
+
+    @property
+    def closed(self) -> bool:
+        return self.__closing or self.__receiver.done()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self.__pending)
+
+    async def call(self, method: str, *args: Any) -> Any:
+        async with self.__slots:
+            if self.closed:
+                raise ConnectionError('RPC connection is closed')
+
+            message_id = next(self.__ids) % RPC_MAX_MESSAGE_ID
+            message = msgpack.packb([RPC_REQUEST, message_id, method, args], use_bin_type=True)
+            # The server drops messages it cannot buffer without answering, so they are never sent.
+            if len(message) > RPC_MAX_BUFFER_SIZE:
+                raise ValueError(f'RPC request of {len(message)} bytes is larger than {RPC_MAX_BUFFER_SIZE} bytes')
+
+            future = asyncio.get_running_loop().create_future()
+            self.__pending[message_id] = future
+            try:
+                self.__writer.write(message)
+                await self.__writer.drain()
+                return await future
+            finally:
+                self.__pending.pop(message_id, None)
+
+    async def close(self) -> None:
+        self.__closing = True
+        pending = list(self.__pending.values())
+        if pending:
+            await asyncio.wait(pending)
+
+        self.__receiver.cancel()
+        if self.__writer.transport.get_write_buffer_size():
+            # Requests cancelled before the server read them would otherwise hold up closing forever.
+            self.__writer.transport.abort()
+        else:
+            self.__writer.close()
+        try:
+            await self.__writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def __receive(self) -> None:
+        unpacker = msgpack.Unpacker(raw=False, max_buffer_size=RPC_MAX_BUFFER_SIZE)
+        error: BaseException = ConnectionError('RPC connection closed by the server')
+        try:
+            while True:
+                data = await self.__reader.read(RPC_READ_SIZE)
+                if not data:
+                    break
+                unpacker.feed(data)
+                for message_type, message_id, message_error, result in unpacker:
+                    future = self.__pending.get(message_id)
+                    if message_type != RPC_RESPONSE or future is None or future.done():
+                        continue
+                    if message_error is not None:
+                        future.set_exception(RPCResponseError(message_error))
+                    else:
+                        future.set_result(result)
+        except (ConnectionError, ValueError) as ex:
+            error = ex
+        finally:
+            for future in self.__pending.values():
+                if not future.done():
+                    future.set_exception(error)
 
 
 class RpcClient:
+    """Client for the daemon's RPC socket.
+
+    Concurrent calls share a small pool of connections.  A new connection is
+    only opened while every open one is busy, and calls beyond the limit of
+    requests in flight on every connection wait for one to complete.
+
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        pool_size: int = DEFAULT_RPC_POOL_SIZE,
+        max_in_flight: int = DEFAULT_RPC_MAX_IN_FLIGHT
+    ):
+        """Create a new client.
+
+        :param path: the path of the daemon's socket
+        :param pool_size: the number of connections opened at most
+        :param max_in_flight: the number of requests in flight on each connection at most
+
+        """
+        if pool_size < 1:
+            raise ValueError(f'Pool size must be at least one, not {pool_size}')
 
-    def __init__(self, path: Path):
-        self.__client: Optional[aio_msgpack_rpc.Client] = None
+        self.__closed = True
+        self.__connections: List[RpcConnection] = []
+        self.__lock = asyncio.Lock()
+        self.__max_in_flight = max_in_flight
         self.__path = path
+        self.__pool_size = pool_size
 
         self.__logger = logging.getLogger(__name__)
 
     async def __aenter__(self) -> RpcClient:
-        self.__logger.info(f'Connecting to RPC socket at {self.__path}')
-        self.__client = aio_msgpack_rpc.Client(*await asyncio.open_unix_connection(str(self.__path)))
+        if not self.__closed:
+            raise RuntimeError('RPC client is already open')
+
+        # The first connection is opened up front so that a missing daemon is reported here.
+        self.__connections.append(await self.__connect())
+        self.__closed = False
 
         return self
 
@@ -38,13 +195,25 @@ class RpcClient:
             exc_val: Optional[BaseException],
             exc_tb: Optional[TracebackType]
     ) -> None:
-        pass
+        await self.close()
 
-    async def call(self, command_name, *args, **kwargs) -> Any:
-        assert self.__client is not None
-        func_args = [pickle.dumps(arg) for arg in args]
-        func_kwargs = {pickle.dumps(k): pickle.dumps(v) for k, v in kwargs.items()}
-        return pickle.loads(await self.__client.call(command_name, *func_args, **func_kwargs))
+    @property
+    def connections(self) -> int:
+        """Return the number of connections open."""
+        return len([connection for connection in self.__connections if not connection.closed])
+
+    async def call(self, command_name: str, *args: Any) -> Any:
+        """Call a command with arguments that are already in their typed msgpack encoding."""
+        if self.__closed:
+            raise RuntimeError('RPC client is closed')
+
+        return await (await self.__acquire()).call(command_name, *args)
+
+    async def close(self) -> None:
+        """Stop accepting calls, wait for those in flight to complete and close every connection."""
+        self.__closed = True
+        connections, self.__connections = self.__connections, []
+        await asyncio.gather(*[connection.close() for connection in connections])
 
     async def list_converters(self) -> Mapping[str, str]:
         return await self.call('list_converters')
@@ -55,14 +224,115 @@ class RpcClient:
     async def list_handlers(self) -> Mapping[str, str]:
         return await self.call('list_handlers')
 
+    async def profile(
+        self,
+        duration: float,
+        mode: ProfileMode = ProfileMode.SAMPLING,
+        handler_name: Optional[str] = None
+    ) -> ProfileReport:
+        return decode_profile_report(await self.call('profile', duration, mode.value, handler_name))
+
     async def run_converter(self, converter_name: str, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
-        return await self.call('run_converter', converter_name, inputs)
+        """Run a converter on a single set of inputs."""
+        results = await self.call('run_converter', converter_name, [encode_conversion_input(i) for i in inputs])
+        return [decode_conversion_result(result) for result in results]
+
+    def run_converter_batch(
+        self,
+        converter_name: str,
+        batch: Sequence[Sequence[ConversionInput]],
+        *,
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY
+    ) -> AsyncIterator[BatchResult]:
+        """Run a converter on many sets of inputs in the daemon and yield the results as they complete.
+
+        Each result's index is the position of its inputs in the batch, and its value is the sequence of
+        conversion results, unless the conversion failed.  Batches whose inputs are larger than
+        RPC_MAX_BATCH_SIZE in total are sent in several requests, one after the other.
+
+        """
+        return self.__run_batch(
+            lambda results: [decode_conversion_result(result) for result in results],
+            'run_converter_batch',
+            converter_name,
+            [[encode_conversion_input(i) for i in inputs] for inputs in batch],
+            [sum(len(i.data) for i in inputs) for inputs in batch],
+            concurrency
+        )
 
     async def run_extractor(self, extractor_name: str, data: bytes) -> JsonObject:
         return await self.call('run_extractor', extractor_name, data)
 
+    def run_extractor_batch(
+        self,
+        extractor_name: str,
+        batch: Sequence[bytes],
+        *,
+        concurrency: int = DEFAULT_BATCH_CONCURRENCY
+    ) -> AsyncIterator[BatchResult]:
+        """Run an extractor on many files in the daemon and yield the results as they complete.
+
+        Batches larger than RPC_MAX_BATCH_SIZE in total are sent in several requests, one after the other.
+
+        """
+        return self.__run_batch(
+            lambda extracted: extracted,
+            'run_extractor_batch',
+            extractor_name,
+            list(batch),
+            [len(data) for data in batch],
+            concurrency
+        )
+
     async def run_handler(self, handler_name: str, identity: CatalogIdentity, operation: Operation) -> None:
-        return await self.call('run_handler', handler_name, identity, operation)
+        decode_outcome(await self.call('run_handler', handler_name, encode_identity(identity)), operation)
+
+    async def start_profile(self, mode: ProfileMode = ProfileMode.SAMPLING, handler_name: Optional[str] = None) -> None:
+        await self.call('start_profile', mode.value, handler_name)
+
+    async def stop_profile(self) -> ProfileReport:
+        return decode_profile_report(await self.call('stop_profile'))
+
+    async def __acquire(self) -> RpcConnection:
+        async with self.__lock:
+            self.__connections = [connection for connection in self.__connections if not connection.closed]
+            idle = [connection for connection in self.__connections if connection.in_flight == 0]
+            if idle:
+                return idle[0]
+            if len(self.__connections) < self.__pool_size:
+                connection = await self.__connect()
+                self.__connections.append(connection)
+                return connection
+
+        return min(self.__connections, key=lambda connection: connection.in_flight)
+
+    async def __connect(self) -> RpcConnection:
+        self.__logger.info(f'Connecting to RPC socket at {self.__path}')
+        reader, writer = await asyncio.open_unix_connection(str(self.__path))
+        return RpcConnection(reader, writer, self.__max_in_flight)
+
+    async def __run_batch(
+        self,
+        decode: Callable[[Any], Any],
+        command_name: str,
+        name: str,
+        items: Sequence[Any],
+        sizes: Sequence[int],
+        concurrency: int
+    ) -> AsyncIterator[BatchResult]:
+        offset = 0
+        for chunk in _split_batch(items, sizes, RPC_MAX_BATCH_SIZE):
+            batch_id = await self.call(command_name, name, chunk, concurrency)
+            finished = False
+            try:
+                while not finished:
+                    finished, results = decode_batch_results(await self.call('collect_batch', batch_id), decode)
+                    for result in results:
+                        yield result._replace(index=result.index + offset)
+            finally:
+                if not finished:
+                    await self.call('cancel_batch', batch_id)
+            offset += len(chunk)
 
 
 class RpcServer:
@@ -89,7 +359,12 @@ class RpcServer:
             extractors=self.__extractors,
             handlers=self.__handlers
         )
-        self.__server = await asyncio.start_unix_server(aio_msgpack_rpc.Server(commands), str(self.__path))
+        # The default unpacker refuses messages over 100 MiB, which batches and large products can exceed.
+        server = aio_msgpack_rpc.Server(
+            commands,
+            unpacker_factory=lambda: msgpack.Unpacker(raw=False, max_buffer_size=RPC_MAX_BUFFER_SIZE)
+        )
+        self.__server = await asyncio.start_unix_server(server, str(self.__path))
         await asyncio.get_running_loop().run_in_executor(None, os.chmod, self.__path, 0o660)
 
         return self
@@ -113,17 +388,6 @@ class RpcServer:
         if self.__server:
             await self.__server.wait_closed()
 
-    @staticmethod
-    def async_pickle(func):
-        async def wrapper(self, *args, **kwargs):
-            args = [pickle.loads(arg) for arg in args]
-            kwargs = {pickle.loads(k): pickle.loads(v) for k, v in kwargs.items()}
-            result = await func(self, *args, **kwargs)
-
-            return pickle.dumps(result)
-
-        return wrapper
-
 
 class RpcServerCommands:
 
@@ -133,26 +397,53 @@ class RpcServerCommands:
         extractors: Mapping[str, Extractor],
         handlers: Mapping[str, SubscriptionNotificationHandler]
     ):
+        self.__batches: Dict[str, Batch] = {}
         self.__converters = converters
         self.__extractors = extractors
         self.__handlers = handlers
+        self.__profiler = Profiler()
 
         self.__logger = logging.getLogger(__name__)
 
-    @RpcServer.async_pickle
+    async def cancel_batch(self, batch_id: str) -> None:
+        batch = self.__batches.pop(batch_id, None)
+        if batch is not None:
+            batch.cancel()
+
+    async def collect_batch(self, batch_id: str) -> List[Any]:
+        try:
+            batch = self.__batches[batch_id]
+        except KeyError:
+            raise RuntimeError(f'Could not find a batch with ID {batch_id}')
+
+        results = await batch.collect(BATCH_POLL_TIMEOUT)
+        if batch.finished:
+            del self.__batches[batch_id]
+
+        return encode_batch_results(batch.finished, results)
+
     async def list_converters(self) -> Mapping[str, str]:
         return {name: converter.description() for name, converter in self.__converters.items()}
 
-    @RpcServer.async_pickle
     async def list_extractors(self) -> Mapping[str, str]:
         return {name: extractor.description() for name, extractor in self.__extractors.items()}
 
-    @RpcServer.async_pickle
     async def list_handlers(self) -> Mapping[str, str]:
         return {name: handler.description() for name, handler in self.__handlers.items()}
 
-    @RpcServer.async_pickle
-    async def run_converter(self, converter_name: str, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
+    async def profile(self, duration: float, mode: str, handler_name: Optional[str]) -> List[Any]:
+        if not 0 < duration <= MAX_PROFILE_DURATION:
+            raise RuntimeError(f'Profile duration must be between 0 and {MAX_PROFILE_DURATION} seconds')
+
+        self.__start_profile(mode, handler_name)
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            report = self.__profiler.stop()
+
+        return encode_profile_report(report)
+
+    async def run_converter(self, converter_name: str, inputs: Sequence[Sequence[Any]]) -> List[List[Any]]:
         try:
             converter = self.__converters[converter_name]
         except KeyError:
@@ -160,12 +451,31 @@ class RpcServerCommands:
 
         with track_correlation():
             try:
-                return await converter.convert(inputs)
+                results = await converter.convert([decode_conversion_input(i) for i in inputs])
             except Exception as ex:
                 self.__logger.exception(f'Unexpected error in converter {converter_name}: {str(ex)}')
                 raise
 
-    @RpcServer.async_pickle
+        return [encode_conversion_result(result) for result in results]
+
+    async def run_converter_batch(
+        self,
+        converter_name: str,
+        batch: Sequence[Sequence[Sequence[Any]]],
+        concurrency: int
+    ) -> str:
+        try:
+            converter = self.__converters[converter_name]
+        except KeyError:
+            raise RuntimeError(f'Could not find an converter of type {converter_name}')
+
+        async def convert(inputs: Sequence[Sequence[Any]]) -> List[List[Any]]:
+            with track_correlation():
+                results = await converter.convert([decode_conversion_input(i) for i in inputs])
+            return [encode_conversion_result(result) for result in results]
+
+        return self.__start_batch(Batch(convert, batch, concurrency))
+
     async def run_extractor(self, extractor_name: str, data: bytes) -> JsonObject:
         try:
             extractor = self.__extractors[extractor_name]
@@ -179,16 +489,75 @@ class RpcServerCommands:
                 self.__logger.exception(f'Unexpected error in extractor {extractor_name}: {str(ex)}')
                 raise
 
-    @RpcServer.async_pickle
-    async def run_handler(self, handler_name: str, identity: CatalogIdentity, operation: Operation) -> None:
+    async def run_extractor_batch(self, extractor_name: str, batch: Sequence[bytes], concurrency: int) -> str:
+        try:
+            extractor = self.__extractors[extractor_name]
+        except KeyError:
+            raise RuntimeError(f'Could not find an extractor of type {extractor_name}')
+
+        async def extract(data: bytes) -> JsonObject:
+            with track_correlation():
+                return await extractor.extract(data)
+
+        return self.__start_batch(Batch(extract, batch, concurrency))
+
+    async def run_handler(self, handler_name: str, identity: Sequence[Any]) -> List[Any]:
         try:
             handler = self.__handlers[handler_name]
         except KeyError:
             raise RuntimeError(f'Could not find an handler of type {handler_name}')
 
-        with track_correlation():
+        with track_correlation(), report_operation('run') as operation:
             try:
-                return await handler.run(identity, operation)
+                # Runs requested over RPC are deliberate, so they are never collapsed into a notification.
+                await handler.run(decode_identity(identity), operation, deduplicate=False)
             except Exception as ex:
                 self.__logger.exception(f'Unexpected error in handler {handler_name}: {str(ex)}')
                 raise
+
+            return encode_outcome(operation)
+
+    async def start_profile(self, mode: str, handler_name: Optional[str]) -> None:
+        self.__start_profile(mode, handler_name)
+
+    async def stop_profile(self) -> List[Any]:
+        return encode_profile_report(self.__profiler.stop())
+
+    def __start_batch(self, batch: Batch) -> str:
+        # Batches abandoned by clients that went away are dropped when the next one starts.
+        for batch_id, idle_batch in list(self.__batches.items()):
+            if idle_batch.idle > BATCH_IDLE_TIMEOUT:
+                self.__logger.warning(f'Cancelling batch {batch_id}; results not collected')
+                self.__batches.pop(batch_id).cancel()
+
+        batch_id = uuid.uuid4().hex
+        self.__batches[batch_id] = batch
+
+        return batch_id
+
+    def __start_profile(self, mode: str, handler_name: Optional[str]) -> None:
+        handler_class_name = None
+        if handler_name is not None:
+            try:
+                handler_class_name = type(self.__handlers[handler_name]).__name__
+            except KeyError:
+                raise RuntimeError(f'Could not find an handler of type {handler_name}')
+
+        self.__logger.info(f'Starting {mode} profiling session')
+        self.__profiler.start(ProfileMode(mode), handler_class_name)
+
+
+def _split_batch(items: Sequence[Any], sizes: Sequence[int], max_size: int) -> Iterator[List[Any]]:
+    """Split items into consecutive chunks whose sizes add up to at most the maximum, except for single large items."""
+    chunk: List[Any] = []
+    chunk_size = 0
+    for item, size in zip(items, sizes):
+        if chunk and chunk_size + size > max_size:
+            yield chunk
+            chunk = []
+            chunk_size = 0
+        chunk.append(item)
+        chunk_size += size
+
+    if chunk:
+        yield chunk
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from enum import IntEnum
+import itertools
+from typing import AsyncIterator, List, Tuple
+
+
+class HandlerPriority(IntEnum):
+    """Scheduling priority of a subscription handler."""
+
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
+
+
+class HandlerScheduler:
+    """Daemon-wide limit on the number of handler runs in flight.
+
+    Waiting runs are admitted highest priority first, and in arrival order
+    within a priority.  A number of slots can be reserved so that low priority
+    handlers never occupy the full capacity, leaving room for latency-sensitive
+    handlers even while a low priority subscription is flooded.
+
+    """
+
+    def __init__(self, capacity: int, reserved: int = 0):
+        if capacity < 1:
+            raise ValueError(f'Scheduler capacity must be at least one, not {capacity}')
+        if not 0 <= reserved < capacity:
+            raise ValueError(f'Reserved slots must be between zero and {capacity - 1}, not {reserved}')
+
+        self.__capacity = capacity
+        self.__counter = itertools.count()
+        self.__in_flight = 0
+        self.__reserved = reserved
+        self.__waiters: List[Tuple[int, int, HandlerPriority, asyncio.Future]] = []
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    @property
+    def in_flight(self) -> int:
+        return self.__in_flight
+
+    @property
+    def reserved(self) -> int:
+        return self.__reserved
+
+    @property
+    def waiting(self) -> int:
+        return len(self.__waiters)
+
+    @asynccontextmanager
+    async def slot(self, priority: HandlerPriority = HandlerPriority.NORMAL) -> AsyncIterator[None]:
+        """Wait for and hold a slot for the duration of the context."""
+        await self.__acquire(priority)
+        try:
+            yield
+        finally:
+            self.__release()
+
+    async def __acquire(self, priority: HandlerPriority) -> None:
+        if not self.__waiters and self.__can_admit(priority):
+            self.__in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self.__waiters.append((-priority, next(self.__counter), priority, future))
+        self.__waiters.sort(key=lambda waiter: waiter[:2])
+        # Queued low priority runs may be held back by the reserve while this one can still be admitted.
+        self.__wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as the waiter was cancelled, so hand it to someone else.
+                self.__release()
+            else:
+                self.__waiters = [waiter for waiter in self.__waiters if waiter[3] is not future]
+            raise
+
+    def __can_admit(self, priority: HandlerPriority) -> bool:
+        if priority <= HandlerPriority.LOW:
+            return self.__in_flight < self.__capacity - self.__reserved
+        return self.__in_flight < self.__capacity
+
+    def __release(self) -> None:
+        self.__in_flight -= 1
+        self.__wake()
+
+    def __wake(self) -> None:
+        # Waiters are sorted by priority, so once one cannot be admitted none of the rest can either.
+        while self.__waiters:
+            priority, future = self.__waiters[0][2:]
+            if future.done():
+                self.__waiters.pop(0)
+            elif self.__can_admit(priority):
+                self.__waiters.pop(0)
+                self.__in_flight += 1
+                future.set_result(None)
+            else:
+                break
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import bisect
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+import time
+from types import TracebackType
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Type
+
+
+# Upper bounds in seconds of the histogram buckets, before the implicit unbounded one.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current_timer: ContextVar[Optional[StageTimer]] = ContextVar('current_timer', default=None)
+
+
+class LatencyHistogram:
+    """Histogram of durations in fixed buckets, in the style of a Prometheus histogram."""
+
+    __slots__ = ('__bounds', '__counts', '__sum')
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        if list(buckets) != sorted(set(buckets)):
+            raise ValueError('Histogram buckets must be distinct and in increasing order')
+
+        self.__bounds = tuple(buckets)
+        self.__counts = [0] * (len(buckets) + 1)
+        self.__sum = 0.0
+
+    @property
+    def bounds(self) -> Sequence[float]:
+        return self.__bounds
+
+    @property
+    def count(self) -> int:
+        return sum(self.__counts)
+
+    @property
+    def sum(self) -> float:
+        return self.__sum
+
+    def cumulative_counts(self) -> Sequence[int]:
+        """Return the number of durations up to each bound, ending with the total."""
+        counts: List[int] = []
+        total = 0
+        for count in self.__counts:
+            total += count
+            counts.append(total)
+        return counts
+
+    def observe(self, seconds: float) -> None:
+        self.__counts[bisect.bisect_left(self.__bounds, seconds)] += 1
+        self.__sum += seconds
+
+
+class StageLatencies:
+    """Histograms of stage durations across every run of each handler."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.__buckets = tuple(buckets)
+        self.__histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+
+    def histograms(self) -> Mapping[Tuple[str, str], LatencyHistogram]:
+        """Return the histogram of each handler and stage observed so far."""
+        return dict(self.__histograms)
+
+    def observe(self, handler: str, stage: str, seconds: float) -> None:
+        histogram = self.__histograms.get((handler, stage))
+        if histogram is None:
+            histogram = self.__histograms[handler, stage] = LatencyHistogram(self.__buckets)
+        histogram.observe(seconds)
+
+
+class StageTimer:
+    """Durations of the stages of a single handler run.
+
+    While the timer is entered, stage() records into it from anywhere in the
+    same context, including tasks started from it, so stages can be timed
+    deep inside a handler without passing the timer around.  A stage entered
+    more than once, such as for each part of a collective, adds up.
+
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.__clock = clock
+        self.__durations: Dict[str, float] = {}
+        self.__token: Optional[Token] = None
+
+    def __enter__(self) -> StageTimer:
+        if self.__token is not None:
+            raise RuntimeError('Stage timer is already active')
+        self.__token = _current_timer.set(self)
+
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType]
+    ) -> None:
+        if self.__token is not None:
+            _current_timer.reset(self.__token)
+            self.__token = None
+
+    @property
+    def durations(self) -> Mapping[str, float]:
+        """Return the total time in seconds spent in each stage."""
+        return dict(self.__durations)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.__durations[name] = self.__durations.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the body as the named stage."""
+        start = self.__clock()
+        try:
+            yield
+        finally:
+            self.add(name, self.__clock() - start)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the body as the named stage of the active timer, if there is one."""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+
+    with timer.stage(name):
+        yield
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import functools
+import io
+import itertools
 import logging
 import re
-from typing import Any, Dict, Mapping, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 from ngitws.logging import extra_fields
 from ngitws.time import DateTimeConverter
@@ -82,6 +85,51 @@ VAR_INDEX_MAP = {
 }
 
 
+# Fields holding numbers, which are converted to floats once per distinct value when creating observations in bulk.
+FLOAT_FIELDS = frozenset([
+    'dewpoint',
+    'altimeter',
+    'seaLevelPressure',
+    'temperature',
+    'windDir',
+    'windSpeed',
+    'visibility',
+    'elevation',
+    'latitude',
+    'longitude',
+    'precipitationLastHour',
+    'precipitationLast3Hours',
+    'precipitationLast6Hours',
+    'windGust',
+    'maxTemp24Hour',
+    'minTemp24Hour',
+    'skyLayerBase_1',
+    'skyLayerBase_2',
+    'skyLayerBase_3',
+    'skyLayerBase_4',
+    'skyLayerBase_5',
+    'skyLayerBase_6'
+])
+
+# Number of columns a complete MADIS CSV line has, one more than the highest index in VAR_INDEX_MAP.
+MIN_COLUMN_COUNT = max(VAR_INDEX_MAP) + 1
+
+COLUMN_INDEX_MAP = {name: index for index, name in VAR_INDEX_MAP.items()}
+
+_DATA_PROVIDER = COLUMN_INDEX_MAP['dataProvider']
+_ELEVATION = COLUMN_INDEX_MAP['elevation']
+_HOURS_MINUTES = COLUMN_INDEX_MAP['hoursMinutes']
+_LATITUDE = COLUMN_INDEX_MAP['latitude']
+_LONGITUDE = COLUMN_INDEX_MAP['longitude']
+_MONTH_DAY_YEAR = COLUMN_INDEX_MAP['monthDayYear']
+_PRESENT_WEATHER = COLUMN_INDEX_MAP['presentWeather']
+_RAW_MESSAGE = COLUMN_INDEX_MAP['rawMessage']
+_SKY_COVER = tuple(COLUMN_INDEX_MAP[f'skyCover_{i}'] for i in range(1, 7))
+_SKY_LAYER_BASE = tuple(COLUMN_INDEX_MAP[f'skyLayerBase_{i}'] for i in range(1, 7))
+_STATION_ID = COLUMN_INDEX_MAP['stationId']
+_SUB_PROVIDER = COLUMN_INDEX_MAP['subProvider']
+
+
 class InvalidMadisCsvLineError(RuntimeError):
     """MADIS CSV line is malformed."""
 
@@ -89,6 +137,11 @@ class InvalidMadisCsvLineError(RuntimeError):
 class MadisObservationGenerator:
     """Metadata extractor for MADIS CSV products."""
 
+    DEFAULT_BATCH_SIZE = 1000
+
+    # Upper bound on the number of distinct values remembered between batches by create_observations().
+    MAX_CACHED_VALUES = 100000
+
     MISSING_VALUES_PATTERN = re.compile(r'^-99999.000000|999999.000000|^\s*$')
 
     # If METAR data providers are added to the madis-csv-pull script, they must also be added here to prevent METAR
@@ -96,30 +149,98 @@ class MadisObservationGenerator:
     METAR_DATA_PROVIDERS = ['ASOS', 'OTHER-MTR', 'NonFedAWOS']
 
     def __init__(self):
+        self.__timestamp_codec = MadisTimestampCodec()
+
         self.__logger = logging.getLogger(__name__)
 
+    @property
+    def timestamp_codec(self) -> MadisTimestampCodec:
+        return self.__timestamp_codec
+
     def create_observation(self, madis_csv: str) -> MadisObservation:
-        obs_values: Dict[str, Any] = {}
         csv_values = madis_csv.split(',')
         # There should really be 57 variables here, but for some reason we seem to be getting an extra consistently
         if len(csv_values) not in (57, 58):
             self.__logger.warning(f'CSV input has: {len(csv_values)} columns, 57 or 58 expected')
 
-        for i, value in enumerate(csv_values):
-            # Discard values in the input that have no associated key in the varIndexMap
-            if i in VAR_INDEX_MAP:
-                # Filter missing values indicated by -9999 and white space; set the output value to None
-                if not self.MISSING_VALUES_PATTERN.match(value):
-                    obs_values[VAR_INDEX_MAP[i]] = value.strip()
-                else:
-                    obs_values[VAR_INDEX_MAP[i]] = None
+        # Columns missing from a short line are treated like missing values.
+        values: List[Any] = [None] * MIN_COLUMN_COUNT
+        for index, value in enumerate(csv_values[:MIN_COLUMN_COUNT]):
+            values[index] = self.__clean_value(value)
+
+        return self.__build_observation(values, madis_csv)
+
+    def create_observations(
+        self,
+        madis_csv: Union[str, Iterable[str]],
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Iterator[Union[MadisObservation, InvalidMadisCsvLineError]]:
+        """Lazily create an observation for each line of a MADIS CSV payload.
+
+        The payload is either the whole text or an iterable of its lines.
+
+        Lines are parsed a batch at a time and column by column, so each
+        distinct value in a column is cleaned and converted to a float only
+        once, and each distinct observation time is parsed only once.  Blank
+        lines are skipped, and an invalid line yields its error in place of an
+        observation so the remaining lines are still processed.
+
+        """
+        values: Dict[str, Optional[str]] = {}
+        floats: Dict[str, Any] = {}
+
+        if isinstance(madis_csv, str):
+            madis_csv = io.StringIO(madis_csv)
+        lines = (line.rstrip('\r\n') for line in madis_csv)
+        lines = (line for line in lines if line.strip())
+        while True:
+            batch = list(itertools.islice(lines, batch_size))
+            if not batch:
+                return
+
+            for cache in (values, floats):
+                if len(cache) > self.MAX_CACHED_VALUES:
+                    cache.clear()
+
+            yield from self.__create_batch(batch, values, floats)
+
+    def __create_batch(
+        self,
+        lines: Sequence[str],
+        values: Dict[str, Optional[str]],
+        floats: Dict[str, Any]
+    ) -> Iterator[Union[MadisObservation, InvalidMadisCsvLineError]]:
+        rows = [line.split(',') for line in lines]
+        complete_rows = [row for row in rows if len(row) >= MIN_COLUMN_COUNT]
+
+        # Clean and convert each column in one pass over the batch, writing the results back into the rows.
+        for index, name in VAR_INDEX_MAP.items():
+            column = _memoize(self.__clean_value, values, [row[index] for row in complete_rows])
+            if name in FLOAT_FIELDS:
+                column = _memoize(_convert_float_value, floats, column)
+            for row, value in zip(complete_rows, column):
+                row[index] = value
+
+        for line, row in zip(lines, rows):
+            try:
+                if len(row) < MIN_COLUMN_COUNT:
+                    yield self.create_observation(line)
+                    continue
+
+                if len(row) != 58 and len(row) != 57:
+                    self.__logger.warning(f'CSV input has: {len(row)} columns, 57 or 58 expected')
 
-        station_id = obs_values.get('stationId')
+                yield self.__build_observation(row, line)
+            except InvalidMadisCsvLineError as ex:
+                yield ex
+
+    def __build_observation(self, values: List[Any], madis_csv: str) -> MadisObservation:
+        station_id = values[_STATION_ID]
         if not station_id:
             raise InvalidMadisCsvLineError(f'MADIS observation has no station ID: {madis_csv}')
 
         with extra_fields({'station_id': station_id}):
-            if 'monthDayYear' not in obs_values or 'hoursMinutes' not in obs_values:
+            if values[_MONTH_DAY_YEAR] is None or values[_HOURS_MINUTES] is None:
                 raise InvalidMadisCsvLineError(
                     f'MADIS observation from {station_id} has missing observation time fields: {madis_csv}'
                 )
@@ -127,258 +248,278 @@ class MadisObservationGenerator:
             # Each record must have a data provider, latitude, longitude, and elevation or it will be skipped.
             # This protects against records that may be in the process of qc and not all the values are present,
             # but will have them in a subsequent data pull.
-            data_provider = obs_values.get('dataProvider')
+            data_provider = values[_DATA_PROVIDER]
             if data_provider is None:
                 raise InvalidMadisCsvLineError(
                     f'MADIS observation from {station_id} has missing data provider: {madis_csv}'
                 )
-            if obs_values.get('latitude') is None:
+            if values[_LATITUDE] is None:
                 raise InvalidMadisCsvLineError(
                     f'MADIS observation from {station_id} has missing latitude: {madis_csv}'
                 )
-            if obs_values.get('longitude') is None:
+            if values[_LONGITUDE] is None:
                 raise InvalidMadisCsvLineError(
                     f'MADIS observation from {station_id} has missing longitude: {madis_csv}'
                 )
-            if obs_values.get('elevation') is None:
+            if values[_ELEVATION] is None:
                 raise InvalidMadisCsvLineError(
                     f'MADIS observation from {station_id} has missing elevation: {madis_csv}'
                 )
 
+            try:
+                timestamp: Optional[MadisTimestamp] = self.__timestamp_codec.decode(
+                    values[_MONTH_DAY_YEAR],
+                    values[_HOURS_MINUTES]
+                )
+            except Exception:
+                # Leave the observation to parse it again and report the error in context.
+                timestamp = None
+
             try:
                 # See note for METAR_DATA_PROVIDERS above about adding additional MADIS data providers.
                 if data_provider in self.METAR_DATA_PROVIDERS:
-                    return MetarObservation(obs_values)
+                    return MetarObservation(values, timestamp)
                 if data_provider == 'MARITIME':
-                    return MaritimeObservation(obs_values)
-                return MesonetObservation(obs_values)
+                    return MaritimeObservation(values, timestamp)
+                return MesonetObservation(values, timestamp)
             except Exception as ex:
                 raise InvalidMadisCsvLineError(f'Failed to parse MADIS observation ({str(ex)}: {madis_csv}', ex)
 
+    def __clean_value(self, value: str) -> Optional[str]:
+        # Filter missing values indicated by -9999 and white space; set the output value to None
+        if self.MISSING_VALUES_PATTERN.match(value):
+            return None
+        return value.strip()
+
+
+class MadisTimestamp(NamedTuple):
+    """MADIS observation time along with its catalog representations."""
+
+    datetime: pendulum.DateTime
+    iso: str
+    epoch_millis: int
+
+    @classmethod
+    def parse(cls, month_day_year: Optional[str], hours_minutes: Optional[str]) -> MadisTimestamp:
+        timestamp = pendulum.from_format(f'{month_day_year} {hours_minutes}', 'MM/DD/YYYY HH:mm', tz='UTC')
+
+        return cls(timestamp, DateTimeConverter().write_as_string(timestamp), int(timestamp.format('x')))
+
+
+class MadisTimestampCodec:
+    """Bounded LRU cache of parsed and formatted MADIS observation times.
+
+    A MADIS pull only contains a handful of distinct minutes, so parsing and
+    formatting each of them once serves every observation in the pull.
+
+    """
+
+    DEFAULT_MAX_SIZE = 1024
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        self.__decode = functools.lru_cache(maxsize=max_size)(MadisTimestamp.parse)
+
+    @property
+    def hits(self) -> int:
+        return self.__decode.cache_info().hits
+
+    @property
+    def misses(self) -> int:
+        return self.__decode.cache_info().misses
+
+    def clear(self) -> None:
+        self.__decode.cache_clear()
+
+    def decode(self, month_day_year: str, hours_minutes: str) -> MadisTimestamp:
+        """Return the observation time for the MADIS date and time fields."""
+        return self.__decode(month_day_year, hours_minutes)
+
 
 class MadisObservation:
+    """Observation from a single MADIS CSV line.
+
+    Observations are backed directly by the cleaned values of the line,
+    indexed as in VAR_INDEX_MAP, and build the catalog JSON from them only
+    when serialized.
+
+    """
+
+    __slots__ = ('_timestamp', '_values')
 
     FEED: str
 
+    VARIABLES: Tuple[Tuple[str, MadisVariable], ...] = ()
+
+    # Columns holding numbers outside of VARIABLES, converted to floats when the observation is created.
+    FLOAT_COLUMNS: Tuple[int, ...] = (_LATITUDE, _LONGITUDE)
+
+    def __init__(self, values: List[Any], timestamp: Optional[MadisTimestamp] = None):
+        """Create a new observation.
+
+        :param values: the cleaned values of the line, which are converted in place
+        :param timestamp: the observation time, or None to parse it from the values
+
+        """
+        if timestamp is None:
+            month_day_year = values[_MONTH_DAY_YEAR]
+            hours_minutes = values[_HOURS_MINUTES]
+            try:
+                timestamp = MadisTimestamp.parse(month_day_year, hours_minutes)
+            except Exception as ex:
+                raise RuntimeError(
+                    f'Cannot parse observation time "{month_day_year} {hours_minutes}": {str(ex)}',
+                    ex
+                )
+
+        convert_float = self._convert_float
+        for index in self.FLOAT_COLUMNS:
+            values[index] = convert_float(values[index])
+        for _, variable in self.VARIABLES:
+            values[variable.index] = convert_float(values[variable.index])
+
+        self._timestamp = timestamp
+        self._values = values
+
     def as_dict(self) -> JsonObject:
-        return {
+        values = self._values
+        result = {
             'feed': self.FEED,
-            'timestamp': DateTimeConverter().write_as_string(self.__timestamp),
-            'observationTime': int(self.__timestamp.format('x')),
-            'stationId': self.__stationId,
+            'timestamp': self._timestamp.iso,
+            'observationTime': self._timestamp.epoch_millis,
+            'stationId': values[_STATION_ID],
             'geometry': {
                 'type': 'Point',
-                'coordinates': [self.__longitude, self.__latitude]
+                'coordinates': [values[_LONGITUDE], values[_LATITUDE]]
             },
-            'dataProvider': self.__dataProvider,
-            'subProvider': self.__subProvider,
-            'dewpoint': self.__dewpoint.as_dict(),
-            'elevation': self.__elevation.as_dict(),
-            'seaLevelPressure': self.__seaLevelPressure.as_dict(),
-            'altimeter': self.__altimeter.as_dict(),
-            'temperature': self.__temperature.as_dict(),
-            'windDir': self.__windDir.as_dict(),
-            'windSpeed': self.__windSpeed.as_dict(),
-            'windGust': self.__windGust.as_dict(),
-            'visibility': self.__visibility.as_dict(),
-            'presentWeather': self.__presentWeather
+            'dataProvider': values[_DATA_PROVIDER],
+            'subProvider': values[_SUB_PROVIDER],
+            'presentWeather': values[_PRESENT_WEATHER]
         }
+        for name, variable in self.VARIABLES:
+            result[name] = variable.as_dict(values)
 
-    def __init__(self, obs_values: Mapping[str, str]):
-        self.__dataProvider = obs_values.get('dataProvider')
-        self.__subProvider = obs_values.get('subProvider')
-        self.__stationId = obs_values.get('stationId')
-
-        self.__logger = logging.getLogger(__name__)
-
-        obs_time = f'{obs_values.get("monthDayYear")} {obs_values.get("hoursMinutes")}'
-        try:
-            self.__timestamp = pendulum.from_format(obs_time, 'MM/DD/YYYY HH:mm', tz='UTC')
-        except Exception as ex:
-            month_day_year = obs_values.get('monthDayYear')
-            hours_minutes = obs_values.get('hoursMinutes')
-            raise RuntimeError(
-                f'Cannot parse observation time "{month_day_year} {hours_minutes}": {str(ex)}',
-                ex
-            )
-
-        self.__dewpoint = MadisVariable(
-            self._convert_float(obs_values.get('dewpoint')),
-            'kelvin',
-            obs_values.get('dewpoint_qc')
-        )
-        self.__elevation = MadisVariable(
-            self._convert_float(obs_values.get('elevation')),
-            'meter',
-            obs_values.get('elevation_qc')
-        )
-        self.__seaLevelPressure = MadisVariable(
-            self._convert_float(obs_values.get('seaLevelPressure')),
-            'pascal',
-            obs_values.get('seaLevelPressure_qc')
-        )
-        self.__altimeter = MadisVariable(
-            self._convert_float(obs_values.get('altimeter')),
-            'pascal',
-            obs_values.get('altimeter_qc')
-        )
-        self.__longitude = self._convert_float(obs_values.get('longitude'))
-        self.__latitude = self._convert_float(obs_values.get('latitude'))
-        self.__temperature = MadisVariable(
-            self._convert_float(obs_values.get('temperature')),
-            'kelvin',
-            obs_values.get('temperature_qc')
-        )
-        self.__windDir = MadisVariable(
-            self._convert_float(obs_values.get('windDir')),
-            'degree',
-            obs_values.get('windDir_qc')
-        )
-        self.__windSpeed = MadisVariable(
-            self._convert_float(obs_values.get('windSpeed')),
-            'meter/sec',
-            obs_values.get('windSpeed_qc')
-        )
-        self.__windGust = MadisVariable(
-            self._convert_float(obs_values.get('windGust')),
-            'meter/sec',
-            obs_values.get('windGust_qc')
-        )
-        self.__visibility = MadisVariable(
-            self._convert_float(obs_values.get('visibility')),
-            'meter',
-            obs_values.get('visibility_qc')
-        )
-        self.__presentWeather = obs_values.get('presentWeather')
+        return result
 
     @staticmethod
-    def _convert_float(value: Optional[str]) -> Optional[float]:
-        if value is None:
-            return None
+    def _convert_float(value: Union[str, float, None]) -> Optional[float]:
+        # Values created in bulk have already been converted.
+        if value is None or isinstance(value, float):
+            return value
         return round(float(value), 2)
 
 
-class MaritimeObservation(MadisObservation):
+class MadisVariable:
+    """Measured variable of a MADIS observation, with its unit and quality control flag."""
 
-    FEED = 'MADIS_MARITIME'
+    __slots__ = ('index', 'qc_index', 'unit')
 
-    def __init__(self, obs_values: Mapping[str, str]):
-        super().__init__(obs_values)
+    def __init__(self, field: str, unit: str, qc: bool = True):
+        """Create a new variable.
 
-        self.__precipitation_last_hour = MadisVariable(
-            self._convert_float(obs_values.get('precipitationLastHour')),
-            'meter',
-            obs_values.get('precipitationLastHour_qc')
-        )
-        self.__precipitation_last_6_hours = MadisVariable(
-            self._convert_float(obs_values.get('precipitationLast6Hours')),
-            'meter',
-            obs_values.get('precipitationLast6Hours_qc')
-        )
+        :param field: the name of the value field in VAR_INDEX_MAP
+        :param unit: the unit of the value
+        :param qc: whether the value field is followed by a quality control field
 
-    def as_dict(self) -> JsonObject:
-        return {**super().as_dict(), **{
-            'precipitationLastHour': self.__precipitation_last_hour.as_dict(),
-            'precipitationLast6Hours': self.__precipitation_last_6_hours.as_dict()
-        }}
+        """
+        self.index = COLUMN_INDEX_MAP[field]
+        self.qc_index = COLUMN_INDEX_MAP[f'{field}_qc'] if qc else None
+        self.unit = unit
+
+    def as_dict(self, values: Sequence[Any]) -> JsonObject:
+        return {
+            'value': values[self.index],
+            'unit': self.unit,
+            'qc': values[self.qc_index] if self.qc_index is not None else None
+        }
+
+
+_COMMON_VARIABLES = (
+    ('dewpoint', MadisVariable('dewpoint', 'kelvin')),
+    ('elevation', MadisVariable('elevation', 'meter')),
+    ('seaLevelPressure', MadisVariable('seaLevelPressure', 'pascal')),
+    ('altimeter', MadisVariable('altimeter', 'pascal')),
+    ('temperature', MadisVariable('temperature', 'kelvin')),
+    ('windDir', MadisVariable('windDir', 'degree')),
+    ('windSpeed', MadisVariable('windSpeed', 'meter/sec')),
+    ('windGust', MadisVariable('windGust', 'meter/sec')),
+    ('visibility', MadisVariable('visibility', 'meter'))
+)
+
+
+class MaritimeObservation(MadisObservation):
+
+    __slots__ = ()
+
+    FEED = 'MADIS_MARITIME'
+
+    VARIABLES = _COMMON_VARIABLES + (
+        ('precipitationLastHour', MadisVariable('precipitationLastHour', 'meter')),
+        ('precipitationLast6Hours', MadisVariable('precipitationLast6Hours', 'meter'))
+    )
 
 
 class MesonetObservation(MadisObservation):
 
+    __slots__ = ()
+
     FEED = 'MADIS_MESONET'
 
-    def __init__(self, obs_values: Mapping[str, str]):
-        super().__init__(obs_values)
-
-        self.__max_temp_24_hours = MadisVariable(
-            self._convert_float(obs_values.get('maxTemp24Hour')),
-            'kelvin',
-            obs_values.get('maxTemp24Hour_qc')
-        )
-        self.__min_temp_24_hours = MadisVariable(
-            self._convert_float(obs_values.get('minTemp24Hour')),
-            'kelvin',
-            obs_values.get('minTemp24Hour_qc')
-        )
-        self.__precipitation_last_3_hours = MadisVariable(
-            self._convert_float(obs_values.get('precipitationLast3Hours')),
-            'meter',
-            obs_values.get('precipitationLast3Hours_qc')
-        )
-        self.__sky_cover = [obs_values.get(f'skyCover_{i}') for i in range(1, 7)]
-        self.__sky_layer_base = [self._convert_float(obs_values.get(f'skyLayerBase_{i}')) for i in range(1, 7)]
+    VARIABLES = _COMMON_VARIABLES + (
+        ('maxTemp24Hour', MadisVariable('maxTemp24Hour', 'kelvin')),
+        ('minTemp24Hour', MadisVariable('minTemp24Hour', 'kelvin')),
+        ('precipitationLast3Hours', MadisVariable('precipitationLast3Hours', 'meter'))
+    )
+
+    FLOAT_COLUMNS = MadisObservation.FLOAT_COLUMNS + _SKY_LAYER_BASE
 
     def as_dict(self) -> JsonObject:
-        return {**super().as_dict(), **{
-            'maxTemp24Hour': self.__max_temp_24_hours.as_dict(),
-            'minTemp24Hour': self.__min_temp_24_hours.as_dict(),
-            'precipitationLast3Hours': self.__precipitation_last_3_hours.as_dict(),
-            'skyCover': self.__sky_cover,
-            'skyLayerBase': self.__sky_layer_base,
-            'skyLayerBaseUnit': 'meter'
-        }}
+        values = self._values
+        result = super().as_dict()
+        result['skyCover'] = [values[index] for index in _SKY_COVER]
+        result['skyLayerBase'] = [values[index] for index in _SKY_LAYER_BASE]
+        result['skyLayerBaseUnit'] = 'meter'
+
+        return result
 
 
 class MetarObservation(MadisObservation):
 
+    __slots__ = ()
+
     FEED = 'MADIS_METAR'
 
-    def __init__(self, obs_values: Mapping[str, str]):
-        super().__init__(obs_values)
-
-        self.__max_temp_24_hour = MadisVariable(
-            self._convert_float(obs_values.get('maxTemp24Hour')),
-            'kelvin',
-            obs_values.get('maxTemp24Hour_qc')
-        )
-        self.__min_temp_24_hour = MadisVariable(
-            self._convert_float(obs_values.get('minTemp24Hour')),
-            'kelvin',
-            obs_values.get('minTemp24Hour_qc')
-        )
-        self.__precipitation_last_hour = MadisVariable(
-            self._convert_float(obs_values.get('precipitationLastHour')),
-            'meter',
-            obs_values.get('precipitationLastHour_qc')
-        )
-        self.__precipitation_last_3_hours = MadisVariable(
-            self._convert_float(obs_values.get('precipitationLast3Hours')),
-            'meter',
-            obs_values.get('precipitationLast3Hours_qc')
-        )
-        self.__precipitation_last_6_hours = MadisVariable(
-            self._convert_float(obs_values.get('precipitationLast6Hours')),
-            'meter',
-            obs_values.get('precipitationLast6Hours_qc')
-        )
-        self.__raw_message = obs_values.get('rawMessage')
-        self.__sky_cover = [obs_values.get(f'skyCover_{i}') for i in range(1, 7)]
-        self.__sky_layer_base = [self._convert_float(obs_values.get(f'skyLayerBase_{i}')) for i in range(1, 7)]
+    VARIABLES = _COMMON_VARIABLES + (
+        ('maxTemp24Hour', MadisVariable('maxTemp24Hour', 'kelvin')),
+        ('minTemp24Hour', MadisVariable('minTemp24Hour', 'kelvin')),
+        ('precipitationLastHour', MadisVariable('precipitationLastHour', 'meter')),
+        ('precipitationLast3Hours', MadisVariable('precipitationLast3Hours', 'meter')),
+        ('precipitationLast6Hours', MadisVariable('precipitationLast6Hours', 'meter'))
+    )
+
+    FLOAT_COLUMNS = MadisObservation.FLOAT_COLUMNS + _SKY_LAYER_BASE
 
     def as_dict(self) -> JsonObject:
-        return {**super().as_dict(), **{
-            'rawMessage': self.__raw_message,
-            'maxTemp24Hour': self.__max_temp_24_hour.as_dict(),
-            'minTemp24Hour': self.__min_temp_24_hour.as_dict(),
-            'precipitationLastHour': self.__precipitation_last_hour.as_dict(),
-            'precipitationLast3Hours': self.__precipitation_last_3_hours.as_dict(),
-            'precipitationLast6Hours': self.__precipitation_last_6_hours.as_dict(),
-            'skyCover': self.__sky_cover,
-            'skyLayerBase': self.__sky_layer_base,
-            'skyLayerBaseUnit': 'meter'
-        }}
+        values = self._values
+        result = super().as_dict()
+        result['rawMessage'] = values[_RAW_MESSAGE]
+        result['skyCover'] = [values[index] for index in _SKY_COVER]
+        result['skyLayerBase'] = [values[index] for index in _SKY_LAYER_BASE]
+        result['skyLayerBaseUnit'] = 'meter'
 
+        return result
 
-class MadisVariable:
 
-    def __init__(self, value: Any, unit: str, qc: Optional[str]):
-        self.__value = value
-        self.__unit = unit
-        self.__qc = qc
+def _convert_float_value(value: Optional[str]) -> Union[str, float, None]:
+    try:
+        return MadisObservation._convert_float(value)
+    except ValueError:
+        # Keep the text so the observation reports the bad value when it is created.
+        return value
 
-    def as_dict(self) -> JsonObject:
-        return {
-            'value': self.__value,
-            'unit': self.__unit,
-            'qc': self.__qc
-        }
+
+def _memoize(function: Callable[[Any], Any], cache: Dict[Any, Any], values: Sequence[Any]) -> List[Any]:
+    """Apply a function to each value, computing it only once per distinct value."""
+    for value in set(values).difference(cache):
+        cache[value] = function(value)
+
+    return [cache[value] for value in values]
@@ -2,39 +2,88 @@ from __future__ import annotations
 
 from abc import ABCMeta, abstractmethod
 import json
-import re
-from typing import Collection, Mapping, Optional, Sequence
+from typing import Callable, Collection, Dict, FrozenSet, List, Mapping, Optional, Sequence, Set, Tuple, Union
 
 from lxml import etree
-from multidict import MultiDict
 from ngitws.typing import JsonObject, JsonType
 from osgeo import ogr
 
 
+NamespacesKey = Tuple[Tuple[str, str], ...]
+
+
 class XmlParser:
+    """Evaluates XPath expressions against an XML tree.
+
+    Expressions are compiled on first use and the compiled form is shared by
+    every parser using the same namespaces, so extractors that run the same
+    expressions on every product only pay for compilation once per process.
+    The cache is not bounded, as expressions come from the extractors' code
+    rather than from input data.
+
+    """
+
+    __compiled: Dict[Tuple[str, NamespacesKey], Optional[etree.XPath]] = {}
 
     def __init__(self, xml_tree: etree.ElementTree, namespaces: Optional[Mapping[str, str]] = None):
         self.__namespaces = namespaces or {}
+        self.__namespaces_key: NamespacesKey = tuple(sorted(self.__namespaces.items()))
         self.__xml_tree = xml_tree
 
     def all(self, xpath: str) -> Sequence[etree.Element]:
-        return self.__xml_tree.xpath(xpath, namespaces=self.__namespaces)
+        return self.__compile(xpath)(self.__xml_tree)
 
     def contains(self, xpath: str) -> bool:
-        return bool(self.all(xpath))
+        return bool(self.__select(xpath, '1'))
 
     def first(self, xpath: str) -> Optional[etree.Element]:
-        result = self.all(xpath)
+        return self.first_or_none(xpath)
+
+    def first_or_none(self, xpath: str) -> Optional[etree.Element]:
+        """Return the first match of an expression, or None, evaluating it only as far as the first match."""
+        result = self.__select(xpath, '1')
         if result:
             return result[0]
         return None
 
     def last(self, xpath: str) -> Optional[etree.Element]:
-        result = self.all(xpath)
+        result = self.__select(xpath, 'last()')
         if result:
             return result[-1]
         return None
 
+    def __compile(self, xpath: str) -> etree.XPath:
+        compiled = self.__lookup(xpath, self.__namespaces_key, self.__namespaces)
+        if compiled is None:
+            # Compile it again to raise the original syntax error.
+            return etree.XPath(xpath, namespaces=self.__namespaces)
+
+        return compiled
+
+    def __select(self, xpath: str, position: str) -> Sequence[etree.Element]:
+        # Selecting by position lets libxml2 stop at the match we need, but only applies to node-set expressions.
+        positional = self.__lookup(f'({xpath})[{position}]', self.__namespaces_key, self.__namespaces)
+        if positional is not None:
+            try:
+                return positional(self.__xml_tree)
+            except etree.XPathEvalError:
+                self.__compiled[(f'({xpath})[{position}]', self.__namespaces_key)] = None
+
+        return self.all(xpath)
+
+    @classmethod
+    def __lookup(cls, xpath: str, key: NamespacesKey, namespaces: Mapping[str, str]) -> Optional[etree.XPath]:
+        try:
+            return cls.__compiled[(xpath, key)]
+        except KeyError:
+            try:
+                compiled: Optional[etree.XPath] = etree.XPath(xpath, namespaces=namespaces)
+            except etree.XPathSyntaxError:
+                compiled = None
+            cls.__compiled[(xpath, key)] = compiled
+
+            return compiled
+
 
 class JsonXmlParser:
 
@@ -44,7 +93,7 @@ class JsonXmlParser:
         filters: Optional[Sequence[XmlToJsonFilter]] = None,
         namespaces: Optional[Mapping[str, str]] = None
     ):
-        self.__filters = filters or []
+        self.__chain = XmlToJsonFilterChain(filters or [])
         self.__parser = XmlParser(xml_tree, namespaces)
 
     def all(self, xpath: str, filters: Optional[Sequence[XmlToJsonFilter]] = None) -> Sequence[JsonType]:
@@ -53,13 +102,21 @@ class JsonXmlParser:
     def contains(self, xpath: str) -> bool:
         return self.__parser.contains(xpath)
 
+    def convert(self, element: etree.Element, filters: Optional[Sequence[XmlToJsonFilter]] = None) -> JsonType:
+        """Convert an element found with first_or_none() to JSON."""
+        return self._convert_element(element, filters=filters)
+
     def first(self, xpath: str, filters: Optional[Sequence[XmlToJsonFilter]] = None) -> Optional[JsonType]:
-        element = self.__parser.first(xpath)
+        element = self.__parser.first_or_none(xpath)
         if element is None:
             return None
 
         return self._convert_element(element, filters=filters)
 
+    def first_or_none(self, xpath: str) -> Optional[etree.Element]:
+        """Return the first matching element without converting it, or None if there is no match."""
+        return self.__parser.first_or_none(xpath)
+
     def last(self, xpath: str, filters: Optional[Sequence[XmlToJsonFilter]] = None) -> Optional[JsonType]:
         element = self.__parser.last(xpath)
         if element is None:
@@ -68,49 +125,131 @@ class JsonXmlParser:
         return self._convert_element(element, filters=filters)
 
     def _convert_element(self, element: etree.Element, filters: Optional[Sequence[XmlToJsonFilter]]) -> JsonType:
-        return XmlToJsonFilterChain(filters or self.__filters)(element)
+        if filters:
+            return XmlToJsonFilterChain(filters)(element)
+
+        return self.__chain(element)
 
 
 class XmlToJsonFilterChain:
+    """Converts XML elements to JSON by passing them through a sequence of filters.
+
+    The chain is built once and reused for every element it converts.  Each
+    filter receives the rest of the chain as `next`, ending in the default
+    conversion.  Subtrees are converted iteratively, and elements that none of
+    the filters apply to skip the filters entirely.
+
+    """
 
     def __init__(self, filters: Sequence[XmlToJsonFilter]):
-        self.__filters = [*filters, DefaultXmlToJsonFilter(filters)]
+        self.__filters = tuple(filters)
+        self.__tags = self.__filter_tags(self.__filters)
+
+        step: XmlToJsonFilterStep = DefaultXmlToJsonFilter(self).convert
+        for filter in reversed(self.__filters):
+            step = _XmlToJsonFilterStep(filter, step)
+        self.__first_step = step
+
+    @property
+    def filters(self) -> Sequence[XmlToJsonFilter]:
+        return self.__filters
+
+    def __call__(self, element: Union[etree.Element, str]) -> JsonType:
+        return self.__first_step(element)
+
+    def applies_to(self, element: etree.Element) -> bool:
+        """Return whether any of the filters may convert an element."""
+        return self.__tags is None or element.tag in self.__tags
+
+    @staticmethod
+    def __filter_tags(filters: Sequence[XmlToJsonFilter]) -> Optional[FrozenSet[str]]:
+        tags: Set[str] = set()
+        for filter in filters:
+            if filter.tags is None:
+                return None
+            tags.update(filter.tags)
+
+        return frozenset(tags)
+
+
+# The rest of a filter chain, as passed to each filter.
+XmlToJsonFilterStep = Callable[[Union[etree.Element, str]], JsonType]
+
 
-    def __call__(self, element: etree.Element) -> JsonType:
-        return self.__filters.pop(0).filter(element, self)
+class _XmlToJsonFilterStep:
+    """A filter bound to the steps of the chain that follow it."""
+
+    __slots__ = ('__filter', '__next')
+
+    def __init__(self, filter: XmlToJsonFilter, next: XmlToJsonFilterStep):
+        self.__filter = filter
+        self.__next = next
+
+    def __call__(self, element: Union[etree.Element, str]) -> JsonType:
+        return self.__filter.filter(element, self.__next)
 
 
 class XmlToJsonFilter(metaclass=ABCMeta):
 
+    @property
+    def tags(self) -> Optional[Collection[str]]:
+        """Return the tags of the elements this filter may convert, or None if it may convert any element.
+
+        Elements with other tags are passed straight to the default conversion.
+
+        """
+        return None
+
     @abstractmethod
-    def filter(self, element: etree.Element, next: XmlToJsonFilterChain) -> JsonObject:
+    def filter(self, element: etree.Element, next: XmlToJsonFilterStep) -> JsonObject:
         pass
 
 
 class DefaultXmlToJsonFilter(XmlToJsonFilter):
+    """Converts elements to nested objects keyed by local name, with repeated children as lists.
 
-    def __init__(self, filters: Sequence[XmlToJsonFilter]):
-        self.__filters = filters
+    Leaf elements convert to their text.  Descendants are passed back through
+    the chain if one of its filters applies to them.
+
+    """
+
+    def __init__(self, chain: XmlToJsonFilterChain):
+        self.__chain = chain
 
-    def filter(self, element: etree.Element, next: XmlToJsonFilterChain) -> JsonType:
+    def filter(self, element: etree.Element, next: XmlToJsonFilterStep) -> JsonType:
+        return self.convert(element)
+
+    def convert(self, element: Union[etree.Element, str]) -> JsonType:
         if isinstance(element, str):
             return element
         if len(element) == 0:
             return element.text
 
-        children: MultiDict[JsonType] = MultiDict()
-        for child in element:
-            tag = re.sub(r'{.*}', '', child.tag)
-            value = XmlToJsonFilterChain(self.__filters)(child)
-            children.add(tag, value)
-
-        json_out = {}
-        for tag in children:
-            values = children.getall(tag)
-            if len(values) == 1:
-                json_out[tag] = values[0]
-            else:
-                json_out[tag] = values
+        chain = self.__chain
+        json_out: JsonObject = {}
+        pending = [(element, json_out)]
+        while pending:
+            parent, parent_out = pending.pop()
+            repeated: Set[str] = set()
+            for child in parent.iterchildren(etree.Element):
+                if chain.applies_to(child):
+                    value = chain(child)
+                elif len(child) == 0:
+                    value = child.text
+                else:
+                    # Filled in when the child comes off the stack; key order follows the first occurrence.
+                    value = {}
+                    pending.append((child, value))
+
+                tag = child.tag
+                tag = tag[tag.rfind('}') + 1:]
+                if tag in repeated:
+                    parent_out[tag].append(value)
+                elif tag in parent_out:
+                    parent_out[tag] = [parent_out[tag], value]
+                    repeated.add(tag)
+                else:
+                    parent_out[tag] = value
 
         return json_out
 
@@ -123,11 +262,35 @@ class GmlToGeojsonFilter(XmlToJsonFilter):
         '{http://www.opengis.net/gml/3.2}Polygon'
     ]
 
+    COORDINATE_TAGS = [
+        '{http://www.opengis.net/gml/3.2}coordinates',
+        '{http://www.opengis.net/gml/3.2}pos'
+    ]
+
+    NAMESPACES = {'gml': 'http://www.opengis.net/gml/3.2'}
+
+    EXTERIOR_TAG = '{http://www.opengis.net/gml/3.2}exterior'
+    INTERIOR_TAG = '{http://www.opengis.net/gml/3.2}interior'
+    LINEAR_RING_TAG = '{http://www.opengis.net/gml/3.2}LinearRing'
+    POS_LIST_TAG = '{http://www.opengis.net/gml/3.2}posList'
+    POS_TAG = '{http://www.opengis.net/gml/3.2}pos'
+    POSITION_TAGS = {
+        '{http://www.opengis.net/gml/3.2}coordinates',
+        '{http://www.opengis.net/gml/3.2}pointProperty',
+        '{http://www.opengis.net/gml/3.2}pointRep',
+        '{http://www.opengis.net/gml/3.2}pos',
+        '{http://www.opengis.net/gml/3.2}posList'
+    }
+
     def __init__(self, extra_tags: Optional[Collection[str]] = None, *, precision: int = 4):
         self.__precision = precision
         self.__tags = {*self.DEFAULT_TAGS, *(extra_tags or [])}
 
-    def filter(self, element: etree.Element, next: XmlToJsonFilterChain) -> JsonObject:
+    @property
+    def tags(self) -> Collection[str]:
+        return {*self.__tags, *self.COORDINATE_TAGS}
+
+    def filter(self, element: etree.Element, next: XmlToJsonFilterStep) -> JsonObject:
         if isinstance(element, str):
             return next(element)
 
@@ -141,6 +304,13 @@ class GmlToGeojsonFilter(XmlToJsonFilter):
         return next(element)
 
     def _convert_geometry(self, element: etree.Element) -> JsonObject:
+        geometry = self._read_geometry(element)
+        if geometry is None:
+            return self._convert_geometry_with_ogr(element)
+
+        return geometry
+
+    def _convert_geometry_with_ogr(self, element: etree.Element) -> JsonObject:
         gml = str(etree.tostring(element).decode('utf-8'))
         geometry = ogr.CreateGeometryFromGML(gml)
         geometry.FlattenTo2D()
@@ -149,6 +319,103 @@ class GmlToGeojsonFilter(XmlToJsonFilter):
             f'COORDINATE_PRECISION={self.__precision}'
         ]))
 
+    def _read_geometry(self, element: etree.Element) -> Optional[JsonObject]:
+        """Read the simple geometries found in products directly, or return None to leave the geometry to OGR.
+
+        Points, line strings, polygons and surfaces made of polygon patches are
+        read straight from their positions, with the same axis order, 2D
+        flattening and precision as OGR.  Anything else, such as curves with
+        arcs or circles, returns None.
+
+        """
+        try:
+            dimension = self.__dimension(element, 2)
+            name = etree.QName(element).localname
+            if name == 'Point':
+                positions = self.__read_positions(element, dimension)
+                if positions is not None and len(positions) == 1:
+                    return {'type': 'Point', 'coordinates': positions[0]}
+            elif name == 'LineString':
+                positions = self.__read_positions(element, dimension)
+                if positions is not None:
+                    return {'type': 'LineString', 'coordinates': positions}
+            elif name == 'Polygon':
+                rings = self.__read_polygon(element, dimension)
+                if rings is not None:
+                    return {'type': 'Polygon', 'coordinates': rings}
+            elif name == 'Surface':
+                patches = element.find('gml:polygonPatches', namespaces=self.NAMESPACES)
+                if patches is None or len(patches) == 0:
+                    return None
+
+                polygons = [self.__read_polygon(patch, dimension) for patch in patches]
+                if any(
+                    polygon is None or etree.QName(patch).localname != 'PolygonPatch'
+                    for patch, polygon in zip(patches, polygons)
+                ):
+                    return None
+                if len(polygons) == 1:
+                    return {'type': 'Polygon', 'coordinates': polygons[0]}
+
+                return {'type': 'MultiPolygon', 'coordinates': polygons}
+        except ValueError:
+            pass
+
+        return None
+
+    def __read_polygon(self, element: etree.Element, dimension: int) -> Optional[List[List[List[float]]]]:
+        rings: List[List[List[float]]] = []
+        for boundary in element:
+            if boundary.tag not in (self.EXTERIOR_TAG, self.INTERIOR_TAG) or len(boundary) != 1:
+                return None
+            if boundary.tag == self.EXTERIOR_TAG and rings:
+                return None
+
+            ring = boundary[0]
+            if ring.tag != self.LINEAR_RING_TAG:
+                return None
+
+            positions = self.__read_positions(ring, self.__dimension(ring, dimension))
+            if positions is None:
+                return None
+            rings.append(positions)
+
+        return rings or None
+
+    def __read_positions(self, element: etree.Element, dimension: int) -> Optional[List[List[float]]]:
+        precision = self.__precision
+        children = [child for child in element if child.tag in self.POSITION_TAGS]
+        if len(children) == 1 and children[0].tag == self.POS_LIST_TAG:
+            pos_list = children[0]
+            values = (pos_list.text or '').split()
+            step = self.__dimension(pos_list, dimension)
+            if not values or len(values) % step:
+                return None
+
+            return [
+                [round(float(values[index]), precision), round(float(values[index + 1]), precision)]
+                for index in range(0, len(values), step)
+            ]
+        elif children and all(child.tag == self.POS_TAG for child in children):
+            positions = []
+            for pos in children:
+                values = (pos.text or '').split()
+                if len(values) < 2:
+                    return None
+                positions.append([round(float(values[0]), precision), round(float(values[1]), precision)])
+
+            return positions
+
+        return None
+
+    @staticmethod
+    def __dimension(element: etree.Element, default: int) -> int:
+        dimension = int(element.get('srsDimension', default))
+        if dimension < 2:
+            raise ValueError(f'Unsupported coordinate dimension {dimension}')
+
+        return dimension
+
     def _convert_coordinates(self, element: etree.Element) -> JsonObject:
         assert element.tag == '{http://www.opengis.net/gml/3.2}coordinates'
 
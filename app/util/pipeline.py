@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Set, TypeVar
+
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+async def bounded_map(
+    func: Callable[[T], Awaitable[R]],
+    items: AsyncIterable[T],
+    window: int
+) -> AsyncIterator[R]:
+    """Apply an async function to items with at most `window` calls in flight.
+
+    Items are pulled from the source only when there is room in the window,
+    so the source is consumed at the pace of the work rather than all at once.
+    Results are yielded in order of completion.  Outstanding calls are
+    cancelled if the consumer stops iterating early.
+
+    """
+    if window < 1:
+        raise ValueError(f'Window must be at least one, not {window}')
+
+    pending: Set[asyncio.Task] = set()
+    try:
+        async for item in items:
+            if len(pending) >= window:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+            pending.add(asyncio.ensure_future(func(item)))
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -1,19 +1,59 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+import copy
+import mmap
 import re
-from typing import Sequence
+from typing import AsyncIterator, Iterator, List, Optional, Sequence, Tuple, Union
 
 from lxml import etree
 
 
+# Data a splitter can read: bytes held in memory, or a file mapped into memory.
+Buffer = Union[bytes, mmap.mmap]
+
+# How much of a buffer is handed to the XML parser at a time.
+PARSE_CHUNK_SIZE = 64 * 1024
+
+
 class Splitter(ABC):
     """Base class for splitting data operations."""
 
     @abstractmethod
-    async def split(self, data: bytes) -> Sequence[bytes]:
+    async def split(self, data: Buffer) -> Sequence[bytes]:
         """Split provided data into parts."""
 
+    async def stream(self, data: Buffer) -> AsyncIterator[bytes]:
+        """Yield the parts of the provided data one at a time."""
+        for part in await self.split(data):
+            yield part
+
+
+class IwxxmPart:
+    """A product split out of an IWXXM bulletin.
+
+    The part keeps the parsed tree it was split into, so it can be handed to
+    an extractor without parsing it again, and only renders it to bytes when
+    they are first asked for.
+
+    """
+
+    __slots__ = ('__data', '__element')
+
+    def __init__(self, element: etree.Element):
+        self.__data: Optional[bytes] = None
+        self.__element = element
+
+    @property
+    def data(self) -> bytes:
+        if self.__data is None:
+            self.__data = etree.tostring(self.__element)
+        return self.__data
+
+    @property
+    def element(self) -> etree.Element:
+        return self.__element
+
 
 class IwxxmSplitter(Splitter):
     """Splitter for IWXXM documents.
@@ -23,44 +63,146 @@ class IwxxmSplitter(Splitter):
     inside the <MeteorologicalBulletin>.  The <bulletinIdentifier> element is
     also preserved for each output document.
 
-    """
-
-    async def split(self, data: bytes) -> Sequence[bytes]:
-        root = etree.fromstring(data)
-        identifier = next(iter(root.xpath('./collect:bulletinIdentifier', namespaces={
-            'collect': 'http://def.wmo.int/collect/2014'
-        })), None)
-        products = root.xpath('./collect:meteorologicalInformation', namespaces={
-            'collect': 'http://def.wmo.int/collect/2014'
-        })
+    The bulletin is parsed incrementally, and each product is detached from
+    the bulletin as soon as it is complete, so the whole bulletin is never
+    held as a tree.  Products that precede the <bulletinIdentifier> are held
+    back until it is found.
 
-        return [self.__render_product(root, identifier, product) for product in products]
+    """
 
-    def supports(self, data: bytes) -> bool:
+    BULLETIN_TAG = '{http://def.wmo.int/collect/2014}MeteorologicalBulletin'
+    IDENTIFIER_TAG = '{http://def.wmo.int/collect/2014}bulletinIdentifier'
+    PRODUCT_TAG = '{http://def.wmo.int/collect/2014}meteorologicalInformation'
+
+    async def split(self, data: Buffer) -> Sequence[bytes]:
+        return [part async for part in self.stream(data)]
+
+    async def stream(self, data: Buffer) -> AsyncIterator[bytes]:
+        async for part in self.parts(data):
+            yield part.data
+
+    async def parts(self, data: Buffer) -> AsyncIterator[IwxxmPart]:
+        """Yield each product of a bulletin as a parsed part, as soon as it is complete."""
+        root: Optional[etree.Element] = None
+        identifier: Optional[etree.Element] = None
+        held: List[etree.Element] = []
+        for event, element in _iterparse(data):
+            if root is None:
+                root = element
+            if event == 'start' or element.getparent() is not root:
+                continue
+
+            if element.tag == self.PRODUCT_TAG:
+                if identifier is None:
+                    held.append(element)
+                else:
+                    yield self.__part(root, identifier, element)
+            elif element.tag == self.IDENTIFIER_TAG:
+                identifier = element
+                for product in held:
+                    yield self.__part(root, identifier, product)
+                held.clear()
+            else:
+                element.clear()
+
+        if held:
+            raise ValueError('IWXXM bulletin has no bulletin identifier')
+
+    def supports(self, data: Buffer) -> bool:
+        """Return whether data is a bulletin with a single identifier.
+
+        Documents that are not bulletins are rejected as soon as their root
+        element is read, and bulletins are checked without building their tree.
+
+        """
         try:
-            root = etree.fromstring(data)
-            if len(root.xpath('/*[self::collect:MeteorologicalBulletin]', namespaces={
-                'collect': 'http://def.wmo.int/collect/2014'
-            })) < 1:
-                return False
-            if len(root.xpath('./*[self::collect:bulletinIdentifier]', namespaces={
-                'collect': 'http://def.wmo.int/collect/2014'
-            })) != 1:
-                return False
-            return True
+            root: Optional[etree.Element] = None
+            identifiers = 0
+            for event, element in _iterparse(data):
+                if root is None:
+                    if element.tag != self.BULLETIN_TAG:
+                        return False
+                    root = element
+                if event == 'end' and element.getparent() is root:
+                    if element.tag == self.IDENTIFIER_TAG:
+                        identifiers += 1
+                    element.clear()
+                    root.remove(element)
+            return identifiers == 1
         except Exception:
             return False
 
-    def __render_product(self, root: etree.Element, identifier: etree.Element, product: etree.Element) -> bytes:
+    def __part(self, root: etree.Element, identifier: etree.Element, product: etree.Element) -> IwxxmPart:
         new_root = etree.Element(root.tag, root.attrib)
         new_root.append(product)
-        new_root.append(identifier)
+        new_root.append(copy.deepcopy(identifier))
 
-        return etree.tostring(new_root)
+        return IwxxmPart(new_root)
 
 
 class LineSplitter(Splitter):
-    """Splitter for multiline documents."""
+    """Splitter for multiline documents.
+
+    Lines are found lazily, so streaming a document only ever copies the line
+    being handed out, and offsets() locates lines without copying them at all.
+    Blank lines, including lines of only whitespace, can be skipped.
 
-    async def split(self, data: bytes) -> Sequence[bytes]:
-        return re.split(rb'\r{0,2}\n', data)
+    """
+
+    BLANK_LINE_PATTERN = re.compile(rb'\s*')
+    LINE_BREAK_PATTERN = re.compile(rb'\r{0,2}\n')
+
+    def __init__(self, skip_blank: bool = False):
+        """Create a new line splitter.
+
+        :param skip_blank: whether to leave out lines that are empty or only whitespace
+
+        """
+        self.__skip_blank = skip_blank
+
+    @property
+    def skip_blank(self) -> bool:
+        return self.__skip_blank
+
+    async def split(self, data: Buffer) -> Sequence[bytes]:
+        if not self.__skip_blank:
+            return self.LINE_BREAK_PATTERN.split(data)
+        return list(self.lines(data))
+
+    async def stream(self, data: Buffer) -> AsyncIterator[bytes]:
+        for line in self.lines(data):
+            yield line
+
+    def lines(self, data: Buffer) -> Iterator[bytes]:
+        """Yield each line of the data, copying only the line itself out of the buffer."""
+        for start, end in self.offsets(data):
+            yield data[start:end]
+
+    def offsets(self, data: Buffer) -> Iterator[Tuple[int, int]]:
+        """Yield the start and end offsets of each line, excluding its line break."""
+        start = 0
+        for match in self.LINE_BREAK_PATTERN.finditer(data):
+            end = match.start()
+            if not self.__is_blank(data, start, end):
+                yield start, end
+            start = match.end()
+        if not self.__is_blank(data, start, len(data)):
+            yield start, len(data)
+
+    def __is_blank(self, data: Buffer, start: int, end: int) -> bool:
+        return self.__skip_blank and self.BLANK_LINE_PATTERN.fullmatch(data, start, end) is not None
+
+
+def _iterparse(data: Buffer) -> Iterator[Tuple[str, etree.Element]]:
+    """Yield the start and end events of parsing an XML document incrementally.
+
+    The buffer is fed to the parser a slice at a time, so a memory-mapped file
+    is never copied whole into memory.
+
+    """
+    parser = etree.XMLPullParser(events=('start', 'end'))
+    for offset in range(0, len(data), PARSE_CHUNK_SIZE):
+        parser.feed(data[offset:offset + PARSE_CHUNK_SIZE])
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
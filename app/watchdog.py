@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+import logging
+import sys
+import threading
+import time
+import traceback
+from types import FrameType, TracebackType
+from typing import Callable, Deque, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from .handlers import SubscriptionNotificationHandler
+
+
+DEFAULT_MAX_STALLS = 100
+DEFAULT_PING_INTERVAL = 0.1  # in seconds
+DEFAULT_STACK_DEPTH = 30
+DEFAULT_STALL_THRESHOLD = 1.0  # in seconds
+
+# Names of the locals that hold the record a handler frame is working on, in order of preference.
+IDENTITY_LOCALS = ('identity', 'collective_identity')
+
+
+class LoopStall(NamedTuple):
+    """A period during which the event loop did not run any callbacks."""
+
+    duration: float
+    handler: Optional[str]
+    identity: Optional[str]
+    stack: Sequence[str]
+
+
+class LoopWatchdog:
+    """Detect the event loop stalling and record what was running when it did.
+
+    A thread pings the loop at regular intervals.  When a ping goes unanswered
+    for longer than the threshold, the thread samples the stack of the loop's
+    thread, finds the handler and record it is working on, and then waits for
+    the loop to recover to measure how long the stall lasted.  Only the most
+    recent stalls are kept.
+
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_STALL_THRESHOLD,
+        *,
+        interval: float = DEFAULT_PING_INTERVAL,
+        max_stalls: int = DEFAULT_MAX_STALLS,
+        stack_depth: int = DEFAULT_STACK_DEPTH,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Create a new watchdog.
+
+        :param threshold: the time in seconds the loop may go without answering before it counts as stalled
+        :param interval: the time in seconds between pings
+        :param max_stalls: the number of recent stalls kept
+        :param stack_depth: the number of innermost frames kept from each sampled stack
+        :param clock: the source of the current time in seconds
+
+        """
+        self.__answered = threading.Event()
+        self.__clock = clock
+        self.__interval = interval
+        self.__lock = threading.Lock()
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__loop_thread_id: Optional[int] = None
+        self.__stack_depth = stack_depth
+        self.__stall_count = 0
+        self.__stalls: Deque[LoopStall] = deque(maxlen=max_stalls)
+        self.__stopped = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+        self.__threshold = threshold
+
+        self.__logger = logging.getLogger(__name__)
+
+    async def __aenter__(self) -> LoopWatchdog:
+        if self.__thread:
+            raise RuntimeError('Watchdog is already running')
+
+        self.__loop = asyncio.get_running_loop()
+        self.__loop_thread_id = threading.get_ident()
+        self.__stopped.clear()
+        self.__thread = threading.Thread(target=self.__watch, name='loop-watchdog', daemon=True)
+        self.__thread.start()
+
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType]
+    ) -> None:
+        if self.__thread:
+            self.__stopped.set()
+            self.__answered.set()
+            self.__thread.join()
+            self.__thread = None
+
+    @property
+    def stall_count(self) -> int:
+        """Return the number of stalls detected so far, including those no longer kept."""
+        return self.__stall_count
+
+    @property
+    def stalls(self) -> List[LoopStall]:
+        """Return the most recent stalls, oldest first."""
+        with self.__lock:
+            return list(self.__stalls)
+
+    @property
+    def threshold(self) -> float:
+        return self.__threshold
+
+    def __watch(self) -> None:
+        assert self.__loop is not None
+        while not self.__stopped.is_set():
+            self.__answered.clear()
+            sent = self.__clock()
+            try:
+                self.__loop.call_soon_threadsafe(self.__answered.set)
+            except RuntimeError:
+                # The loop was closed under the watchdog.
+                return
+
+            if not self.__answered.wait(self.__threshold):
+                self.__record_stall(sent)
+            self.__stopped.wait(self.__interval)
+
+    def __record_stall(self, sent: float) -> None:
+        frame = sys._current_frames().get(self.__loop_thread_id)
+        handler, identity = running_handler(frame)
+        stack = traceback.format_stack(frame, self.__stack_depth) if frame else []
+        del frame
+
+        while not self.__answered.wait(self.__interval) and not self.__stopped.is_set():
+            pass
+
+        stall = LoopStall(self.__clock() - sent, handler, identity, stack)
+        with self.__lock:
+            self.__stalls.append(stall)
+            self.__stall_count += 1
+
+        running = f' while {handler} was handling {identity}' if handler else ''
+        self.__logger.warning(f'Event loop stalled for {stall.duration:.3f}s{running}\n{"".join(stack)}')
+
+
+def running_handler(frame: Optional[FrameType]) -> Tuple[Optional[str], Optional[str]]:
+    """Return the name of the handler running in a stack and the record it is working on, if any."""
+    handler: Optional[str] = None
+    while frame is not None:
+        frame_locals = frame.f_locals
+        if isinstance(frame_locals.get('self'), SubscriptionNotificationHandler):
+            handler = handler or type(frame_locals['self']).__name__
+            for name in IDENTITY_LOCALS:
+                if frame_locals.get(name) is not None:
+                    return handler, str(frame_locals[name])
+        frame = frame.f_back
+
+    return handler, None
@@ -0,0 +1,54 @@
+"""Micro-benchmark for parsing and formatting MADIS observation times.
+
+Compares formatting every observation time from scratch with going through
+MadisTimestampCodec, for a pull with the given number of rows spread over a
+handful of distinct minutes.
+
+    python -m benchmarks.madis_timestamps [--rows 50000] [--minutes 10]
+
+"""
+import argparse
+import itertools
+import time
+from typing import Callable, Sequence, Tuple
+
+from app.util.madis import MadisTimestamp, MadisTimestampCodec
+
+
+def uncached(fields: Sequence[Tuple[str, str]]) -> None:
+    for month_day_year, hours_minutes in fields:
+        MadisTimestamp.parse(month_day_year, hours_minutes)
+
+
+def cached(fields: Sequence[Tuple[str, str]]) -> None:
+    codec = MadisTimestampCodec()
+    for month_day_year, hours_minutes in fields:
+        codec.decode(month_day_year, hours_minutes)
+
+
+def measure(function: Callable[[Sequence[Tuple[str, str]]], None], fields: Sequence[Tuple[str, str]]) -> float:
+    start = time.perf_counter()
+    function(fields)
+
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--minutes', type=int, default=10)
+    args = parser.parse_args()
+
+    minutes = [('12/31/2020', f'14:{minute:02d}') for minute in range(args.minutes)]
+    fields = list(itertools.islice(itertools.cycle(minutes), args.rows))
+
+    uncached_time = measure(uncached, fields)
+    cached_time = measure(cached, fields)
+    print(f'{args.rows} rows over {args.minutes} distinct minutes')
+    print(f'uncached: {uncached_time:.3f}s ({uncached_time / args.rows * 1e6:.1f}us/row)')
+    print(f'cached:   {cached_time:.3f}s ({cached_time / args.rows * 1e6:.1f}us/row)')
+    print(f'speedup:  {uncached_time / cached_time:.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Micro-benchmark for converting large IWXXM trees to JSON.
+
+Compares the previous filter chain, which copied the filter list for every
+element and advanced through it with list.pop(0), with the compiled
+XmlToJsonFilterChain, on a METAR collective with the given number of reports.
+
+    python -m benchmarks.xml_to_json [--reports 500] [--repeat 5]
+
+"""
+import argparse
+import re
+import time
+from typing import Callable, Sequence
+
+from lxml import etree
+
+from app.util.parser import GmlToGeojsonFilter, XmlToJsonFilterChain
+
+
+REPORT = '''\
+<collect:member>
+  <iwxxm:METAR gml:id="uuid.{index}" reportStatus="NORMAL" automatedStation="true">
+    <iwxxm:issueTime>
+      <gml:TimeInstant gml:id="ti.{index}"><gml:timePosition>2020-12-31T14:55:00Z</gml:timePosition></gml:TimeInstant>
+    </iwxxm:issueTime>
+    <iwxxm:aerodrome>
+      <aixm:AirportHeliport gml:id="ah.{index}">
+        <aixm:timeSlice>
+          <aixm:AirportHeliportTimeSlice gml:id="ahts.{index}">
+            <gml:validTime/>
+            <aixm:interpretation>SNAPSHOT</aixm:interpretation>
+            <aixm:designator>K{index:03d}</aixm:designator>
+            <aixm:locationIndicatorICAO>K{index:03d}</aixm:locationIndicatorICAO>
+            <aixm:ARP>
+              <aixm:ElevatedPoint gml:id="ep.{index}" srsName="urn:ogc:def:crs:EPSG::4326">
+                <gml:pos>45.343239 -94.329753</gml:pos>
+              </aixm:ElevatedPoint>
+            </aixm:ARP>
+          </aixm:AirportHeliportTimeSlice>
+        </aixm:timeSlice>
+      </aixm:AirportHeliport>
+    </iwxxm:aerodrome>
+    <iwxxm:observation>
+      <iwxxm:MeteorologicalAerodromeObservation>
+        <iwxxm:airTemperature uom="Cel">-3</iwxxm:airTemperature>
+        <iwxxm:dewpointTemperature uom="Cel">-8</iwxxm:dewpointTemperature>
+        <iwxxm:qnh uom="hPa">1021</iwxxm:qnh>
+        <iwxxm:surfaceWind>
+          <iwxxm:AerodromeSurfaceWind>
+            <iwxxm:meanWindDirection uom="deg">310</iwxxm:meanWindDirection>
+            <iwxxm:meanWindSpeed uom="[kn_i]">12</iwxxm:meanWindSpeed>
+          </iwxxm:AerodromeSurfaceWind>
+        </iwxxm:surfaceWind>
+        <iwxxm:cloud>
+          <iwxxm:AerodromeCloud>
+            <iwxxm:layer><iwxxm:CloudLayer><iwxxm:amount>FEW</iwxxm:amount></iwxxm:CloudLayer></iwxxm:layer>
+            <iwxxm:layer><iwxxm:CloudLayer><iwxxm:amount>BKN</iwxxm:amount></iwxxm:CloudLayer></iwxxm:layer>
+          </iwxxm:AerodromeCloud>
+        </iwxxm:cloud>
+      </iwxxm:MeteorologicalAerodromeObservation>
+    </iwxxm:observation>
+  </iwxxm:METAR>
+</collect:member>
+'''
+
+COLLECTIVE = '''\
+<collect:MeteorologicalBulletin
+    xmlns:aixm="http://www.aixm.aero/schema/5.1.1"
+    xmlns:collect="http://def.wmo.int/collect/2014"
+    xmlns:gml="http://www.opengis.net/gml/3.2"
+    xmlns:iwxxm="http://icao.int/iwxxm/3.0">
+{members}
+</collect:MeteorologicalBulletin>
+'''
+
+
+class LegacyFilterChain:
+    """The filter chain as it was before being compiled, with a dict of lists in place of MultiDict."""
+
+    def __init__(self, filters):
+        self.__filters = [*filters, LegacyDefaultFilter(filters)]
+
+    def __call__(self, element):
+        return self.__filters.pop(0).filter(element, self)
+
+
+class LegacyDefaultFilter:
+
+    def __init__(self, filters):
+        self.__filters = filters
+
+    def filter(self, element, next):
+        if isinstance(element, str):
+            return element
+        if len(element) == 0:
+            return element.text
+
+        children = {}
+        for child in element:
+            tag = re.sub(r'{.*}', '', child.tag)
+            value = LegacyFilterChain(self.__filters)(child)
+            children.setdefault(tag, []).append(value)
+
+        json_out = {}
+        for tag, values in children.items():
+            if len(values) == 1:
+                json_out[tag] = values[0]
+            else:
+                json_out[tag] = values
+
+        return json_out
+
+
+def measure(convert: Callable[[etree.Element], object], element: etree.Element, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        convert(element)
+
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--reports', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    members = ''.join(REPORT.format(index=index) for index in range(args.reports))
+    element = etree.fromstring(COLLECTIVE.format(members=members).encode('utf-8'))
+    filters: Sequence = [GmlToGeojsonFilter()]
+
+    legacy = LegacyFilterChain(filters)(element)
+    compiled_chain = XmlToJsonFilterChain(filters)
+    if compiled_chain(element) != legacy:
+        raise RuntimeError('Compiled chain output differs from the legacy chain')
+
+    legacy_time = measure(lambda tree: LegacyFilterChain(filters)(tree), element, args.repeat)
+    compiled_time = measure(compiled_chain, element, args.repeat)
+    print(f'{args.reports} reports, {sum(1 for _ in element.iter())} elements')
+    print(f'legacy:   {legacy_time * 1e3:.1f}ms')
+    print(f'compiled: {compiled_time * 1e3:.1f}ms')
+    print(f'speedup:  {legacy_time / compiled_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+from typing import Hashable, Sequence
+
+from app.converters import ConversionCache, ConversionInput, ConversionResult, Converter
+from app.media_types import MediaTypes
+import msgpack
+import pytest
+
+
+class CountingConverter(Converter):
+    """Counts the conversions it runs."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def _convert(self, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
+        self.calls += 1
+        return [ConversionResult(inputs[0].data.upper(), MediaTypes.TEXT_PLAIN)]
+
+
+class VersionedConverter(CountingConverter):
+    """Counts the conversions it runs with a state version that can be changed."""
+
+    def __init__(self):
+        super().__init__()
+        self.version = 'a'
+
+    def _worker_state_version(self) -> Hashable:
+        return self.version
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestConversionCache:
+
+    @pytest.mark.asyncio
+    async def test_convert(self):
+        cache = ConversionCache()
+        converter = CountingConverter()
+
+        results, hit = await cache.convert(converter, [ConversionInput(b'abc', MediaTypes.TEXT_PLAIN)])
+        assert (results[0].data, hit) == (b'ABC', False)
+        results, hit = await cache.convert(converter, [ConversionInput(b'abc', MediaTypes.TEXT_PLAIN)])
+        assert (results[0].data, hit) == (b'ABC', True)
+        await cache.convert(converter, [ConversionInput(b'abc', MediaTypes.APPLICATION_JSON)])
+
+        assert converter.calls == 2
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    @pytest.mark.asyncio
+    async def test_key_includes_input_ids(self):
+        cache = ConversionCache()
+        converter = CountingConverter()
+
+        await cache.convert(converter, [ConversionInput(b'abc', MediaTypes.TEXT_PLAIN, id='SAW')])
+        await cache.convert(converter, [ConversionInput(b'abc', MediaTypes.TEXT_PLAIN, id='SEL')])
+        await cache.convert(converter, [ConversionInput(b'abc', MediaTypes.TEXT_PLAIN)])
+
+        assert converter.calls == 3
+
+    @pytest.mark.asyncio
+    async def test_key_includes_state_version(self):
+        cache = ConversionCache()
+        converter = VersionedConverter()
+        inputs = [ConversionInput(b'abc', MediaTypes.TEXT_PLAIN)]
+
+        await cache.convert(converter, inputs)
+        converter.version = 'b'
+        _, hit = await cache.convert(converter, inputs)
+
+        assert hit is False
+        assert converter.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self):
+        cache = ConversionCache(max_size=4)
+        await cache.put('a', [ConversionResult(b'aa', MediaTypes.TEXT_PLAIN)])
+        await cache.put('b', [ConversionResult(b'bb', MediaTypes.TEXT_PLAIN)])
+        await cache.get('a')
+        await cache.put('c', [ConversionResult(b'c', MediaTypes.TEXT_PLAIN)])
+
+        assert (await cache.get('a'))[0].data == b'aa'
+        assert await cache.get('b') is None
+        assert (cache.entries, cache.size) == (2, 3)
+
+    @pytest.mark.asyncio
+    async def test_skips_results_larger_than_cache(self):
+        cache = ConversionCache(max_size=4)
+        await cache.put('a', [ConversionResult(b'aa', MediaTypes.TEXT_PLAIN)])
+        await cache.put('b', [ConversionResult(b'bbbbb', MediaTypes.TEXT_PLAIN)])
+
+        assert await cache.get('b') is None
+        assert (cache.entries, cache.size) == (1, 2)
+
+    @pytest.mark.asyncio
+    async def test_expires(self):
+        clock = Clock()
+        cache = ConversionCache(ttl=10, clock=clock)
+        await cache.put('a', [])
+
+        clock.now += 9
+        assert await cache.get('a') == []
+        clock.now += 1
+        assert await cache.get('a') is None
+        assert cache.entries == 0
+
+    @pytest.mark.asyncio
+    async def test_disk_tier(self, tmp_path):
+        clock = Clock()
+        converter = CountingConverter()
+        inputs = [ConversionInput(b'abc', MediaTypes.TEXT_PLAIN)]
+        await ConversionCache(directory=tmp_path, ttl=10, clock=clock).convert(converter, inputs)
+
+        cache = ConversionCache(directory=tmp_path, ttl=10, clock=clock)
+        results, hit = await cache.convert(converter, inputs)
+        assert (results[0].data, results[0].media_type, hit) == (b'ABC', MediaTypes.TEXT_PLAIN, True)
+        assert msgpack.unpackb(next(tmp_path.glob('*/*')).read_bytes())[1] == [[b'ABC', 'text/plain', None]]
+
+        clock.now += 10
+        results, hit = await ConversionCache(directory=tmp_path, ttl=10, clock=clock).convert(converter, inputs)
+        assert hit is False
+        assert converter.calls == 2
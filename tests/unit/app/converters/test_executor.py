@@ -0,0 +1,131 @@
+from concurrent.futures.process import BrokenProcessPool
+import os
+from typing import Any, Hashable, Sequence
+
+from app.converters import (
+    ConversionInput,
+    ConversionResult,
+    Converter,
+    InlineConverterExecutor,
+    ProcessPoolConverterExecutor
+)
+from app.media_types import MediaTypes
+import pytest
+
+
+class PidConverter(Converter):
+    """Reports the process ID the conversion ran in."""
+
+    PROCESS_POOL = True
+
+    async def _convert(self, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
+        return [ConversionResult(str(os.getpid()).encode(), MediaTypes.TEXT_PLAIN, id=inputs[0].id)]
+
+
+class CrashingConverter(Converter):
+    """Kills the worker process it runs in."""
+
+    PROCESS_POOL = True
+
+    async def _convert(self, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
+        os._exit(1)
+
+
+class StateConverter(Converter):
+    """Reports the state it was rebuilt from and counts the times its state was sent to a worker."""
+
+    PROCESS_POOL = True
+
+    def __init__(self, state: str):
+        self.sent = 0
+        self.state = state
+
+    @classmethod
+    def _from_worker_state(cls, state: Any) -> Converter:
+        return cls(state)
+
+    def _worker_state(self) -> Any:
+        self.sent += 1
+        return self.state
+
+    def _worker_state_version(self) -> Hashable:
+        return self.state
+
+    async def _convert(self, inputs: Sequence[ConversionInput]) -> Sequence[ConversionResult]:
+        return [ConversionResult(self.state.encode(), MediaTypes.TEXT_PLAIN)]
+
+
+class TestInlineConverterExecutor:
+
+    @pytest.mark.asyncio
+    async def test_run(self):
+        converter = PidConverter()
+        converter.executor = InlineConverterExecutor()
+
+        results = await converter.convert([ConversionInput(b'', MediaTypes.TEXT_PLAIN, id='A')])
+
+        assert results[0].data == str(os.getpid()).encode()
+        assert results[0].id == 'A'
+
+
+class TestProcessPoolConverterExecutor:
+
+    @pytest.mark.asyncio
+    async def test_run(self):
+        async with ProcessPoolConverterExecutor(1, preload_modules=[]) as executor:
+            converter = PidConverter()
+            converter.executor = executor
+
+            results = await converter.convert([ConversionInput(b'', MediaTypes.TEXT_PLAIN, id='A')])
+
+        assert results[0].data != str(os.getpid()).encode()
+        assert results[0].id == 'A'
+
+    @pytest.mark.asyncio
+    async def test_sends_state_once_per_version(self):
+        async with ProcessPoolConverterExecutor(1, preload_modules=[]) as executor:
+            converter = StateConverter('A')
+            converter.executor = executor
+
+            for _ in range(3):
+                results = await converter.convert([ConversionInput(b'', MediaTypes.TEXT_PLAIN)])
+                assert results[0].data == b'A'
+            assert converter.sent == 1
+
+            converter.state = 'B'
+            results = await converter.convert([ConversionInput(b'', MediaTypes.TEXT_PLAIN)])
+            assert results[0].data == b'B'
+            assert converter.sent == 2
+
+    @pytest.mark.asyncio
+    async def test_replaces_broken_pool(self):
+        async with ProcessPoolConverterExecutor(1, preload_modules=[]) as executor:
+            converter = CrashingConverter()
+            converter.executor = executor
+            with pytest.raises(BrokenProcessPool):
+                await converter.convert([ConversionInput(b'', MediaTypes.TEXT_PLAIN)])
+
+            converter = PidConverter()
+            converter.executor = executor
+            results = await converter.convert([ConversionInput(b'', MediaTypes.TEXT_PLAIN, id='A')])
+
+        assert results[0].id == 'A'
+
+    @pytest.mark.asyncio
+    async def test_run_without_opt_in(self):
+        class InlineConverter(PidConverter):
+            """Reports the process ID the conversion ran in."""
+
+            PROCESS_POOL = False
+
+        async with ProcessPoolConverterExecutor(1, preload_modules=[]) as executor:
+            converter = InlineConverter()
+            converter.executor = executor
+
+            results = await converter.convert([ConversionInput(b'', MediaTypes.TEXT_PLAIN)])
+
+        assert results[0].data == str(os.getpid()).encode()
+
+    def test_requires_workers(self):
+        with pytest.raises(ValueError):
+            ProcessPoolConverterExecutor(0)
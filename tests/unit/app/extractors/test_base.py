@@ -0,0 +1,88 @@
+from app.extractors.base import Field, FieldSet, XmlExtractor
+from lxml import etree
+import pytest
+
+
+class TestFieldSet:
+
+    def test_select(self):
+        fields = FieldSet([
+            Field('first', '//ns:a/ns:b'),
+            Field('alternative', '//ns:missing', '//ns:c/@id'),
+            Field('anchor', '//ns:c')
+        ], NAMESPACES)
+
+        selected = {field.name: match for field, match in fields.select(etree.fromstring(DOCUMENT))}
+
+        assert selected['first'].text == '2'
+        assert selected['alternative'] == 'c1'
+        assert selected['anchor'].get('id') == 'c1'
+
+    def test_requires_earlier_field(self):
+        with pytest.raises(ValueError):
+            FieldSet([Field('unit', '//ns:a/@uom', requires='value'), Field('value', '//ns:a')], NAMESPACES)
+
+    def test_invalid_path(self):
+        with pytest.raises(ValueError):
+            FieldSet([Field('relative', 'ns:a')], NAMESPACES)
+        with pytest.raises(ValueError):
+            FieldSet([Field('unknown', '//other:a')], NAMESPACES)
+
+
+class TestXmlExtractor:
+
+    @pytest.mark.asyncio
+    async def test_extract_fields(self):
+        assert await FieldExtractor().extract(DOCUMENT) == {
+            'period': {
+                'start': '2',
+                'end': None
+            },
+            'ids': {
+                'c': 'c1'
+            },
+            'size': {
+                'value': 'c1',
+                'unit': None
+            }
+        }
+
+    @pytest.mark.asyncio
+    async def test_extract_element(self):
+        extractor = FieldExtractor()
+
+        assert await extractor.extract_element(etree.fromstring(DOCUMENT)) == await extractor.extract(DOCUMENT)
+
+
+class FieldExtractor(XmlExtractor):
+    """Extractor for testing fields."""
+
+    FIELDS = FieldSet([
+        Field('period.start', '//ns:a/ns:b'),
+        Field('period.end', '//ns:missing'),
+        Field('ids.c', '//ns:c/@id', optional=True),
+        Field('ids.d', '//ns:d/@id', optional=True),
+        Field('cancel.start', '//ns:missing', optional=True),
+        Field('size.value', '//ns:c/@id', optional=True),
+        Field('size.unit', '//ns:c/@uom', requires='size.value'),
+        Field('length.value', '//ns:missing', optional=True),
+        Field('length.unit', '//ns:c/@id', requires='length.value')
+    ], {'ns': 'urn:test'})
+
+    def __init__(self):
+        super().__init__(namespaces=NAMESPACES)
+
+    async def _extract(self, xml_tree: etree.ElementTree):
+        return self.extract_fields(xml_tree, self.FIELDS)
+
+
+NAMESPACES = {'ns': 'urn:test'}
+
+DOCUMENT = b'''\
+<ns:root xmlns:ns="urn:test">
+    <ns:a/>
+    <ns:a><ns:b>2</ns:b></ns:a>
+    <ns:c id="c1"/>
+    <ns:c id="c2"/>
+</ns:root>
+'''
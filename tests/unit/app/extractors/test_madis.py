@@ -1,4 +1,5 @@
 from app.extractors import MadisCsvExtractor
+from app.util.madis import InvalidMadisCsvLineError
 import pytest
 
 
@@ -285,6 +286,18 @@ class TestMadisCsvExtractor:
             }
         }
 
+    @pytest.mark.asyncio
+    async def test_extract_all(self, extractor):
+        data = b'\r\n'.join([MARITIME, MESONET, b'', b'NOSTATION', METAR]) + b'\n'
+
+        results = list(extractor.extract_all(data))
+
+        assert len(results) == 4
+        assert results[0] == await extractor.extract(MARITIME)
+        assert results[1] == await extractor.extract(MESONET)
+        assert isinstance(results[2], InvalidMadisCsvLineError)
+        assert results[3] == await extractor.extract(METAR)
+
 
 MARITIME = b''' SCXA2     ,12/31/2020,14:44,MARITIME  ,           ,   273.549988,V,-99999.000000,Z,100600.000000,V,   273.950012,V,-99999.000000,Z,-99999.000000,Z,-99999.000000,Z,    15.000000,Z,    58.209999,Z,  -134.649994,Z,-99999.000000,Z,-99999.000000,Z,-99999.000000,Z,     9.300000,S,,             ,,             ,999999.000000,Z,999999.000000,Z,999999.000000,Z,999999.000000,Z,999999.000000,Z,999999.000000,Z,                         ,        ,        ,        ,        ,        ,         ,                                                                                                                                                                                                                                                                '''  # noqa: E501
 
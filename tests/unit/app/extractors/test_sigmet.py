@@ -17,6 +17,37 @@ class TestSigmetExtractor:
     async def test_extract_sigmet_iwxxm30_international(self, extractor):
         assert await extractor.extract(SIGMET_IWXXM_30_INTL) == EXPECTED_SIGMET_IWXXM_30_INTL
 
+    @pytest.mark.asyncio
+    async def test_extract_motion_without_unit(self, extractor):
+        data = SIGMET_IWXXM_30_INTL.replace(b'<iwxxm:directionOfMotion uom="deg">', b'<iwxxm:directionOfMotion>')
+
+        extracted = await extractor.extract(data)
+
+        assert extracted['evolvingCondition']['directionOfMotion'] == {'unit': None, 'value': '90'}
+        assert extracted['evolvingCondition']['speedOfMotion'] == {'unit': '[kn_i]', 'value': '30'}
+
+    @pytest.mark.asyncio
+    async def test_extract_cancel(self, extractor):
+        cancel = (
+            b'<iwxxm:cancelledReportSequenceNumber>DELTA 8</iwxxm:cancelledReportSequenceNumber>'
+            + CANCELLED_VALID_PERIOD
+        )
+        data = SIGMET_IWXXM_30_INTL.replace(b'<iwxxm:analysis>', cancel + b'<iwxxm:analysis>')
+
+        assert (await extractor.extract(data))['cancel'] == {
+            'sequenceNumber': 'DELTA 8',
+            'validPeriod': {
+                'start': '2020-09-16T06:10:00Z',
+                'end': '2020-09-16T10:10:00Z'
+            }
+        }
+
+    @pytest.mark.asyncio
+    async def test_extract_cancel_period_without_sequence_number(self, extractor):
+        data = SIGMET_IWXXM_30_INTL.replace(b'<iwxxm:analysis>', CANCELLED_VALID_PERIOD + b'<iwxxm:analysis>')
+
+        assert 'cancel' not in await extractor.extract(data)
+
     @pytest.mark.asyncio
     async def test_extract_airmet_iwxxm30_domestic(self, extractor):
         assert await extractor.extract(AIRMET_IWXXM_30_US) == EXPECTED_AIRMET_IWXXM_30_US
@@ -26,6 +57,15 @@ class TestSigmetExtractor:
         assert await extractor.extract(AIRMET_IWXXM_30_INTL) == EXPECTED_AIRMET_IWXXM_30_INTL
 
 
+CANCELLED_VALID_PERIOD = b'''\
+<iwxxm:cancelledReportValidPeriod>
+  <gml:TimePeriod gml:id="uuid.cancelled">
+    <gml:beginPosition>2020-09-16T06:10:00Z</gml:beginPosition>
+    <gml:endPosition>2020-09-16T10:10:00Z</gml:endPosition>
+  </gml:TimePeriod>
+</iwxxm:cancelledReportValidPeriod>
+'''
+
 EXPECTED_AIRMET_IWXXM_30_INTL = {
     'evolvingCondition': {
         'geometry': {
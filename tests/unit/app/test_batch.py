@@ -0,0 +1,82 @@
+import asyncio
+
+from app.batch import Batch, BatchResult
+import pytest
+
+
+async def collect_all(batch):
+    results = []
+    while not batch.finished:
+        results.extend(await batch.collect(1))
+    return results
+
+
+class TestBatch:
+
+    @pytest.mark.asyncio
+    async def test_collects_results_and_errors(self):
+        async def work(item):
+            await asyncio.sleep(0.001 * (3 - item))
+            if item == 1:
+                raise ValueError('bad input')
+            return item * 2
+
+        results = await collect_all(Batch(work, [0, 1, 2], 3))
+
+        assert sorted(results) == [
+            BatchResult(0, 0, None),
+            BatchResult(1, None, 'ValueError: bad input'),
+            BatchResult(2, 4, None),
+        ]
+        assert results[0].index == 2
+
+    @pytest.mark.asyncio
+    async def test_limits_concurrency(self):
+        in_flight = 0
+        peak = 0
+
+        async def work(item):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            return item
+
+        results = await collect_all(Batch(work, range(20), 4))
+
+        assert sorted(result.value for result in results) == list(range(20))
+        assert peak == 4
+
+    @pytest.mark.asyncio
+    async def test_waits_for_collection_when_buffer_full(self):
+        started = []
+
+        async def work(item):
+            started.append(item)
+            return item
+
+        batch = Batch(work, range(10), 1, buffer=2)
+        await asyncio.sleep(0.01)
+        assert len(started) <= 3
+
+        assert len(await collect_all(batch)) == 10
+
+    @pytest.mark.asyncio
+    async def test_collect_times_out(self):
+        release = asyncio.Event()
+
+        async def work(item):
+            await release.wait()
+            return item
+
+        batch = Batch(work, [0], 1)
+        assert await batch.collect(0.01) == []
+        assert not batch.finished
+
+        release.set()
+        assert await collect_all(batch) == [BatchResult(0, 0, None)]
+
+    def test_rejects_concurrency(self):
+        with pytest.raises(ValueError):
+            Batch(lambda item: item, [], 0)
@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+from app.catalog import CatalogFileReader
+from app.exception import FileTooLargeError
+from app.util.splitter import IwxxmSplitter
+import pytest
+from tests.unit.app.extractors.test_base import DOCUMENT, FieldExtractor
+
+
+def create_download(chunks, content_length=None):
+    async def data():
+        for chunk in chunks:
+            yield chunk
+
+    file_metadata = SimpleNamespace(content_length=content_length)
+    return SimpleNamespace(record=SimpleNamespace(file_metadata=file_metadata), data=data())
+
+
+def split_chunks(data, size=16):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestCatalogFileReader:
+
+    @pytest.mark.asyncio
+    async def test_read_chunks(self):
+        reader = CatalogFileReader()
+
+        data = await reader.read(create_download([b'ab', b'cd', b'e'], content_length=5))
+        assert data == b'abcde'
+        assert type(data) is bytes
+        assert await reader.read(create_download([b'x', b'y'])) == b'xy'
+
+    @pytest.mark.asyncio
+    async def test_read_single_chunk(self):
+        chunk = b'abc'
+
+        assert await CatalogFileReader().read(create_download([chunk])) is chunk
+        assert await CatalogFileReader().read(create_download([])) == b''
+
+    @pytest.mark.asyncio
+    async def test_read_xml_chunks(self):
+        reader = CatalogFileReader()
+
+        document = await reader.read(create_download(split_chunks(DOCUMENT)))
+        assert await FieldExtractor().extract(document) == await FieldExtractor().extract(DOCUMENT)
+
+        bulletin = await reader.read(create_download(split_chunks(BULLETIN)))
+        parts = [part async for part in IwxxmSplitter().parts(bulletin)]
+        assert len(parts) == 2
+        assert parts[0].element.find('.//{urn:test}a') is not None
+        assert parts[1].element.find('.//{urn:test}b') is not None
+
+    @pytest.mark.asyncio
+    async def test_max_size(self):
+        reader = CatalogFileReader(4)
+
+        with pytest.raises(FileTooLargeError):
+            await reader.read(create_download([b'abcde'], content_length=5))
+        with pytest.raises(FileTooLargeError):
+            await reader.read(create_download([b'ab', b'c', b'de']))
+
+    @pytest.mark.asyncio
+    async def test_read_content_spills(self):
+        reader = CatalogFileReader()
+
+        with await reader.read_content(create_download([b'ab', b'cd', b'e']), spill_size=3) as content:
+            assert content.spilled
+            assert content.data[:] == b'abcde'
+
+        with await reader.read_content(create_download([b'ab', b'c']), spill_size=3) as content:
+            assert not content.spilled
+            assert content.data == b'abc'
+
+    @pytest.mark.asyncio
+    async def test_read_wrong_content_length(self):
+        reader = CatalogFileReader()
+
+        assert await reader.read(create_download([b'abc', b'def'], content_length=2)) == b'abcdef'
+        assert await reader.read(create_download([b'abc', b'def'], content_length=10)) == b'abcdef'
+
+
+BULLETIN = b'''\
+<MeteorologicalBulletin xmlns="http://def.wmo.int/collect/2014" xmlns:t="urn:test">
+    <meteorologicalInformation><t:a/></meteorologicalInformation>
+    <meteorologicalInformation><t:b/></meteorologicalInformation>
+    <bulletinIdentifier>A_LATEST</bulletinIdentifier>
+</MeteorologicalBulletin>
+'''
@@ -0,0 +1,79 @@
+from app.batch import BatchResult
+from app.codec import (
+    decode_batch_results,
+    decode_conversion_input,
+    decode_conversion_result,
+    decode_identity,
+    decode_outcome,
+    decode_profile_report,
+    encode_batch_results,
+    encode_conversion_input,
+    encode_conversion_result,
+    encode_identity,
+    encode_outcome,
+    encode_profile_report
+)
+from app.converters import ConversionInput, ConversionResult
+from app.exception import RemoteOperationError
+from app.profiling import ProfileMode, ProfileReport
+import msgpack
+from ngitws.catalog import CatalogIdentity
+from ngitws.monitoring import Operation, OperationResult
+from ngitws.types import MediaType
+
+
+def round_trip(value):
+    return msgpack.unpackb(msgpack.packb(value, use_bin_type=True), raw=False)
+
+
+class TestCodec:
+
+    def test_conversion_input(self):
+        data = bytes(range(256)) * 4096
+        conversion_input = ConversionInput(data, MediaType('text', 'plain'), id='a')
+
+        encoded = encode_conversion_input(conversion_input)
+        assert encoded[0] is data
+
+        decoded = decode_conversion_input(round_trip(encoded))
+        assert decoded.data == data
+        assert str(decoded.media_type) == 'text/plain'
+        assert decoded.id == 'a'
+
+    def test_conversion_result(self):
+        result = ConversionResult(b'<xml/>', MediaType('application', 'xml'))
+
+        decoded = decode_conversion_result(round_trip(encode_conversion_result(result)))
+        assert decoded.data == b'<xml/>'
+        assert str(decoded.media_type) == 'application/xml'
+        assert decoded.id is None
+
+    def test_identity(self):
+        identity = CatalogIdentity('CATALOG', 'record.1')
+
+        assert decode_identity(round_trip(encode_identity(identity))) == identity
+
+    def test_outcome(self):
+        remote = Operation('test')
+        remote.result = OperationResult.FAIL
+        remote.message = 'Processing failed'
+        remote.error = ValueError('bad product')
+
+        operation = Operation('test')
+        decode_outcome(round_trip(encode_outcome(remote)), operation)
+        assert operation.result == OperationResult.FAIL
+        assert operation.message == 'Processing failed'
+        assert isinstance(operation.error, RemoteOperationError)
+        assert str(operation.error) == 'ValueError: bad product'
+
+    def test_profile_report(self):
+        report = ProfileReport(ProfileMode.SAMPLING, 1.5, 'MetarExtractionHandler', 3, 'stats\n', 'a;b 3\n')
+
+        assert decode_profile_report(round_trip(encode_profile_report(report))) == report
+
+    def test_batch_results(self):
+        results = [BatchResult(1, ['a'], None), BatchResult(0, None, 'ValueError: bad input')]
+
+        finished, decoded = decode_batch_results(round_trip(encode_batch_results(True, results)), tuple)
+        assert finished
+        assert decoded == [BatchResult(1, ('a',), None), BatchResult(0, None, 'ValueError: bad input')]
@@ -0,0 +1,135 @@
+import asyncio
+
+from app.deduplication import Duplicate, NotificationDeduplicator
+from app.handlers import SubscriptionNotificationHandler
+from app.scheduler import HandlerScheduler
+from ngitws.catalog import CatalogIdentity
+from ngitws.monitoring import Operation, OperationResult
+import pytest
+
+
+class Handler:
+    """Handler that records the runs it started and finishes each when released."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, operation):
+        self.calls += 1
+        call = self.calls
+        await self.release.wait()
+        operation.message = f'run {call}'
+        operation.result = OperationResult.PASS
+
+
+class BlockingHandler(SubscriptionNotificationHandler):
+    """Subscription handler that counts its runs and finishes each when released."""
+
+    def __init__(self):
+        super().__init__(None, 'test')
+        self.handle = Handler()
+
+    @classmethod
+    async def create(cls, resources):
+        return cls()
+
+    @classmethod
+    def is_enabled(cls, resources):
+        return True
+
+    async def _run(self, identity, operation):
+        await self.handle(operation)
+
+
+class TestNotificationDeduplicator:
+
+    @pytest.mark.asyncio
+    async def test_queues_one_follow_up_run(self):
+        deduplicator = NotificationDeduplicator()
+        handle = Handler()
+        operations = [Operation('test') for _ in range(4)]
+
+        tasks = [asyncio.create_task(deduplicator.run('A', operations[0], handle))]
+        await asyncio.sleep(0)
+        tasks.extend(asyncio.create_task(deduplicator.run('A', operation, handle)) for operation in operations[1:])
+        await asyncio.sleep(0)
+        assert handle.calls == 1
+        assert deduplicator.queued == 1
+
+        handle.release.set()
+        duplicates = await asyncio.gather(*tasks)
+
+        assert handle.calls == 2
+        assert duplicates == [None, None, Duplicate.QUEUED, Duplicate.QUEUED]
+        assert [operation.message for operation in operations] == ['run 1', 'run 2', 'run 2', 'run 2']
+        assert deduplicator.collapsed == 2
+        assert deduplicator.in_flight == 0
+        assert deduplicator.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_runs_again_after_settling(self):
+        deduplicator = NotificationDeduplicator()
+        handle = Handler()
+        handle.release.set()
+
+        assert await deduplicator.run('A', Operation('test'), handle) is None
+        assert await deduplicator.run('A', Operation('test'), handle) is None
+        assert handle.calls == 2
+        assert deduplicator.collapsed == 0
+
+    @pytest.mark.asyncio
+    async def test_keys_are_independent(self):
+        deduplicator = NotificationDeduplicator()
+        handle = Handler()
+
+        tasks = [asyncio.create_task(deduplicator.run(key, Operation('test'), handle)) for key in ['A', 'B']]
+        await asyncio.sleep(0)
+        assert deduplicator.in_flight == 2
+
+        handle.release.set()
+        assert await asyncio.gather(*tasks) == [None, None]
+        assert handle.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_defers_duplicates_of_interrupted_run(self):
+        deduplicator = NotificationDeduplicator()
+        handle = Handler()
+
+        leader = asyncio.create_task(deduplicator.run('A', Operation('test'), handle))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(deduplicator.run('A', Operation('test'), handle))
+        await asyncio.sleep(0)
+        operation = Operation('test')
+        duplicate = asyncio.create_task(deduplicator.run('A', operation, handle))
+        await asyncio.sleep(0)
+
+        follower.cancel()
+        assert await duplicate == Duplicate.QUEUED
+        assert operation.result == OperationResult.DEFER
+
+        handle.release.set()
+        assert await leader is None
+        assert handle.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_duplicates_do_not_hold_slots(self):
+        scheduler = HandlerScheduler(1)
+        handler = BlockingHandler()
+        handler.deduplicator = NotificationDeduplicator()
+        identity = CatalogIdentity('A', 'a')
+        operations = [Operation('test') for _ in range(3)]
+
+        tasks = []
+        for operation in operations:
+            tasks.append(asyncio.create_task(handler.run(identity, operation, slot=scheduler.slot)))
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert (scheduler.in_flight, scheduler.waiting) == (1, 0)
+
+        handler.handle.release.set()
+        await asyncio.gather(*tasks)
+
+        assert handler.handle.calls == 2
+        assert [operation.message for operation in operations] == ['run 1', 'run 2', 'run 2']
+        assert scheduler.in_flight == 0
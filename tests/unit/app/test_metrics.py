@@ -0,0 +1,98 @@
+import asyncio
+
+from app.metrics import HandlerMetrics, LoopLagMonitor, MetricsServer, MetricsWriter
+from app.timing import LatencyHistogram
+from ngitws.monitoring import OperationResult
+import pytest
+
+
+async def scrape(port, request):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(request)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+
+    head, _, body = response.partition(b'\r\n\r\n')
+    return head.decode('latin-1').split('\r\n'), body.decode('utf-8')
+
+
+class TestHandlerMetrics:
+
+    def test_counts(self):
+        metrics = HandlerMetrics()
+        metrics.started('A')
+        metrics.started('A')
+        metrics.finished('A', OperationResult.PASS)
+
+        assert metrics.in_flight() == {'A': 1}
+        assert metrics.results() == {('A', OperationResult.PASS): 1}
+
+
+class TestLoopLagMonitor:
+
+    def test_observe(self):
+        monitor = LoopLagMonitor()
+        monitor.observe(0.2)
+        monitor.observe(-0.001)
+
+        assert monitor.last == 0.0
+        assert monitor.histogram.count == 2
+        assert monitor.histogram.sum == pytest.approx(0.2)
+
+
+class TestMetricsWriter:
+
+    def test_render(self):
+        histogram = LatencyHistogram([0.1, 1.0])
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(2.0)
+
+        writer = MetricsWriter('test')
+        writer.counter('runs_total', 'Runs.', [({'handler': 'A"\\'}, 3)])
+        writer.gauge('lag_seconds', 'Lag.', [({}, 0.25)])
+        writer.histogram('duration_seconds', 'Durations.', [({'stage': 'convert'}, histogram)])
+
+        assert writer.render().splitlines() == [
+            '# HELP test_runs_total Runs.',
+            '# TYPE test_runs_total counter',
+            'test_runs_total{handler="A\\"\\\\"} 3',
+            '# HELP test_lag_seconds Lag.',
+            '# TYPE test_lag_seconds gauge',
+            'test_lag_seconds 0.25',
+            '# HELP test_duration_seconds Durations.',
+            '# TYPE test_duration_seconds histogram',
+            'test_duration_seconds_bucket{stage="convert",le="0.1"} 1',
+            'test_duration_seconds_bucket{stage="convert",le="1"} 2',
+            'test_duration_seconds_bucket{stage="convert",le="+Inf"} 3',
+            'test_duration_seconds_sum{stage="convert"} 2.55',
+            'test_duration_seconds_count{stage="convert"} 3',
+        ]
+
+
+class TestMetricsServer:
+
+    @pytest.mark.asyncio
+    async def test_scrape(self):
+        async def collect():
+            return 'test_metric 1\n'
+
+        async with MetricsServer('127.0.0.1', 0, collect) as server:
+            head, body = await scrape(server.port, b'GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n')
+
+        assert head[0] == 'HTTP/1.1 200 OK'
+        assert f'Content-Type: {MetricsWriter.CONTENT_TYPE}' in head
+        assert body == 'test_metric 1\n'
+
+    @pytest.mark.asyncio
+    async def test_errors(self):
+        async def collect():
+            return ''
+
+        async with MetricsServer('127.0.0.1', 0, collect) as server:
+            not_found, _ = await scrape(server.port, b'GET / HTTP/1.1\r\n\r\n')
+            not_allowed, _ = await scrape(server.port, b'POST /metrics HTTP/1.1\r\n\r\n')
+
+        assert not_found[0] == 'HTTP/1.1 404 Not Found'
+        assert not_allowed[0] == 'HTTP/1.1 405 Method Not Allowed'
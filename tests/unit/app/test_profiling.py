@@ -0,0 +1,56 @@
+import time
+
+from app.profiling import ProfileMode, Profiler
+import pytest
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestProfiler:
+
+    def test_sampling(self):
+        profiler = Profiler(interval=0.001)
+        profiler.start()
+        busy(0.1)
+        report = profiler.stop()
+
+        assert report.mode is ProfileMode.SAMPLING
+        assert report.samples > 0
+        assert 'busy (test_profiling.py' in report.stats
+        assert 'test_sampling (test_profiling.py' in report.folded
+        assert not profiler.active
+
+    def test_sampling_handler(self):
+        profiler = Profiler(interval=0.001)
+        profiler.start(handler='MetarExtractionHandler')
+        busy(0.05)
+        report = profiler.stop()
+
+        assert report.handler == 'MetarExtractionHandler'
+        assert report.samples == 0
+        assert report.folded == ''
+
+    def test_cprofile(self):
+        profiler = Profiler()
+        profiler.start(ProfileMode.CPROFILE)
+        busy(0.01)
+        report = profiler.stop()
+
+        assert report.mode is ProfileMode.CPROFILE
+        assert 'busy' in report.stats
+
+    def test_one_session(self):
+        profiler = Profiler()
+        profiler.start()
+        with pytest.raises(RuntimeError):
+            profiler.start()
+        profiler.stop()
+
+        with pytest.raises(RuntimeError):
+            profiler.stop()
+        with pytest.raises(ValueError):
+            profiler.start(ProfileMode.CPROFILE, 'MetarExtractionHandler')
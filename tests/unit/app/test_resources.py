@@ -0,0 +1,77 @@
+import asyncio
+from types import SimpleNamespace
+
+import app.resources
+from app.resources import ResourceManager
+from ngitws.catalog import CatalogIdentity
+from ngitws.monitoring import Operation, OperationResult
+import pytest
+
+
+class UnavailableCatalogClient:
+
+    async def get_record(self, identity, **kwargs):
+        raise RuntimeError('Catalog unavailable')
+
+
+class SlowExecutor:
+    """Executor that takes a moment to open and counts the times it was opened."""
+
+    opened = 0
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+
+    async def __aenter__(self):
+        await asyncio.sleep(0.01)
+        SlowExecutor.opened += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+def create_config():
+    return SimpleNamespace(
+        concurrency=2,
+        extractors=SimpleNamespace(madis=SimpleNamespace(
+            metadata_catalog_id='MADIS_METADATA',
+            part_window=4,
+            prefetch=None,
+            spill_size=None,
+            subscription_id='madis'
+        )),
+        max_file_size=1024,
+        notification_dedup_enabled=False
+    )
+
+
+class TestResourceManager:
+
+    @pytest.mark.asyncio
+    async def test_handler_records_metrics(self, monkeypatch):
+        async def catalog_client(self):
+            return UnavailableCatalogClient()
+
+        monkeypatch.setattr(ResourceManager, 'catalog_client', catalog_client)
+
+        async with ResourceManager(create_config()) as resources:
+            handler = await resources.handler('madis_csv_extractor')
+            operation = Operation('test')
+            await handler.run(CatalogIdentity('MADIS', 'collective'), operation)
+
+        assert handler.metrics is resources.handler_metrics
+        assert operation.result == OperationResult.FAIL
+        assert resources.handler_metrics.results() == {('MadisCsvExtractionHandler', OperationResult.FAIL): 1}
+        assert resources.handler_metrics.in_flight() == {'MadisCsvExtractionHandler': 0}
+
+    @pytest.mark.asyncio
+    async def test_converter_executor_started_once(self, monkeypatch):
+        monkeypatch.setattr(app.resources, 'ProcessPoolConverterExecutor', SlowExecutor)
+        monkeypatch.setattr(SlowExecutor, 'opened', 0)
+
+        async with ResourceManager(create_config(), process_pool=True) as resources:
+            executors = await asyncio.gather(resources.converter_executor(), resources.converter_executor())
+
+        assert executors[0] is executors[1]
+        assert SlowExecutor.opened == 1
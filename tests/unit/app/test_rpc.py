@@ -0,0 +1,159 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from app import rpc
+from app.rpc import RpcClient, RpcServer
+import msgpack
+import pytest
+
+
+class EchoServer:
+    """msgpack-rpc server whose echo command answers after the requested delay."""
+
+    def __init__(self):
+        self.connections = 0
+        self.in_flight = 0
+        self.peak = 0
+
+    async def __call__(self, reader, writer):
+        self.connections += 1
+        unpacker = msgpack.Unpacker(raw=False)
+        tasks = set()
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            unpacker.feed(data)
+            for _, message_id, _, (value, delay) in unpacker:
+                tasks.add(asyncio.create_task(self.__respond(writer, message_id, value, delay)))
+        await asyncio.gather(*tasks)
+        writer.close()
+
+    async def __respond(self, writer, message_id, value, delay):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(delay)
+        self.in_flight -= 1
+        writer.write(msgpack.packb([1, message_id, None, value], use_bin_type=True))
+
+
+class SizeExtractor:
+    """Extractor that reports the size of its input and fails on empty input."""
+
+    def __init__(self):
+        self.inputs = 0
+
+    def description(self):
+        return 'Size of the input'
+
+    async def extract(self, data):
+        self.inputs += 1
+        if not data:
+            raise ValueError('empty input')
+        return {'size': len(data)}
+
+
+@asynccontextmanager
+async def serve(path, handler):
+    server = await asyncio.start_unix_server(handler, str(path))
+    try:
+        yield
+    finally:
+        server.close()
+
+
+class TestRpcClient:
+
+    @pytest.mark.asyncio
+    async def test_multiplexes_requests(self, tmp_path):
+        path = tmp_path / 'rpc.sock'
+        handler = EchoServer()
+        async with serve(path, handler), RpcClient(path, pool_size=1) as client:
+            results = await asyncio.gather(*[client.call('echo', i, 0.01 * (5 - i)) for i in range(5)])
+
+        assert results == list(range(5))
+        assert handler.connections == 1
+        assert handler.peak == 5
+
+    @pytest.mark.asyncio
+    async def test_limits_requests_in_flight(self, tmp_path):
+        path = tmp_path / 'rpc.sock'
+        handler = EchoServer()
+        async with serve(path, handler), RpcClient(path, pool_size=2, max_in_flight=3) as client:
+            results = await asyncio.gather(*[client.call('echo', i, 0.01) for i in range(20)])
+            assert client.connections == 2
+
+        assert results == list(range(20))
+        assert handler.peak == 6
+
+    @pytest.mark.asyncio
+    async def test_close_waits_for_requests(self, tmp_path):
+        path = tmp_path / 'rpc.sock'
+        async with serve(path, EchoServer()):
+            client = RpcClient(path)
+            await client.__aenter__()
+            call = asyncio.create_task(client.call('echo', 'done', 0.05))
+            await asyncio.sleep(0.01)
+
+            await client.close()
+
+        assert call.done()
+        assert call.result() == 'done'
+        assert client.connections == 0
+        with pytest.raises(RuntimeError):
+            await client.call('echo', 'late', 0)
+
+    @pytest.mark.asyncio
+    async def test_connection_lost(self, tmp_path):
+        path = tmp_path / 'rpc.sock'
+
+        async def drop(reader, writer):
+            await reader.read(1)
+            writer.close()
+
+        async with serve(path, drop), RpcClient(path) as client:
+            with pytest.raises(ConnectionError):
+                await client.call('echo', 'lost', 0)
+
+
+class TestRpcServer:
+
+    @pytest.mark.asyncio
+    async def test_runs_extractor_batch(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(rpc, 'RPC_MAX_BATCH_SIZE', 10)
+        path = tmp_path / 'rpc.sock'
+        extractor = SizeExtractor()
+        batch = [b'a' * 4, b'', b'b' * 8, b'c' * 12, b'd']
+
+        async with RpcServer(path, {}, {'size': extractor}, {}), RpcClient(path) as client:
+            results = [result async for result in client.run_extractor_batch('size', batch, concurrency=2)]
+
+        assert sorted(results) == [
+            (0, {'size': 4}, None),
+            (1, None, 'ValueError: empty input'),
+            (2, {'size': 8}, None),
+            (3, {'size': 12}, None),
+            (4, {'size': 1}, None),
+        ]
+        assert extractor.inputs == 5
+
+    @pytest.mark.asyncio
+    async def test_accepts_requests_over_default_buffer_size(self, tmp_path):
+        path = tmp_path / 'rpc.sock'
+        data = bytes(101 * 1024 * 1024)
+
+        async def extract():
+            async with RpcServer(path, {}, {'size': SizeExtractor()}, {}), RpcClient(path) as client:
+                return await client.run_extractor('size', data)
+
+        assert await asyncio.wait_for(extract(), 30) == {'size': len(data)}
+
+    @pytest.mark.asyncio
+    async def test_rejects_requests_over_buffer_size(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(rpc, 'RPC_MAX_BUFFER_SIZE', 1024)
+        path = tmp_path / 'rpc.sock'
+
+        async with RpcServer(path, {}, {'size': SizeExtractor()}, {}), RpcClient(path) as client:
+            with pytest.raises(ValueError):
+                await client.run_extractor('size', bytes(2048))
+            assert await client.run_extractor('size', bytes(16)) == {'size': 16}
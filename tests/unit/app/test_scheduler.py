@@ -0,0 +1,88 @@
+import asyncio
+
+from app.scheduler import HandlerPriority, HandlerScheduler
+import pytest
+
+
+class TestHandlerScheduler:
+
+    @pytest.mark.asyncio
+    async def test_slot_limits_in_flight(self):
+        scheduler = HandlerScheduler(2)
+        peak = 0
+
+        async def run():
+            nonlocal peak
+            async with scheduler.slot():
+                peak = max(peak, scheduler.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[run() for _ in range(6)])
+
+        assert peak == 2
+        assert scheduler.in_flight == 0
+        assert scheduler.waiting == 0
+
+    @pytest.mark.asyncio
+    async def test_slot_admits_by_priority(self):
+        scheduler = HandlerScheduler(1)
+        order = []
+
+        async def run(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+
+        async with scheduler.slot():
+            tasks = [
+                asyncio.create_task(run('low', HandlerPriority.LOW)),
+                asyncio.create_task(run('normal', HandlerPriority.NORMAL)),
+                asyncio.create_task(run('high', HandlerPriority.HIGH)),
+                asyncio.create_task(run('normal-2', HandlerPriority.NORMAL))
+            ]
+            await asyncio.sleep(0)
+            assert scheduler.waiting == 4
+
+        await asyncio.gather(*tasks)
+
+        assert order == ['high', 'normal', 'normal-2', 'low']
+
+    @pytest.mark.asyncio
+    async def test_slot_reserves_capacity(self):
+        scheduler = HandlerScheduler(2, reserved=1)
+        release = asyncio.Event()
+
+        async def run(priority):
+            async with scheduler.slot(priority):
+                await release.wait()
+
+        low_tasks = [asyncio.create_task(run(HandlerPriority.LOW)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert scheduler.in_flight == 1
+        assert scheduler.waiting == 1
+
+        high_task = asyncio.create_task(run(HandlerPriority.HIGH))
+        await asyncio.sleep(0)
+        assert scheduler.in_flight == 2
+        assert scheduler.waiting == 1
+
+        release.set()
+        await asyncio.gather(high_task, *low_tasks)
+        assert scheduler.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_slot_cancelled_while_waiting(self):
+        scheduler = HandlerScheduler(1)
+
+        async with scheduler.slot():
+            task = asyncio.create_task(scheduler.slot().__aenter__())
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        assert scheduler.in_flight == 0
+        assert scheduler.waiting == 0
+
+    def test_invalid_reserved(self):
+        with pytest.raises(ValueError):
+            HandlerScheduler(2, reserved=2)
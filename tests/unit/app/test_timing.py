@@ -0,0 +1,68 @@
+import asyncio
+
+from app.timing import LatencyHistogram, stage, StageLatencies, StageTimer
+import pytest
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLatencyHistogram:
+
+    def test_observe(self):
+        histogram = LatencyHistogram([0.1, 1.0])
+        for seconds in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(seconds)
+
+        assert histogram.cumulative_counts() == [2, 3, 4]
+        assert histogram.count == 4
+        assert histogram.sum == pytest.approx(2.65)
+
+    def test_buckets_in_order(self):
+        with pytest.raises(ValueError):
+            LatencyHistogram([1.0, 0.1])
+
+
+class TestStageTimer:
+
+    def test_stages_add_up(self):
+        clock = Clock()
+        with StageTimer(clock) as timer:
+            for _ in range(2):
+                with stage('fetch_file'):
+                    clock.now += 1.5
+
+        with stage('fetch_file'):
+            clock.now += 10
+
+        assert timer.durations == {'fetch_file': 3.0}
+
+    @pytest.mark.asyncio
+    async def test_stages_in_tasks(self):
+        async def extract():
+            with stage('extract'):
+                await asyncio.sleep(0)
+
+        with StageTimer() as timer:
+            await asyncio.gather(*[asyncio.ensure_future(extract()) for _ in range(3)])
+
+        assert list(timer.durations) == ['extract']
+
+
+class TestStageLatencies:
+
+    def test_observe(self):
+        latencies = StageLatencies([1.0])
+        latencies.observe('MetarHandler', 'upsert', 0.5)
+        latencies.observe('MetarHandler', 'upsert', 2.0)
+        latencies.observe('TafHandler', 'upsert', 0.5)
+
+        histograms = latencies.histograms()
+        assert histograms['MetarHandler', 'upsert'].cumulative_counts() == [1, 2]
+        assert histograms['TafHandler', 'upsert'].count == 1
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from app.handlers import SubscriptionNotificationHandler
+from app.watchdog import LoopWatchdog
+from ngitws.monitoring import Operation, OperationResult
+import pytest
+
+
+class BlockingHandler(SubscriptionNotificationHandler):
+    """Handler that blocks the event loop."""
+
+    @classmethod
+    async def create(cls, resources):
+        return cls(None, 'blocking')
+
+    @classmethod
+    def is_enabled(cls, resources):
+        return True
+
+    async def _run(self, identity, operation):
+        time.sleep(0.2)
+        operation.result = OperationResult.PASS
+
+
+class TestLoopWatchdog:
+
+    @pytest.mark.asyncio
+    async def test_records_stall(self):
+        async with LoopWatchdog(0.05, interval=0.01) as watchdog:
+            await asyncio.sleep(0.05)
+            await BlockingHandler(None, 'blocking').run('ABC', Operation('test'))
+            await asyncio.sleep(0.05)
+
+        assert watchdog.stall_count == 1
+        stall, = watchdog.stalls
+        assert stall.duration >= 0.15
+        assert stall.handler == 'BlockingHandler'
+        assert stall.identity == 'ABC'
+        assert 'time.sleep(0.2)' in stall.stack[-1]
+
+    @pytest.mark.asyncio
+    async def test_ignores_short_callbacks(self):
+        async with LoopWatchdog(0.5, interval=0.01) as watchdog:
+            for _ in range(10):
+                time.sleep(0.01)
+                await asyncio.sleep(0.01)
+
+        assert watchdog.stall_count == 0
+        assert watchdog.stalls == []
@@ -0,0 +1,38 @@
+from app.util.madis import MadisTimestampCodec
+import pytest
+
+
+class TestMadisTimestampCodec:
+
+    def test_decode(self):
+        codec = MadisTimestampCodec()
+
+        timestamp = codec.decode('12/31/2020', '14:44')
+
+        assert timestamp.iso == '2020-12-31T14:44:00.000Z'
+        assert timestamp.epoch_millis == 1609425840000
+        assert timestamp.datetime.year == 2020
+
+    def test_decode_cached(self):
+        codec = MadisTimestampCodec()
+
+        first = codec.decode('12/31/2020', '14:44')
+        second = codec.decode('12/31/2020', '14:44')
+
+        assert first is second
+        assert codec.hits == 1
+        assert codec.misses == 1
+
+    def test_decode_bounded(self):
+        codec = MadisTimestampCodec(max_size=2)
+
+        codec.decode('12/31/2020', '14:40')
+        codec.decode('12/31/2020', '14:41')
+        codec.decode('12/31/2020', '14:42')
+        codec.decode('12/31/2020', '14:40')
+
+        assert codec.misses == 4
+
+    def test_decode_invalid(self):
+        with pytest.raises(Exception):
+            MadisTimestampCodec().decode('31/12/2020', '14:44')
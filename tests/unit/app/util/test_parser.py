@@ -46,6 +46,22 @@ class TestDefaultXmlToJsonFilter:
             'b': '1'
         }
 
+    def test_filter_nested(self):
+        chain = XmlToJsonFilterChain([GmlToGeojsonFilter(precision=2)])
+
+        element = etree.fromstring(TEST_NESTED_XML)
+
+        assert chain(element) == {
+            'a': [{'b': '1', 'c': ['2', '3']}, '4'],
+            'point': {
+                'pos': {
+                    'type': 'Point',
+                    'coordinates': [45.34, -94.33]
+                }
+            }
+        }
+        assert chain(element) == chain(element)
+
 
 class TestGmlToGeojsonFilter:
 
@@ -60,6 +76,48 @@ class TestGmlToGeojsonFilter:
             'coordinates': [45.34, -94.33]
         }
 
+    def test_filter_surface(self):
+        chain = XmlToJsonFilterChain([GmlToGeojsonFilter(['{http://www.aixm.aero/schema/5.1.1}Surface'], precision=2)])
+
+        element = etree.fromstring(TEST_AIXM_SURFACE)
+        output = chain(element)
+
+        assert output == {
+            'type': 'MultiPolygon',
+            'coordinates': [
+                [
+                    [[42.82, 13.05], [43.48, 13.3], [43.6, 11.72], [42.82, 13.05]],
+                    [[43.0, 13.0], [43.1, 12.9], [43.2, 13.0], [43.0, 13.0]]
+                ],
+                [
+                    [[35.0, -66.0], [28.25, -62.0], [31.0, -56.5], [35.0, -66.0]]
+                ]
+            ]
+        }
+
+    def test_filter_line_string(self):
+        chain = XmlToJsonFilterChain([GmlToGeojsonFilter(precision=2)])
+
+        element = etree.fromstring(TEST_GML_LINE_STRING)
+        output = chain(element)
+
+        assert output == {
+            'type': 'LineString',
+            'coordinates': [[45.34, -94.33], [45.5, -94.0]]
+        }
+
+    def test_read_geometry_unsupported(self):
+        element = etree.fromstring(TEST_GML_CURVE)
+
+        assert GmlToGeojsonFilter()._read_geometry(element) is None
+
+    @pytest.mark.parametrize('dimension', ['1', 'two'])
+    def test_read_geometry_invalid_dimension(self, dimension):
+        element = etree.fromstring(TEST_GML_LINE_STRING)
+        element.set('srsDimension', dimension)
+
+        assert GmlToGeojsonFilter()._read_geometry(element) is None
+
     def test_filter_pos(self):
         chain = XmlToJsonFilterChain([GmlToGeojsonFilter(precision=2)])
 
@@ -87,7 +145,48 @@ TEST_XML = '''
 </ns1:root>
 '''  # noqa: E501
 
+TEST_NESTED_XML = '''
+<ns1:root xmlns:gml="http://www.opengis.net/gml/3.2" xmlns:ns1="http://www.bogus.net/ns1" xmlns:ns2="http://www.bogus.net/ns2">
+  <ns2:a><ns2:b>1</ns2:b><ns2:c>2</ns2:c><!-- comment --><ns2:c>3</ns2:c></ns2:a>
+  <ns2:a>4</ns2:a>
+  <ns2:point><gml:pos>45.343239 -94.329753</gml:pos></ns2:point>
+</ns1:root>
+'''  # noqa: E501
+
 TEST_GML_COORDINATES = \
     '<gml:coordinates xmlns:gml="http://www.opengis.net/gml/3.2">45.343239, -94.329753</gml:coordinates>'
 
+TEST_AIXM_SURFACE = '''
+<aixm:Surface xmlns:aixm="http://www.aixm.aero/schema/5.1.1" xmlns:gml="http://www.opengis.net/gml/3.2" srsDimension="2">
+  <gml:polygonPatches>
+    <gml:PolygonPatch>
+      <gml:exterior>
+        <gml:LinearRing><gml:posList>42.823 13.05 43.48 13.30 43.60 11.72 42.823 13.05</gml:posList></gml:LinearRing>
+      </gml:exterior>
+      <gml:interior>
+        <gml:LinearRing><gml:posList srsDimension="3">43 13 0 43.1 12.9 0 43.2 13 0 43 13 0</gml:posList></gml:LinearRing>
+      </gml:interior>
+    </gml:PolygonPatch>
+    <gml:PolygonPatch>
+      <gml:exterior>
+        <gml:LinearRing><gml:posList>35.00 -66.00 28.25 -62.00 31.00 -56.50 35.00 -66.00</gml:posList></gml:LinearRing>
+      </gml:exterior>
+    </gml:PolygonPatch>
+  </gml:polygonPatches>
+</aixm:Surface>
+'''  # noqa: E501
+
+TEST_GML_LINE_STRING = '''
+<gml:LineString xmlns:gml="http://www.opengis.net/gml/3.2">
+  <gml:pos>45.343239 -94.329753</gml:pos>
+  <gml:pos>45.5 -94.0</gml:pos>
+</gml:LineString>
+'''
+
+TEST_GML_CURVE = '''
+<gml:Curve xmlns:gml="http://www.opengis.net/gml/3.2">
+  <gml:segments><gml:Arc><gml:posList>45 -94 45.5 -94.5 46 -94</gml:posList></gml:Arc></gml:segments>
+</gml:Curve>
+'''
+
 TEST_GML_POS = '<gml:pos xmlns:gml="http://www.opengis.net/gml/3.2">45.343239 -94.329753</gml:pos>'
@@ -0,0 +1,74 @@
+import asyncio
+
+from app.util.pipeline import bounded_map
+import pytest
+
+
+async def produce(items, produced):
+    for item in items:
+        produced.append(item)
+        yield item
+
+
+class TestBoundedMap:
+
+    @pytest.mark.asyncio
+    async def test_limits_in_flight(self):
+        in_flight = 0
+        peak = 0
+
+        async def work(item):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001 * (item % 3))
+            in_flight -= 1
+            return item * 2
+
+        results = [result async for result in bounded_map(work, produce(range(20), []), 4)]
+
+        assert sorted(results) == [item * 2 for item in range(20)]
+        assert peak == 4
+
+    @pytest.mark.asyncio
+    async def test_pulls_items_lazily(self):
+        produced = []
+        release = asyncio.Event()
+
+        async def work(item):
+            await release.wait()
+            return item
+
+        results = bounded_map(work, produce(range(10), produced), 3)
+        task = asyncio.ensure_future(results.__anext__())
+        await asyncio.sleep(0)
+        assert produced == [0, 1, 2, 3]
+
+        release.set()
+        await task
+        await results.aclose()
+
+    @pytest.mark.asyncio
+    async def test_cancels_pending_on_close(self):
+        cancelled = []
+
+        async def work(item):
+            try:
+                if item:
+                    await asyncio.sleep(10)
+                return item
+            except asyncio.CancelledError:
+                cancelled.append(item)
+                raise
+
+        results = bounded_map(work, produce(range(3), []), 3)
+        assert await results.__anext__() == 0
+        await results.aclose()
+        await asyncio.sleep(0)
+
+        assert sorted(cancelled) == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_invalid_window(self):
+        with pytest.raises(ValueError):
+            await bounded_map(asyncio.sleep, produce([], []), 0).__anext__()
@@ -1,9 +1,29 @@
+import mmap
+import tempfile
+
 from app.util.splitter import IwxxmSplitter, LineSplitter
 from lxml import etree
 import pytest
 from tests.conftest import compare_xml
 
 
+@pytest.fixture
+def map_data():
+    maps = []
+
+    def create(data):
+        file = tempfile.TemporaryFile()
+        file.write(data)
+        file.flush()
+        maps.append((file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)))
+        return maps[-1][1]
+
+    yield create
+    for file, memory_map in maps:
+        memory_map.close()
+        file.close()
+
+
 class TestIwxxmSplitter:
 
     @pytest.fixture
@@ -21,6 +41,62 @@ class TestIwxxmSplitter:
         assert compare_xml(etree.fromstring(parts[0]), etree.fromstring(IWXXM_PART1))
         assert compare_xml(etree.fromstring(parts[1]), etree.fromstring(IWXXM_PART2))
 
+    @pytest.mark.asyncio
+    async def test_stream(self, splitter):
+        parts = [part async for part in splitter.stream(IWXXM)]
+
+        assert len(parts) == 2
+        assert compare_xml(etree.fromstring(parts[0]), etree.fromstring(IWXXM_PART1))
+        assert compare_xml(etree.fromstring(parts[1]), etree.fromstring(IWXXM_PART2))
+
+    @pytest.mark.asyncio
+    async def test_parts(self, splitter):
+        parts = [part async for part in splitter.parts(IWXXM)]
+
+        assert len(parts) == 2
+        assert compare_xml(parts[0].element, etree.fromstring(IWXXM_PART1))
+        assert compare_xml(parts[1].element, etree.fromstring(IWXXM_PART2))
+        assert parts[0].data == etree.tostring(parts[0].element)
+
+    @pytest.mark.asyncio
+    async def test_parts_identifier_first(self, splitter):
+        data = (
+            b'<MeteorologicalBulletin xmlns="http://def.wmo.int/collect/2014">'
+            b'<bulletinIdentifier>A</bulletinIdentifier>'
+            b'<meteorologicalInformation><a/></meteorologicalInformation>'
+            b'</MeteorologicalBulletin>'
+        )
+
+        parts = [part async for part in splitter.parts(data)]
+
+        assert len(parts) == 1
+        assert compare_xml(parts[0].element, etree.fromstring(
+            b'<MeteorologicalBulletin xmlns="http://def.wmo.int/collect/2014"><meteorologicalInformation><a/>'
+            b'</meteorologicalInformation><bulletinIdentifier>A</bulletinIdentifier></MeteorologicalBulletin>'
+        ))
+
+    @pytest.mark.asyncio
+    async def test_parts_missing_identifier(self, splitter):
+        data = (
+            b'<MeteorologicalBulletin xmlns="http://def.wmo.int/collect/2014">'
+            b'<meteorologicalInformation><a/></meteorologicalInformation></MeteorologicalBulletin>'
+        )
+
+        with pytest.raises(ValueError):
+            [part async for part in splitter.parts(data)]
+        assert not splitter.supports(data)
+
+    def test_supports_other_documents(self, splitter):
+        assert not splitter.supports(IWXXM_PART1.replace(b'MeteorologicalBulletin', b'Bulletin'))
+        assert not splitter.supports(b'not xml')
+
+    @pytest.mark.asyncio
+    async def test_memory_map(self, splitter, map_data):
+        data = map_data(IWXXM)
+
+        assert splitter.supports(data)
+        assert await splitter.split(data) == await splitter.split(IWXXM)
+
 
 class TestLineSplitter:
 
@@ -45,6 +121,29 @@ class TestLineSplitter:
         assert parts[0] == b'abc'
         assert parts[1] == b'123'
 
+    @pytest.mark.asyncio
+    async def test_stream(self, splitter):
+        parts = [part async for part in splitter.stream(b'abc\r\n123\n\nxyz')]
+        assert parts == await splitter.split(b'abc\r\n123\n\nxyz')
+
+    @pytest.mark.asyncio
+    async def test_memory_map(self, splitter, map_data):
+        parts = [part async for part in splitter.stream(map_data(b'abc\r\n123\n\nxyz'))]
+        assert parts == [b'abc', b'123', b'', b'xyz']
+
+    def test_offsets(self, splitter):
+        data = b'abc\r\n123\n\nxyz'
+        assert list(splitter.offsets(data)) == [(0, 3), (5, 8), (9, 9), (10, 13)]
+
+    @pytest.mark.asyncio
+    async def test_skip_blank(self):
+        splitter = LineSplitter(skip_blank=True)
+        data = b'\nabc\r\n \t\n123\r\r\n\n'
+
+        assert list(splitter.offsets(data)) == [(1, 4), (9, 12)]
+        assert await splitter.split(data) == [b'abc', b'123']
+        assert [part async for part in splitter.stream(data)] == [b'abc', b'123']
+
 
 IWXXM = b'''\
 <?xml version='1.0' encoding='UTF-8'?>